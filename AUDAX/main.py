@@ -1,6 +1,11 @@
-import pandas as pd
-import matplotlib.pyplot as plt
+import argparse
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import matplotlib
+matplotlib.use("Agg")  # Sin ventanas: también en los procesos del pool
+import matplotlib.pyplot as plt
+import pandas as pd
 import numpy as np
 
 # ---------- CONFIGURACIÓN ----------
@@ -26,7 +31,6 @@ def generar_radar(df, equipo, output_path):
     angles = np.linspace(0, 2 * np.pi, len(values), endpoint=False).tolist()
     values += values[:1]
     angles += angles[:1]
-    labels = clean_labels + [clean_labels[0]]
 
     fig, ax = plt.subplots(figsize=(6, 6), subplot_kw=dict(polar=True))
     ax.plot(angles, values, color='lime', linewidth=2)
@@ -34,7 +38,7 @@ def generar_radar(df, equipo, output_path):
     ax.set_facecolor('#0E3F5C')
     ax.set_theta_offset(np.pi / 2)
     ax.set_theta_direction(-1)
-    ax.set_thetagrids(np.degrees(angles[:-1]), labels)
+    ax.set_thetagrids(np.degrees(angles[:-1]), clean_labels)
     ax.set_ylim(0, 100)
     ax.set_title(equipo, color='white', weight='bold', size=16, pad=20)
     ax.tick_params(colors='white')
@@ -45,8 +49,8 @@ def generar_radar(df, equipo, output_path):
 
     fig.patch.set_facecolor('#0E3F5C')
     plt.tight_layout()
-    plt.savefig(output_path, dpi=300, bbox_inches='tight', facecolor=fig.get_facecolor())
-    plt.close()
+    fig.savefig(output_path, dpi=300, bbox_inches='tight', facecolor=fig.get_facecolor())
+    plt.close(fig)
 
 # ---------- TABLA COMPARATIVA ----------
 def color_cells(value):
@@ -105,14 +109,114 @@ def generar_tabla_comparativa(df, equipo1, equipo2, output_path):
             else:
                 cell.set_text_props(color='white', weight='bold')
 
-    plt.savefig(output_path, dpi=300, bbox_inches='tight', facecolor=fig.get_facecolor())
-    plt.close()
+    fig.savefig(output_path, dpi=300, bbox_inches='tight', facecolor=fig.get_facecolor())
+    plt.close(fig)
+
+# ---------- FIXTURES Y TRABAJOS ----------
+def nombre_archivo(equipo):
+    return equipo.replace(' ', '_')
+
+def construir_fixtures(jornada_df):
+    """
+    Partidos de la jornada a partir de match_id.
+
+    Retorna:
+    - Lista de (match_id, local, visita) ordenada por match_id. El local es `home_team` si
+      el archivo lo trae; si no, el primer equipo del partido.
+    """
+    fixtures = []
+    for match_id, partido in jornada_df.groupby(jornada_df["match_id"].astype(str), sort=True):
+        equipos = partido["team_name"].drop_duplicates().tolist()
+        if len(equipos) != 2:
+            print(f"⚠️ El partido {match_id} tiene {len(equipos)} equipo(s); se omite su tabla.")
+            continue
+        if "home_team" in partido.columns and partido["home_team"].iloc[0] == equipos[1]:
+            equipos.reverse()
+        fixtures.append((match_id, equipos[0], equipos[1]))
+    return fixtures
+
+def construir_trabajos(jornada_df, fixtures, radar_folder, tabla_folder):
+    """
+    Un trabajo por radar de equipo y por tabla de partido, en orden fijo (equipos por
+    nombre, partidos por match_id). Cada trabajo lleva solo las filas que dibuja.
+    """
+    trabajos = []
+    for equipo in sorted(jornada_df["team_name"].unique()):
+        trabajos.append({
+            "tipo": "radar",
+            "equipos": (equipo,),
+            "datos": jornada_df[jornada_df["team_name"] == equipo],
+            "output_path": os.path.join(radar_folder, f"{nombre_archivo(equipo)}_radar.png"),
+        })
+    for match_id, local, visita in fixtures:
+        trabajos.append({
+            "tipo": "tabla",
+            "equipos": (local, visita),
+            "datos": jornada_df[jornada_df["match_id"].astype(str) == match_id],
+            "output_path": os.path.join(tabla_folder, f"{nombre_archivo(local)}_vs_{nombre_archivo(visita)}.png"),
+        })
+    return trabajos
+
+def ejecutar_trabajo(trabajo):
+    """Dibuja un radar o una tabla y retorna (ruta, segundos)"""
+    inicio = time.perf_counter()
+    if trabajo["tipo"] == "radar":
+        generar_radar(trabajo["datos"], *trabajo["equipos"], trabajo["output_path"])
+    else:
+        generar_tabla_comparativa(trabajo["datos"], *trabajo["equipos"], trabajo["output_path"])
+    return trabajo["output_path"], time.perf_counter() - inicio
+
+def ejecutar_trabajos(trabajos, workers=None):
+    """
+    Ejecuta los trabajos en un pool de procesos (workers=1: en el propio proceso) y muestra el avance.
+
+    Cada archivo depende solo de sus datos, así que el resultado es el mismo con cualquier
+    número de procesos y en cualquier orden de llegada.
+
+    Retorna:
+    - Diccionario ruta -> segundos de dibujo
+    """
+    workers = workers or min(len(trabajos), os.cpu_count() or 1)
+    tiempos = {}
+
+    def avance(ruta, segundos):
+        tiempos[ruta] = segundos
+        print(f"🖼️ [{len(tiempos)}/{len(trabajos)}] {os.path.basename(ruta)} ({segundos:.2f}s)")
+
+    if workers <= 1 or len(trabajos) <= 1:
+        for trabajo in trabajos:
+            avance(*ejecutar_trabajo(trabajo))
+        return tiempos
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuros = [pool.submit(ejecutar_trabajo, trabajo) for trabajo in trabajos]
+        for futuro in as_completed(futuros):
+            avance(*futuro.result())
+    return tiempos
 
 # ---------- FUNCIONES POR JORNADA ----------
-def generar_reporte_jornada(df, jornada, base_dir):
-    df = df.copy()
+def generar_reporte_jornada(df, jornada, base_dir, workers=None):
+    """
+    Radares de todos los equipos y tablas comparativas de todos los partidos de una jornada.
+
+    Parámetros:
+    - df: Filas por partido (df_final.csv); la jornada se toma de `jornada` o `match_week`
+    - jornada: Número de jornada
+    - base_dir: Carpeta donde se crea Jornada_<n>/ con radars/ y tablas/
+    - workers: Procesos para dibujar (None = uno por CPU; 1 = sin pool)
+
+    Retorna:
+    - Diccionario con la carpeta, los archivos generados, los procesos y los tiempos
+    """
+    inicio = time.perf_counter()
+    df = df[df["match_id"].astype(str) != "AVG"].copy()
+    if "jornada" not in df.columns:
+        df["jornada"] = df["match_week"]
+    # Los percentiles vienen calculados en df_final.csv (por competición y temporada);
+    # solo se calculan aquí si el archivo no los trae
     for col in metrics:
-        df[col + "_pctl"] = df[col].rank(pct=True) * 100
+        if col + "_pctl" not in df.columns:
+            df[col + "_pctl"] = df[col].rank(pct=True) * 100
 
     jornada_df = df[df["jornada"] == jornada]
     equipos = jornada_df["team_name"].unique().tolist()
@@ -124,27 +228,40 @@ def generar_reporte_jornada(df, jornada, base_dir):
     os.makedirs(radar_folder, exist_ok=True)
     os.makedirs(tabla_folder, exist_ok=True)
 
-    for equipo in equipos:
-        radar_path = os.path.join(radar_folder, f"{equipo.replace(' ', '_')}_radar.png")
-        generar_radar(jornada_df, equipo, radar_path)
+    fixtures = construir_fixtures(jornada_df)
+    con_partido = {equipo for _, local, visita in fixtures for equipo in (local, visita)}
+    for equipo in sorted(set(equipos) - con_partido):
+        print(f"⚠️ {equipo} no tiene rival en la jornada {jornada}; solo se dibuja su radar.")
 
-    if len(equipos) % 2 != 0:
-        print("⚠️ Número impar de equipos. Revisa la jornada.")
-        return
-
-    for i in range(0, len(equipos), 2):
-        equipo1 = equipos[i]
-        equipo2 = equipos[i + 1]
-        tabla_path = os.path.join(tabla_folder, f"{equipo1.replace(' ', '_')}_vs_{equipo2.replace(' ', '_')}.png")
-        generar_tabla_comparativa(jornada_df, equipo1, equipo2, tabla_path)
+    trabajos = construir_trabajos(jornada_df, fixtures, radar_folder, tabla_folder)
+    workers = workers or min(len(trabajos), os.cpu_count() or 1)
+    tiempos = ejecutar_trabajos(trabajos, workers)
 
+    total = time.perf_counter() - inicio
+    dibujo = sum(tiempos.values())
     print(f"✅ Reporte generado para jornada {jornada} en {jornada_folder}")
+    print(f"⏱️ {len(tiempos)} imágenes ({len(equipos)} radares, {len(fixtures)} tablas) en {total:.2f}s "
+          f"con {workers} proceso(s); dibujo acumulado {dibujo:.2f}s")
+    return {
+        "carpeta": jornada_folder,
+        "archivos": [trabajo["output_path"] for trabajo in trabajos],
+        "workers": workers,
+        "segundos": total,
+        "segundos_dibujo": dibujo,
+    }
 
 
 # ---------- BLOQUE PRINCIPAL ----------
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Radares y tablas comparativas de una jornada.")
+    parser.add_argument("--datos", default="data/df_final.csv", help="CSV por partido (por defecto data/df_final.csv)")
+    parser.add_argument("--jornada", type=int, default=13, help="Jornada a reportar")
+    parser.add_argument("--salida", default="reportes", help="Carpeta de salida")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos para dibujar (1 = sin pool)")
+    args = parser.parse_args()
+
     # Carga de datos
-    df = pd.read_csv("data/tus_datos.csv")
+    df = pd.read_csv(args.datos)
 
     # Llamada a la función
-    generar_reporte_jornada(df, jornada=13, base_dir="reportes")
+    generar_reporte_jornada(df, jornada=args.jornada, base_dir=args.salida, workers=args.workers)
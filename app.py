@@ -12,12 +12,17 @@ import matplotlib.cm as cm
 
 # Importar funciones de gráficos de radar
 from radar_charts import display_team_radar
+from excel_cache import read_excel_cached
+from kpi_registry import get_kpi, evaluate_kpis
 
 # Importar páginas adicionales
 import goal_performance
 import goal_performance_comparison
 import goal_performance_ranking
-import generate_csv_files
+import background_jobs
+import data_repository
+import render_cache
+import asset_cache
 import documentacion_kpis
 
 # Configuración de la página
@@ -28,15 +33,50 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Escudos y logo de la liga: se decodifican una vez por proceso, en segundo plano
+asset_cache.preload()
+
 # Menú de navegación
 st.sidebar.title("Navegación")
 choice = st.sidebar.radio("Selecciona una página:", ["KPIs Principal", "Goal Performance", "Goal Performance Team Comparison", "Goal Performance Ranking","Documentacion KPIs"])
 
-# Botón para generar archivos CSV
-st.sidebar.markdown("---")
-st.sidebar.subheader("Generación de datos")
-if st.sidebar.button("Generar archivos CSV"):
-    generate_csv_files.run_generation()
+# Botón para generar archivos CSV (en segundo plano: mientras tanto se sigue navegando
+# con el snapshot publicado)
+def generation_panel(polling):
+    job = background_jobs.current_job()
+    running = background_jobs.is_running()
+
+    incremental = st.checkbox("Solo partidos nuevos (incremental)", value=False, disabled=running)
+    if st.button("Generar archivos CSV", disabled=running):
+        started, job = background_jobs.start_generation(incremental=incremental)
+        if not started:
+            st.info("⏳ Ya hay una generación en curso.")
+        st.rerun()
+
+    if job is None:
+        return
+    if running:
+        st.progress(job["progress"], text=background_jobs.describe_event(job["last_event"]))
+        st.caption(f"⏳ Generación iniciada a las {job['started_at'][11:]}. Puedes seguir navegando.")
+    elif polling:
+        # La generación terminó mientras se consultaba su avance: se recarga la página
+        # para que las cachés pasen al snapshot nuevo
+        st.rerun()
+    elif job["status"] == "done":
+        st.success(job["message"])
+    else:
+        st.error(job["message"])
+
+with st.sidebar:
+    st.markdown("---")
+    st.subheader("Generación de datos")
+    polling = background_jobs.is_running()
+    st.fragment(generation_panel, run_every=2 if polling else None)(polling)
+    with st.expander("Caché de datos"):
+        st.dataframe(data_repository.cache_stats(), hide_index=True)
+    with st.expander("Caché de gráficos"):
+        st.dataframe(render_cache.cache_stats(), hide_index=True)
+        st.dataframe(asset_cache.cache_stats(), hide_index=True)
 
 # Título y descripción
 if choice == "KPIs Principal":
@@ -53,8 +93,8 @@ def normalize_to_range(series, new_min=0.5, new_max=9.5):
 @st.cache_data
 def load_data():
     try:
-        df = pd.read_excel("AUDAX/sb_team_match_stats_2025.xlsx")
-        df_matches = pd.read_excel("AUDAX/sb_matches_2025.xlsx")
+        df = read_excel_cached("AUDAX/sb_team_match_stats_2025.xlsx")
+        df_matches = read_excel_cached("AUDAX/sb_matches_2025.xlsx")
         
         # Fusionar datos de partidos
         df = pd.merge(
@@ -281,30 +321,20 @@ if df is not None and df_matches is not None and choice == "KPIs Principal":
     # Índice de Creación de Gol (GCI)
     st.header("Índice de Creación de Gol (GCI)")
     
-    # Calcular componentes del GCI si están disponibles en los datos
-    gci_components = {
-        'np_xg': {'weight': 0.30, 'column': 'team_match_np_xg'},
-        'xa': {'weight': 0.20, 'column': 'team_match_xa'},
-        'deep_completions': {'weight': 0.15, 'column': 'team_match_deep_completions'},
-        'obv_shot': {'weight': 0.15, 'column': 'team_match_obv_shot'},
-        'obv_pass': {'weight': 0.15, 'column': 'team_match_obv_pass'},
-        'penalties_won': {'weight': 0.05, 'column': 'team_match_penalties_faced'}
-    }
+    # Componentes y pesos del GCI desde el registro de KPIs
+    gci_components = get_kpi("Goal Creation Index")["components"]
     
     # Verificar si tenemos las columnas necesarias
-    available_components = {k: v for k, v in gci_components.items() if v['column'] in filtered_df.columns}
+    available_components = [col for col in gci_components if f"team_match_{col}" in filtered_df.columns]
     
     if available_components:
-        # Normalizar cada componente
-        normalized_df = pd.DataFrame()
-        for name, info in available_components.items():
-            col = info['column']
-            normalized_df[name] = normalize_to_range(filtered_df[col])
+        # Normalizar cada componente (los que no están disponibles no aportan)
+        normalized_df = pd.DataFrame(0.0, index=filtered_df.index, columns=list(gci_components))
+        for col in available_components:
+            normalized_df[col] = normalize_to_range(filtered_df[f"team_match_{col}"])
         
         # Calcular GCI ponderado
-        gci_values = pd.Series(0, index=filtered_df.index)
-        for name, info in available_components.items():
-            gci_values += normalized_df[name] * info['weight']
+        gci_values = evaluate_kpis(normalized_df, ["Goal Creation Index"])["Goal Creation Index"]
         
         # Añadir GCI al DataFrame
         filtered_df_sorted['GCI'] = gci_values
@@ -333,11 +363,10 @@ if df is not None and df_matches is not None and choice == "KPIs Principal":
         component_values = []
         component_names = []
         
-        for name, info in available_components.items():
-            col = info['column']
-            avg_value = filtered_df[col].mean()
+        for col in available_components:
+            avg_value = filtered_df[f"team_match_{col}"].mean()
             component_values.append(avg_value)
-            component_names.append(name)
+            component_names.append(col)
         
         fig, ax = plt.subplots(figsize=(10, 6))
         bars = ax.bar(component_names, component_values, color='maroon')
@@ -0,0 +1,144 @@
+import os
+import math
+import threading
+import numpy as np
+import pandas as pd
+from PIL import Image, ImageDraw
+
+# Escudos de los clubes y logo de la liga (PNG con transparencia)
+CRESTS_DIR = os.path.join("AUDAX", "Chile Primeradivision")
+LEAGUE_LOGO = "Liga de Primera Itaú"
+
+# Lado máximo (px) con el que se guarda cada imagen decodificada: ningún gráfico dibuja un
+# escudo más grande, y algunos originales miden más de 5000 px
+MAX_ASSET_PX = 1024
+
+# Los tamaños pedidos se redondean hacia arriba a múltiplos de este valor para que
+# gráficos con tamaños parecidos compartan la misma versión reducida
+SIZE_STEP = 64
+
+# Caché compartida por todas las sesiones del proceso
+_sources = {}   # ruta -> imagen RGBA reducida a MAX_ASSET_PX (None si no existe el archivo)
+_resized = {}   # (ruta, px) -> np.ndarray RGBA (uint8)
+_stats = {"decodes": 0, "hits": 0, "misses": 0, "placeholders": 0}
+_lock = threading.Lock()
+_preload_thread = None
+
+
+def asset_path(name, assets_dir=CRESTS_DIR):
+    """Ruta del PNG de un club (o del logo de la liga)"""
+    return os.path.join(assets_dir, f"{name}.png")
+
+
+def layout_px(fig_width_in, width_frac, dpi):
+    """Lado en px que ocupa una imagen de ancho `width_frac` (fracción de la figura) al guardarla con `dpi`"""
+    px = math.ceil(fig_width_in * width_frac * dpi / SIZE_STEP) * SIZE_STEP
+    return min(px, MAX_ASSET_PX)
+
+
+def _source(name, assets_dir=CRESTS_DIR):
+    """Imagen decodificada una sola vez por proceso (reducida a MAX_ASSET_PX)"""
+    path = asset_path(name, assets_dir)
+    with _lock:
+        if path in _sources:
+            return _sources[path]
+    image = None
+    if os.path.exists(path):
+        with Image.open(path) as raw:
+            image = raw.convert("RGBA")
+        image.thumbnail((MAX_ASSET_PX, MAX_ASSET_PX), Image.LANCZOS)
+    with _lock:
+        _stats["decodes"] += image is not None
+        _sources.setdefault(path, image)
+        return _sources[path]
+
+
+def placeholder(name, px):
+    """Escudo genérico (círculo con las iniciales) para equipos sin imagen"""
+    image = Image.new("RGBA", (px, px), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    margin = max(1, px // 16)
+    draw.ellipse([margin, margin, px - margin, px - margin], fill=(28, 93, 119, 255), outline=(255, 255, 255, 255),
+                 width=max(1, px // 32))
+    initials = "".join(word[0] for word in str(name).split()[:3]).upper()
+    draw.text((px / 2, px / 2), initials, fill=(255, 255, 255, 255), anchor="mm", font_size=max(8, px // 3))
+    return np.asarray(image)
+
+
+def crest(name, px=MAX_ASSET_PX, fallback=True, assets_dir=CRESTS_DIR):
+    """
+    Escudo de un club como array RGBA, con su lado mayor reducido a `px`.
+
+    Cada PNG se decodifica una vez por proceso y cada tamaño se remuestrea una vez; las
+    llamadas siguientes devuelven el mismo array (de solo lectura).
+
+    Parámetros:
+    - name: Nombre del club (o LEAGUE_LOGO)
+    - px: Lado máximo en px (ver layout_px)
+    - fallback: Si el archivo no existe, devuelve un escudo genérico en lugar de None
+    - assets_dir: Carpeta de los PNG (la misma que en preload)
+    """
+    px = min(int(px), MAX_ASSET_PX)
+    key = (asset_path(name, assets_dir), px)
+    with _lock:
+        if key in _resized:
+            _stats["hits"] += 1
+            return _resized[key]
+        _stats["misses"] += 1
+
+    image = _source(name, assets_dir)
+    if image is None:
+        if not fallback:
+            return None
+        with _lock:
+            _stats["placeholders"] += 1
+        array = placeholder(name, px)
+    else:
+        resized = image.copy()
+        resized.thumbnail((px, px), Image.LANCZOS)
+        array = np.asarray(resized)
+    array.setflags(write=False)
+    with _lock:
+        return _resized.setdefault(key, array)
+
+
+def preload(assets_dir=CRESTS_DIR):
+    """
+    Decodifica en un hilo de fondo todos los escudos de `assets_dir` (una vez por proceso),
+    para que el primer gráfico de cada equipo no pague la lectura del PNG original.
+
+    Retorna:
+    - El hilo de la precarga (el mismo en llamadas sucesivas)
+    """
+    global _preload_thread
+
+    def _run():
+        for file in sorted(os.listdir(assets_dir)):
+            if file.lower().endswith(".png"):
+                _source(os.path.splitext(file)[0], assets_dir)
+
+    with _lock:
+        if _preload_thread is None and os.path.isdir(assets_dir):
+            _preload_thread = threading.Thread(target=_run, name="asset-preload", daemon=True)
+            _preload_thread.start()
+        return _preload_thread
+
+
+def league_logo(px=MAX_ASSET_PX):
+    """Logo de la liga (None si no existe el archivo)"""
+    return crest(LEAGUE_LOGO, px, fallback=False)
+
+
+def cache_stats():
+    """Imágenes decodificadas, aciertos, fallos y escudos genéricos generados"""
+    with _lock:
+        return pd.DataFrame([{**_stats, "sources": len(_sources), "sizes": len(_resized)}])
+
+
+def clear():
+    """Vacía la caché y los contadores"""
+    with _lock:
+        _sources.clear()
+        _resized.clear()
+        for name in _stats:
+            _stats[name] = 0
@@ -0,0 +1,91 @@
+import threading
+from datetime import datetime
+
+import generate_csv_files
+
+# Una sola generación a la vez: Streamlit atiende todas las sesiones en el mismo proceso,
+# así que el lock y el trabajo en curso se comparten entre usuarios
+_lock = threading.Lock()
+_job = None
+
+# Nombres de los pasos del pipeline que se muestran en el panel lateral
+STEP_LABELS = {
+    "ingest": "Lectura de Excel",
+    "stage": "Etapa",
+    "partition": "Particiones",
+    "publish": "Publicación del snapshot",
+}
+
+
+def _record(job, event):
+    """Guarda un evento de avance del pipeline en el trabajo"""
+    event = dict(event, at=datetime.now().isoformat(timespec="seconds"))
+    job["events"].append(event)
+    job["last_event"] = event
+    if event["step"] == "partition" and "total" in event:
+        job["progress"] = event["done"] / event["total"] if event["total"] else 1.0
+
+
+def _run(job):
+    """Ejecuta el pipeline en el hilo de fondo y libera el lock al terminar"""
+    try:
+        report = generate_csv_files.run_pipeline(
+            incremental=job["incremental"], on_progress=lambda event: _record(job, event)
+        )
+        job.update(status="done", message=report["message"], snapshot=report.get("snapshot"), progress=1.0)
+    except Exception as e:
+        job.update(status="error", message=f"Error al generar archivos CSV: {str(e)}")
+    finally:
+        job["finished_at"] = datetime.now().isoformat(timespec="seconds")
+        _lock.release()
+
+
+def start_generation(incremental=False):
+    """
+    Lanza la generación de CSV en un hilo de fondo si no hay otra en curso.
+
+    Retorna:
+    - (True, trabajo) si se lanzó, o (False, trabajo en curso) si ya había una generación
+    """
+    global _job
+    if not _lock.acquire(blocking=False):
+        return False, current_job()
+
+    _job = {
+        "status": "running",
+        "incremental": incremental,
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "finished_at": None,
+        "progress": 0.0,
+        "last_event": None,
+        "events": [],
+        "message": None,
+        "snapshot": None,
+    }
+    threading.Thread(target=_run, args=(_job,), name="audax-generation", daemon=True).start()
+    return True, current_job()
+
+
+def is_running():
+    """Indica si hay una generación en curso"""
+    return _lock.locked()
+
+
+def current_job():
+    """Copia del último trabajo (en curso o terminado), o None si no se lanzó ninguno"""
+    if _job is None:
+        return None
+    return dict(_job, events=list(_job["events"]))
+
+
+def describe_event(event):
+    """Texto corto de un evento de avance para el panel lateral"""
+    if event is None:
+        return "Iniciando..."
+    label = STEP_LABELS.get(event["step"], event["step"])
+    if event["step"] == "stage":
+        state = "sin cambios" if event["status"] == "skipped" else "ejecutada"
+        return f"{label} '{event['stage']}' ({event['partition']}): {state}"
+    if event["step"] == "partition":
+        return f"{label}: {event['done']}/{event['total']}"
+    return f"{label}: {'en curso' if event['status'] == 'running' else 'terminada'}"
@@ -0,0 +1,100 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Archivo con las bandas de referencia por competición y temporada
+BANDS_PATH = os.path.join("data", "df_benchmark_bands.csv")
+
+DEFAULT_TOP_K = 7
+DEFAULT_QUANTILES = (0.25, 0.50, 0.75, 0.90)
+
+# Bandas que se usan en las filas TopValues de df_GoalKPIs_TopValues
+TOP_MIN = "TopValues (min)"
+TOP_MAX = "TopValues (max)"
+
+
+def quantile_label(q):
+    """Etiqueta de la banda para un cuantil (0.25 -> 'p25')"""
+    return f"p{int(round(q * 100))}"
+
+
+def compute_bands(values, k=DEFAULT_TOP_K, quantiles=DEFAULT_QUANTILES):
+    """
+    Calcula todas las bandas de referencia sobre la matriz de KPIs a la vez.
+
+    El top-k se obtiene con una ordenación parcial (np.partition) por columna,
+    sin ordenar la matriz completa.
+
+    Parámetros:
+    - values: np.ndarray (equipos x KPIs)
+    - k: Número de mejores equipos que forman la banda TopValues
+    - quantiles: Cuantiles a calcular (p. ej. 0.25, 0.5, 0.75, 0.9)
+
+    Retorna:
+    - dict etiqueta -> np.ndarray con un valor por KPI
+    """
+    values = np.asarray(values, dtype=float)
+    n = values.shape[0]
+    k = max(1, min(k, n))
+
+    # NaN al fondo para que no entren en el top-k
+    ranked = np.where(np.isnan(values), -np.inf, values)
+    top = np.partition(ranked, n - k, axis=0)[n - k:]
+    top = np.where(np.isinf(top), np.nan, top)
+
+    with np.errstate(all="ignore"):
+        bands = {
+            TOP_MIN: np.nanmin(top, axis=0),
+            TOP_MAX: np.nanmax(top, axis=0),
+        }
+        quantile_values = np.nanquantile(values, quantiles, axis=0)
+        for q, row in zip(quantiles, quantile_values):
+            bands[quantile_label(q)] = row
+        bands["mean"] = np.nanmean(values, axis=0)
+    return bands
+
+
+def build_benchmark_bands(df, kpis, competition, season, k=DEFAULT_TOP_K, quantiles=DEFAULT_QUANTILES):
+    """
+    Construye la tabla de bandas (una fila por banda) para una competición y temporada.
+
+    Retorna:
+    - DataFrame con columnas competition, season, band, k y una columna por KPI
+    """
+    bands = compute_bands(df[kpis].to_numpy(dtype=float), k=k, quantiles=quantiles)
+    table = pd.DataFrame(list(bands.values()), columns=kpis)
+    table.insert(0, "band", list(bands.keys()))
+    table.insert(0, "k", min(k, len(df)))
+    table.insert(0, "season", season)
+    table.insert(0, "competition", competition)
+    return table
+
+
+def save_benchmark_bands(table, path=BANDS_PATH):
+    """Guarda las bandas sustituyendo solo las de la misma competición y temporada"""
+    if os.path.exists(path):
+        stored = pd.read_csv(path)
+        keys = set(zip(table["competition"], table["season"].astype(str)))
+        keep = [
+            (c, str(s)) not in keys
+            for c, s in zip(stored["competition"], stored["season"])
+        ]
+        table = pd.concat([stored[keep], table], ignore_index=True)
+    table.to_csv(path, index=False)
+
+
+def load_benchmark_bands(competition=None, season=None, path=BANDS_PATH):
+    """
+    Lee las bandas guardadas, opcionalmente filtradas por competición y temporada.
+
+    Retorna:
+    - DataFrame con una fila por banda (o None si no existe el archivo)
+    """
+    if not os.path.exists(path):
+        return None
+    bands = pd.read_csv(path)
+    if competition is not None:
+        bands = bands[bands["competition"] == competition]
+    if season is not None:
+        bands = bands[bands["season"].astype(str) == str(season)]
+    return bands
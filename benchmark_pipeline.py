@@ -0,0 +1,224 @@
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import platform
+import contextlib
+import subprocess
+from datetime import datetime
+import pandas as pd
+
+from excel_cache import read_excel_cached
+from pipeline_stages import measure
+from synthetic_data import write_synthetic_inputs
+import data_store
+import generate_csv_files
+
+DEFAULT_SIZES = [250, 10_000, 100_000, 1_000_000]
+RESULTS_PATH = os.path.join("benchmarks", "results.jsonl")
+
+
+# -------------------------------------------
+# 📌 CARGA DE DATOS DE LAS PÁGINAS
+# -------------------------------------------
+# Reproducen la lectura y preparación de datos de cada página de Streamlit (sin gráficos)
+def page_kpis_principal(input_dir, output_dir):
+    """app.py: Excel de partidos + estadísticas por partido unidos por match_id"""
+    df = read_excel_cached(generate_csv_files._input_path(generate_csv_files.EXCEL_MATCH_STATS, input_dir),
+                           cache_dir=os.path.join(input_dir, ".cache"), verbose=False)
+    df_matches = read_excel_cached(generate_csv_files._input_path(generate_csv_files.EXCEL_MATCHES, input_dir),
+                                   cache_dir=os.path.join(input_dir, ".cache"), verbose=False)
+    df = pd.merge(
+        df,
+        df_matches[['match_id', 'match_date', 'competition', 'season', 'match_week', 'competition_stage', 'home_team', 'away_team']],
+        on='match_id',
+        how='left'
+    )
+    team = df["team_name"].iloc[0]
+    return df[df["team_name"] == team].sort_values("match_date")
+
+def _db_path(output_dir):
+    return data_store.store_path(output_dir=output_dir)
+
+def page_goal_performance(input_dir, output_dir):
+    """goal_performance.py: GoalKPIs con TopValues y bandas de referencia"""
+    db_path = _db_path(output_dir)
+    data_store.list_partitions(path=db_path)
+    df = data_store.get_goal_kpis(path=db_path)
+    bands = data_store.get_bands(path=db_path)
+    equipos = df[~df["team_name"].str.contains("TopValues", na=False)]["team_name"].unique()
+    return df, bands, equipos
+
+def page_team_comparison(input_dir, output_dir):
+    """goal_performance_comparison.py: partidos (con percentiles precalculados) y jornadas de un equipo"""
+    df = data_store.get_matches(path=_db_path(output_dir))
+    team = df["team_name"].iloc[0]
+    sub = df[df["team_name"] == team][["match_week", "match_id"]].drop_duplicates()
+    for _, r in sub.iterrows():
+        df[df["match_id"] == r["match_id"]]
+    return df
+
+def page_ranking(input_dir, output_dir):
+    """goal_performance_ranking.py: ranking sin filas TopValues"""
+    return data_store.get_goal_kpis(include_top=False, path=_db_path(output_dir))
+
+PAGE_DATA_PATHS = {
+    "KPIs Principal": page_kpis_principal,
+    "Goal Performance": page_goal_performance,
+    "Goal Performance Team Comparison": page_team_comparison,
+    "Goal Performance Ranking": page_ranking,
+}
+
+
+# -------------------------------------------
+# 📌 BENCHMARK
+# -------------------------------------------
+def _git_version():
+    """Commit actual del repositorio (o 'unknown' fuera de git)"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+def _stage_totals(report):
+    """Segundos (y pico de memoria) por etapa sumando todas las particiones"""
+    totals = {}
+    for partition in report["partitions"]:
+        for stage in partition["stages"]:
+            entry = totals.setdefault(stage["stage"], {"seconds": 0.0, "runs": 0})
+            entry["seconds"] = round(entry["seconds"] + stage["seconds"], 4)
+            entry["runs"] += stage["status"] == "ran"
+            if "peak_mb" in stage:
+                entry["peak_mb"] = max(entry.get("peak_mb", 0), stage["peak_mb"])
+    for step in report["steps"]:
+        totals[step["stage"]] = {k: v for k, v in step.items() if k != "stage"}
+    return totals
+
+def benchmark_size(n_rows, work_dir, seed=0, n_seasons=1, fmt="auto", max_workers=None, track_memory=True):
+    """
+    Genera datos sintéticos de n_rows filas, ejecuta el pipeline (en frío y repetido)
+    y mide la carga de datos de cada página.
+
+    Retorna:
+    - dict con tiempos de generación, pipeline por etapa, re-ejecución y páginas
+    """
+    input_dir = os.path.join(work_dir, "input")
+    output_dir = os.path.join(work_dir, "output")
+
+    with measure("synthetic", track_memory=False) as synthetic:
+        write_synthetic_inputs(n_rows, input_dir, seed=seed, n_seasons=n_seasons, fmt=fmt)
+
+    with contextlib.redirect_stdout(sys.stderr):
+        cold = generate_csv_files.run_pipeline(
+            force=True, max_workers=max_workers, input_dir=input_dir,
+            output_dir=output_dir, track_memory=track_memory
+        )
+        warm = generate_csv_files.run_pipeline(
+            max_workers=max_workers, input_dir=input_dir, output_dir=output_dir
+        )
+
+    pages = {}
+    for name, load in PAGE_DATA_PATHS.items():
+        with measure(name, track_memory) as step:
+            load(input_dir, output_dir)
+        pages[name] = {k: v for k, v in step.items() if k != "stage"}
+
+    return {
+        "rows": n_rows,
+        "partitions": len(cold["partitions"]),
+        "synthetic_seconds": synthetic["seconds"],
+        "pipeline_seconds": cold["seconds"],
+        "pipeline_peak_mb": cold.get("peak_mb"),
+        "rerun_seconds": warm["seconds"],
+        "stages": _stage_totals(cold),
+        "pages": pages,
+    }
+
+def run_benchmarks(sizes=DEFAULT_SIZES, seed=0, n_seasons=1, fmt="auto", max_workers=None,
+                   track_memory=True, label=None, results_path=RESULTS_PATH, keep=False):
+    """
+    Ejecuta el benchmark para cada tamaño y añade el resultado a results_path (JSON Lines),
+    junto con la versión del código, para poder comparar entre versiones.
+    """
+    run = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "version": _git_version(),
+        "label": label,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "cpus": os.cpu_count(),
+        "results": [],
+    }
+    for n_rows in sizes:
+        work_dir = tempfile.mkdtemp(prefix=f"audax_bench_{n_rows}_")
+        try:
+            print(f"⏱️ Benchmark con {n_rows} filas...", file=sys.stderr)
+            result = benchmark_size(n_rows, work_dir, seed, n_seasons, fmt, max_workers, track_memory)
+            run["results"].append(result)
+            print(f"✅ {n_rows} filas: pipeline {result['pipeline_seconds']:.2f}s, "
+                  f"re-ejecución {result['rerun_seconds']:.2f}s", file=sys.stderr)
+        finally:
+            if not keep:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+    if results_path:
+        os.makedirs(os.path.dirname(os.path.abspath(results_path)), exist_ok=True)
+        with open(results_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(run, ensure_ascii=False, default=str) + "\n")
+    return run
+
+def compare_runs(results_path=RESULTS_PATH, last=5):
+    """
+    Tabla comparativa (segundos del pipeline por tamaño) de las últimas ejecuciones guardadas.
+
+    Retorna:
+    - DataFrame con una fila por ejecución y una columna por tamaño
+    """
+    if not os.path.exists(results_path):
+        return None
+    rows = []
+    with open(results_path, encoding="utf-8") as f:
+        for line in f:
+            run = json.loads(line)
+            row = {"timestamp": run["timestamp"], "version": run["version"], "label": run.get("label")}
+            for result in run["results"]:
+                row[f"{result['rows']} filas (s)"] = result["pipeline_seconds"]
+            rows.append(row)
+    return pd.DataFrame(rows).tail(last).reset_index(drop=True)
+
+
+def main(argv=None):
+    """Benchmark del pipeline con datos sintéticos (resultado JSON en stdout)"""
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline de AUDAX GoalKPIs con datos sintéticos.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Filas equipo-partido a generar")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla de los datos sintéticos")
+    parser.add_argument("--seasons", type=int, default=1, help="Temporadas por competición")
+    parser.add_argument("--format", default="auto", choices=["auto", "xlsx", "parquet"], help="Formato de entrada")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos del pool de particiones")
+    parser.add_argument("--label", default=None, help="Etiqueta de la ejecución (p. ej. nombre de la rama)")
+    parser.add_argument("--results", default=RESULTS_PATH, help="Archivo JSON Lines donde se acumulan los resultados")
+    parser.add_argument("--no-memory", action="store_true", help="No medir la memoria (tracemalloc)")
+    parser.add_argument("--keep", action="store_true", help="Conservar las carpetas temporales con los datos")
+    parser.add_argument("--compare", action="store_true", help="Solo mostrar la comparación de ejecuciones guardadas")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        table = compare_runs(args.results)
+        print("Sin resultados guardados." if table is None else table.to_string(index=False))
+        return 0
+
+    run = run_benchmarks(
+        sizes=args.sizes, seed=args.seed, n_seasons=args.seasons, fmt=args.format,
+        max_workers=args.workers, track_memory=not args.no_memory, label=args.label,
+        results_path=args.results, keep=args.keep,
+    )
+    print(json.dumps(run, indent=2, ensure_ascii=False, default=str))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
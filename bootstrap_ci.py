@@ -0,0 +1,147 @@
+import multiprocessing
+import numpy as np
+import pandas as pd
+
+from partitioning import run_partitions
+from ranking_engine import AS_OF_KPIS, ADJUSTED_DISPLAY_KPIS
+
+# KPIs de los rankings -> columna por partido de df_final que se remuestrea
+BOOTSTRAP_KPIS = {**AS_OF_KPIS, **{kpi: kpi for kpi in ADJUSTED_DISPLAY_KPIS}}
+
+BOOTSTRAP_RESAMPLES = 2000
+CI_LEVEL = 0.95
+BOOTSTRAP_SEED = 2025
+
+# Remuestreos por tarea del pool (como máximo CHUNK_CELLS valores remuestreados por bloque,
+# para acotar la memoria) y trabajo mínimo (remuestreos x partidos) para usar el pool:
+# por debajo el arranque del pool cuesta más que el cálculo
+CHUNK_RESAMPLES = 500
+CHUNK_CELLS = 4_000_000
+POOL_MIN_WORK = 20_000_000
+
+
+def _resample_chunk(task):
+    """
+    Medias bootstrap de un bloque de remuestreos para todos los equipos y KPIs a la vez.
+
+    Cada equipo se remuestrea con reemplazo entre sus propios partidos: los índices de
+    todos los equipos salen de una sola matriz (remuestreos x equipos x partidos máx.)
+    y las posiciones que sobran en los equipos con menos partidos se enmascaran.
+
+    Retorna:
+    - np.ndarray (remuestreos x equipos x KPIs)
+    """
+    values, offsets, counts = task["values"], task["offsets"], task["counts"]
+    rng = np.random.default_rng(task["seed"])
+    n_max = int(counts.max())
+
+    draws = rng.random((task["n"], len(counts), n_max))
+    idx = offsets[None, :, None] + (draws * counts[None, :, None]).astype(np.int64)
+    used = np.arange(n_max)[None, None, :] < counts[None, :, None]
+    idx = np.where(used, idx, 0)
+
+    sample = values[idx]  # remuestreos x equipos x partidos x KPIs
+    valid = used[..., None] & ~np.isnan(sample)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(valid, sample, 0.0).sum(axis=2) / valid.sum(axis=2)
+
+
+def _in_worker():
+    """Dentro de un proceso del pool de particiones no se abre otro pool"""
+    return multiprocessing.parent_process() is not None
+
+
+def bootstrap_means(values, team_idx, n_resamples=BOOTSTRAP_RESAMPLES, seed=BOOTSTRAP_SEED, max_workers=None):
+    """
+    Distribución bootstrap de la media por equipo de cada KPI.
+
+    Los remuestreos se reparten en bloques (como mucho CHUNK_RESAMPLES) con semillas derivadas
+    de `seed`, así que el resultado es el mismo con o sin pool de procesos.
+
+    Parámetros:
+    - values: np.ndarray (partidos x KPIs)
+    - team_idx: Índice (0..equipos-1) del equipo de cada partido
+    - max_workers: Procesos del pool (1 = sin pool; None = automático según el trabajo)
+
+    Retorna:
+    - np.ndarray (remuestreos x equipos x KPIs)
+    """
+    order = np.argsort(team_idx, kind="stable")
+    counts = np.bincount(team_idx)
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    values = np.asarray(values, dtype=float)[order]
+
+    cells = len(counts) * int(counts.max()) * values.shape[1]
+    chunk = max(1, min(CHUNK_RESAMPLES, CHUNK_CELLS // cells))
+    sizes = [chunk] * (n_resamples // chunk)
+    if n_resamples % chunk:
+        sizes.append(n_resamples % chunk)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [
+        {"values": values, "offsets": offsets, "counts": counts, "n": n, "seed": s}
+        for n, s in zip(sizes, seeds)
+    ]
+
+    if max_workers is None and (_in_worker() or n_resamples * len(values) < POOL_MIN_WORK):
+        max_workers = 1
+    return np.concatenate(run_partitions(_resample_chunk, tasks, max_workers), axis=0)
+
+
+def _ranks(values):
+    """Rango descendente (1 = mejor, empates con el rango mínimo) por fila; NaN al final"""
+    filled = np.where(np.isnan(values), -np.inf, values)
+    return (filled[..., :, None] < filled[..., None, :]).sum(axis=-1) + 1
+
+
+def bootstrap_team_kpis(matches, kpis=None, n_resamples=BOOTSTRAP_RESAMPLES, level=CI_LEVEL,
+                        seed=BOOTSTRAP_SEED, max_workers=None):
+    """
+    Intervalos de confianza bootstrap y probabilidades de posición de los KPIs por equipo.
+
+    Parámetros:
+    - matches: Filas por partido (sin filas "AVG") con las columnas de BOOTSTRAP_KPIS
+    - kpis: KPIs de los rankings a calcular (por defecto los de BOOTSTRAP_KPIS presentes)
+    - n_resamples: Número de remuestreos
+    - level: Nivel de confianza de los intervalos
+
+    Retorna:
+    - DataFrame largo (equipo x KPI) con la media, el intervalo (ci_low, ci_high), el rango
+      y su intervalo (rank, rank_low, rank_high), la probabilidad de ser primero (p_first)
+      y la de superar al equipo siguiente del ranking (p_above_next; vacía en el último)
+    """
+    kpis = [k for k in (kpis or BOOTSTRAP_KPIS) if BOOTSTRAP_KPIS[k] in matches.columns]
+    # Orden fijo de los partidos: el remuestreo no depende del orden de las filas de entrada
+    matches = matches.iloc[np.lexsort([matches["match_id"].astype(str), matches["team_id"]])]
+    teams = matches[["team_name", "team_id"]].drop_duplicates("team_id").reset_index(drop=True)
+    team_idx = pd.Index(teams["team_id"]).get_indexer(matches["team_id"])
+    values = matches[[BOOTSTRAP_KPIS[k] for k in kpis]].to_numpy(dtype=float)
+
+    boot = bootstrap_means(values, team_idx, n_resamples, seed, max_workers)
+    point = pd.DataFrame(values).groupby(team_idx).mean().to_numpy()
+    alpha = (1 - level) / 2
+
+    tables = []
+    with np.errstate(invalid="ignore"):
+        ci_low, ci_high = np.nanquantile(boot, [alpha, 1 - alpha], axis=0)
+    for k, kpi in enumerate(kpis):
+        boot_ranks = _ranks(boot[:, :, k])
+        rank = _ranks(point[:, k])
+
+        # Probabilidad de quedar por delante del siguiente equipo del ranking
+        order = np.argsort(rank, kind="stable")
+        p_above_next = np.full(len(teams), np.nan)
+        p_above_next[order[:-1]] = (boot[:, order[:-1], k] > boot[:, order[1:], k]).mean(axis=0)
+
+        table = teams.copy()
+        table.insert(0, "kpi", kpi)
+        table["n_matches"] = np.bincount(team_idx, minlength=len(teams))
+        table["mean"] = point[:, k]
+        table["ci_low"] = ci_low[:, k]
+        table["ci_high"] = ci_high[:, k]
+        table["rank"] = rank
+        table["rank_low"] = np.floor(np.quantile(boot_ranks, alpha, axis=0)).astype(int)
+        table["rank_high"] = np.ceil(np.quantile(boot_ranks, 1 - alpha, axis=0)).astype(int)
+        table["p_first"] = (boot_ranks == 1).mean(axis=0)
+        table["p_above_next"] = p_above_next
+        tables.append(table.sort_values("rank", kind="stable"))
+    return pd.concat(tables, ignore_index=True)
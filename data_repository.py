@@ -0,0 +1,119 @@
+import os
+import threading
+import pandas as pd
+
+import data_store
+
+# Conjuntos de datos que sirve el repositorio (nombre -> función de data_store)
+LOADERS = {
+    "partitions": data_store.list_partitions,
+    "matches": data_store.get_matches,
+    "team_averages": data_store.get_team_averages,
+    "teams": data_store.get_teams,
+    "goal_kpis": data_store.get_goal_kpis,
+    "ranking": data_store.get_ranking,
+    "setpiece": data_store.get_setpiece,
+    "bands": data_store.get_bands,
+    "form": data_store.get_form,
+    "team_cumulative": data_store.get_team_cumulative,
+    "team_ci": data_store.get_team_ci,
+}
+
+# Caché compartida por todas las sesiones del proceso: (nombre, parámetros) -> (firma, datos)
+_cache = {}
+_stats = {}
+_lock = threading.Lock()
+
+
+def _copy_on_write():
+    """Con copy-on-write (pandas >= 3) una copia superficial no puede modificar la original"""
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return True
+    try:
+        return pd.get_option("mode.copy_on_write") is True
+    except Exception:
+        return False
+
+
+def _view(data):
+    """Vista de solo lectura de los datos en caché (copia superficial o completa según pandas)"""
+    if isinstance(data, pd.DataFrame):
+        return data.copy(deep=not _copy_on_write())
+    if isinstance(data, list):
+        return list(data)
+    return data
+
+
+def store_signature(path=None):
+    """
+    Firma de la base de datos que leen las páginas: ruta del snapshot publicado y fecha de
+    modificación y tamaño de sus archivos. Cambia al publicarse un snapshot o al reescribirse
+    la base de datos.
+    """
+    path = path or data_store.store_path()
+    signature = [path]
+    for suffix in ["", "-wal"]:
+        try:
+            stat = os.stat(path + suffix)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def load(name, **params):
+    """
+    Devuelve un conjunto de datos cargándolo una sola vez por proceso.
+
+    Parámetros:
+    - name: Conjunto de datos (clave de LOADERS: 'goal_kpis', 'matches', 'bands'...)
+    - params: Filtros de la función de data_store (competition, season, team_name...)
+
+    Retorna:
+    - Vista de solo lectura de los datos; se vuelven a cargar si cambia la base de datos
+    """
+    path = data_store.store_path()
+    signature = store_signature(path)
+    key = (name, tuple(sorted((k, str(v)) for k, v in params.items())))
+
+    with _lock:
+        stats = _stats.setdefault(name, {"hits": 0, "misses": 0, "invalidations": 0})
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == signature:
+            stats["hits"] += 1
+            return _view(cached[1])
+        stats["misses"] += 1
+        if cached is not None:
+            stats["invalidations"] += 1
+
+    # La firma se toma antes de leer: si la base de datos cambia durante la lectura, la
+    # siguiente llamada vuelve a cargar
+    data_store.ensure_store(path)
+    signature = store_signature(path)
+    data = LOADERS[name](path=path, **params)
+    with _lock:
+        _cache[key] = (signature, data)
+    return _view(data)
+
+
+def available_weeks(competition=None, season=None):
+    """Jornadas con acumulado por equipo (selectores "a la jornada" de las páginas), o [] si no hay"""
+    try:
+        cumulative = load("team_cumulative", competition=competition, season=season)
+    except Exception:
+        return []
+    return sorted(int(week) for week in cumulative["match_week"].dropna().unique())
+
+
+def cache_stats():
+    """Aciertos, fallos e invalidaciones por conjunto de datos"""
+    with _lock:
+        rows = [{"dataset": name, **stats} for name, stats in sorted(_stats.items())]
+    return pd.DataFrame(rows, columns=["dataset", "hits", "misses", "invalidations"])
+
+
+def clear():
+    """Vacía la caché y los contadores"""
+    with _lock:
+        _cache.clear()
+        _stats.clear()
@@ -0,0 +1,411 @@
+import os
+import sqlite3
+import pandas as pd
+
+import snapshots
+from table_schema import apply_schema, split_df_final
+
+# Base de datos local con las salidas del pipeline (todas las particiones). Cada
+# snapshot publicado (snapshots.py) tiene la suya; data/audax.db solo se usa si
+# todavía no hay snapshots
+DB_FILE = "audax.db"
+DB_PATH = os.path.join("data", DB_FILE)
+
+PARTITION_COLUMNS = ["competition", "season"]
+
+# Versión del formato de las tablas: si cambia, la base de datos se vuelve a crear
+SCHEMA_VERSION = 6
+
+# Tabla -> archivo CSV de la partición del que se carga
+TABLE_FILES = {
+    "matches": "df_final.csv",
+    "goal_kpis": "df_GoalKPIs_TopValues.csv",
+    "setpiece": "df_setpiece_efficiency.csv",
+    "bands": "df_benchmark_bands.csv",
+    "form": "df_form.csv",
+    "team_cumulative": "df_team_cumulative.csv",
+    "team_ci": "df_team_ci.csv",
+}
+RANKING_SUFFIXES = ["GCI", "GEI", "PGI", "GPI"]
+
+# Índices: todos empiezan por la partición para que el coste de un filtro no crezca
+# con el número de temporadas y ligas guardadas
+INDEXES = {
+    "matches": [
+        ["competition", "season", "team_id"],
+        ["competition", "season", "team_name"],
+        ["competition", "season", "match_week"],
+        ["match_id"],
+    ],
+    "team_averages": [["competition", "season", "team_name"]],
+    "goal_kpis": [["competition", "season", "team_name"]],
+    "rankings": [["competition", "season", "ranking"]],
+    "setpiece": [["competition", "season", "team_id"]],
+    "bands": [["competition", "season", "band"]],
+    "form": [["competition", "season", "form"]],
+    "team_cumulative": [["competition", "season", "match_week"]],
+    "team_ci": [["competition", "season", "kpi"]],
+}
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def snapshot_id(output_dir="data"):
+    """Id del snapshot publicado: las cachés de las páginas lo usan como clave"""
+    return snapshots.current_snapshot(output_dir)
+
+
+def store_path(snapshot=None, output_dir="data"):
+    """Base de datos de un snapshot (por defecto el publicado) o data/audax.db si no hay snapshots"""
+    snapshot = snapshot or snapshot_id(output_dir)
+    if snapshot:
+        return snapshots.snapshot_path(snapshot, DB_FILE, output_dir)
+    return os.path.join(output_dir, DB_FILE)
+
+
+def connect(path=DB_PATH):
+    """Abre la base de datos (modo WAL: las páginas pueden leer mientras el pipeline escribe)"""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+# -------------------------------------------
+# 📌 ESCRITURA (pipeline)
+# -------------------------------------------
+def _table_columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({_quote(table)})")]
+
+
+def _replace_partition_rows(conn, table, df, competition, season):
+    """Sustituye las filas de una partición en `table` (añade columnas nuevas si hace falta)"""
+    df = df.copy()
+    df["competition"] = competition
+    df["season"] = str(season)
+
+    columns = _table_columns(conn, table)
+    if columns:
+        for col in df.columns:
+            if col not in columns:
+                conn.execute(f"ALTER TABLE {_quote(table)} ADD COLUMN {_quote(col)}")
+        conn.execute(
+            f"DELETE FROM {_quote(table)} WHERE competition = ? AND season = ?",
+            (competition, str(season))
+        )
+    df.to_sql(table, conn, if_exists="append", index=False)
+
+    for index_columns in INDEXES.get(table, []):
+        name = f"idx_{table}_{'_'.join(index_columns)}"
+        cols = ", ".join(_quote(c) for c in index_columns)
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {_quote(name)} ON {_quote(table)} ({cols})")
+
+
+def read_partition_tables(out_dir, competition=None, season=None):
+    """
+    Lee los CSV de una partición y los agrupa por tabla (sin aplicar el esquema).
+
+    df_final se separa en `matches` y `team_averages`; con competición y temporada,
+    las bandas se filtran a esa partición.
+    """
+    tables = {}
+    for table, name in TABLE_FILES.items():
+        path = os.path.join(out_dir, name)
+        if os.path.exists(path):
+            tables[table] = pd.read_csv(path)
+    if "matches" in tables:
+        tables["matches"], tables["team_averages"] = split_df_final(tables["matches"])
+
+    rankings = []
+    for suffix in RANKING_SUFFIXES:
+        path = os.path.join(out_dir, f"df_ranking_avg_display_{suffix}.csv")
+        if os.path.exists(path):
+            ranking = pd.read_csv(path)
+            ranking.insert(0, "ranking", suffix)
+            rankings.append(ranking)
+    if rankings:
+        tables["rankings"] = pd.concat(rankings, ignore_index=True)
+
+    # Las bandas ya traen su competición y temporada
+    if "bands" in tables and competition is not None:
+        bands = tables["bands"]
+        same = (bands["competition"] == competition) & (bands["season"].astype(str) == str(season))
+        tables["bands"] = bands[same].drop(columns=PARTITION_COLUMNS)
+    return tables
+
+
+def write_partition(out_dir, competition, season, n_matches=None, max_week=None, path=DB_PATH):
+    """
+    Carga en la base de datos las salidas (CSV) de una partición, sustituyendo las anteriores.
+
+    Todas las tablas se escriben en una sola transacción.
+    """
+    _discard_outdated(path)
+    tables = read_partition_tables(out_dir, competition, season)
+    if "matches" in tables:
+        tables["matches"]["match_id"] = tables["matches"]["match_id"].astype("int64")
+    with connect(path) as conn:
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        for table, df in tables.items():
+            _replace_partition_rows(conn, table, df, competition, season)
+
+        info = pd.DataFrame([{"n_matches": n_matches, "max_week": max_week, "published": 0}])
+        _replace_partition_rows(conn, "partitions", info, competition, season)
+    conn.close()
+
+
+def copy_store(source, target):
+    """Copia consistente de la base de datos (API de backup de SQLite, incluye el WAL)"""
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+
+def set_published(competition, season, path=DB_PATH):
+    """Marca la partición que muestran las páginas por defecto"""
+    with connect(path) as conn:
+        conn.execute("UPDATE partitions SET published = (competition = ? AND season = ?)",
+                     (competition, str(season)))
+    conn.close()
+
+
+def has_partition(competition, season, path=DB_PATH):
+    """Indica si la partición ya está cargada en la base de datos"""
+    if not os.path.exists(path):
+        return False
+    conn = connect(path)
+    try:
+        if "partitions" not in _tables(conn):
+            return False
+        row = conn.execute("SELECT 1 FROM partitions WHERE competition = ? AND season = ?",
+                           (competition, str(season))).fetchone()
+        return row is not None
+    finally:
+        conn.close()
+
+
+def _tables(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def schema_version(path):
+    """Versión del formato con la que se creó la base de datos (None si no existe)"""
+    if not os.path.exists(path):
+        return None
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def is_current(path):
+    """Indica si la base de datos existe y tiene el formato actual (SCHEMA_VERSION)"""
+    return schema_version(path) == SCHEMA_VERSION
+
+
+def _discard_outdated(path):
+    """
+    Borra la base de datos si se creó con otra versión del formato (se vuelve a cargar).
+
+    Solo se usa al escribir: las páginas nunca borran una base de datos (ver ensure_store).
+    """
+    if schema_version(path) not in (None, SCHEMA_VERSION):
+        for suffix in ["", "-wal", "-shm"]:
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+# Bases de datos ya comprobadas en este proceso: el pipeline siempre escribe SCHEMA_VERSION,
+# así que una ruta con el formato actual no deja de tenerlo
+_checked = set()
+
+
+def ensure_store(path=DB_PATH, data_dir=None):
+    """
+    Crea la base de datos a partir de los CSV publicados junto a ella (data/) si todavía
+    no existe (p. ej. en un clon nuevo antes de ejecutar el pipeline).
+
+    Una base de datos existente con otro formato no se toca (puede ser la de un snapshot
+    publicado): se lanza RuntimeError y hay que regenerarla con generate_csv_files.py.
+    """
+    if path in _checked and os.path.exists(path):
+        return path
+    version = schema_version(path)
+    if version is not None:
+        if version != SCHEMA_VERSION:
+            raise RuntimeError(
+                f"{path} tiene el formato {version} y se espera el {SCHEMA_VERSION}: "
+                "ejecuta generate_csv_files.py para regenerarla"
+            )
+        _checked.add(path)
+        return path
+    data_dir = data_dir or os.path.dirname(path)
+    final_path = os.path.join(data_dir, TABLE_FILES["matches"])
+    if not os.path.exists(final_path):
+        raise FileNotFoundError(f"No existe {path} ni {final_path}: ejecuta generate_csv_files.py")
+
+    match_rows, _ = split_df_final(pd.read_csv(final_path))
+    competition = match_rows["competition"].iloc[0]
+    season = match_rows["season"].iloc[0]
+    write_partition(data_dir, competition, season, match_rows["match_id"].nunique(),
+                    match_rows["match_week"].max(), path)
+    set_published(competition, season, path)
+    return path
+
+
+# -------------------------------------------
+# 📌 LECTURA (páginas)
+# -------------------------------------------
+def query(table, columns=None, filters=None, order_by=None, path=None):
+    """
+    Consulta una tabla filtrando por igualdad (valores escalares) o pertenencia (listas).
+
+    Parámetros:
+    - table: Nombre de la tabla
+    - columns: Columnas a devolver (por defecto todas)
+    - filters: dict columna -> valor o lista de valores (None = sin filtro)
+    - order_by: Columna o lista de columnas de ordenación
+
+    Retorna:
+    - DataFrame con las filas que cumplen los filtros
+    """
+    path = path or store_path()
+    ensure_store(path)
+    select = ", ".join(_quote(c) for c in columns) if columns else "*"
+    sql = f"SELECT {select} FROM {_quote(table)}"
+
+    clauses, params = [], []
+    for col, value in (filters or {}).items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            values = list(value)
+            clauses.append(f"{_quote(col)} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        else:
+            clauses.append(f"{_quote(col)} = ?")
+            params.append(value)
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    if order_by:
+        order_by = [order_by] if isinstance(order_by, str) else order_by
+        sql += " ORDER BY " + ", ".join(_quote(c) for c in order_by)
+
+    conn = connect(path)
+    try:
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+
+def list_partitions(path=None):
+    """Particiones cargadas (competición, temporada, partidos, jornada máxima y si es la publicada)"""
+    return apply_schema(query("partitions", order_by=["competition", "season"], path=path))
+
+
+def default_partition(path=None):
+    """Partición publicada (la que muestran las páginas si no se elige otra)"""
+    partitions = list_partitions(path)
+    published = partitions[partitions["published"] == 1]
+    row = (published if not published.empty else partitions).iloc[-1]
+    return row["competition"], row["season"]
+
+
+def _partition_filters(competition, season, path):
+    if competition is None and season is None:
+        competition, season = default_partition(path)
+    return {"competition": competition, "season": None if season is None else str(season)}
+
+
+def get_matches(competition=None, season=None, team_name=None, match_id=None, match_week=None,
+                path=None):
+    """
+    Filas por partido de df_final de una partición (los promedios están en get_team_averages).
+
+    Parámetros:
+    - team_name, match_id, match_week: Filtros opcionales (valor o lista)
+    """
+    path = path or store_path()
+    filters = _partition_filters(competition, season, path)
+    filters.update({"team_name": team_name, "match_id": match_id, "match_week": match_week})
+    return apply_schema(query("matches", filters=filters, path=path))
+
+
+def get_team_averages(competition=None, season=None, team_name=None, path=None):
+    """Promedio de cada equipo hasta la última jornada (y la fila ALL_TEAMS_AVG)"""
+    path = path or store_path()
+    filters = _partition_filters(competition, season, path)
+    filters["team_name"] = team_name
+    return apply_schema(query("team_averages", filters=filters, path=path))
+
+
+def get_teams(competition=None, season=None, path=None):
+    """Equipos de una partición (sin ALL_TEAMS_AVG)"""
+    path = path or store_path()
+    df = query("matches", columns=["team_name"], filters=_partition_filters(competition, season, path), path=path)
+    return sorted(t for t in df["team_name"].unique() if t != "ALL_TEAMS_AVG")
+
+
+def get_goal_kpis(competition=None, season=None, include_top=True, path=None):
+    """GoalKPIs por equipo (con las filas TopValues si include_top=True)"""
+    path = path or store_path()
+    df = query("goal_kpis", filters=_partition_filters(competition, season, path), path=path)
+    if not include_top:
+        df = df[~df["team_name"].str.contains("TopValues", na=False)]
+    return apply_schema(df.drop(columns=PARTITION_COLUMNS).reset_index(drop=True))
+
+
+def get_ranking(ranking="GPI", competition=None, season=None, path=None):
+    """Ranking por KPI (sufijo GCI, GEI, PGI o GPI) ordenado por posición"""
+    path = path or store_path()
+    filters = _partition_filters(competition, season, path)
+    filters["ranking"] = ranking
+    df = query("rankings", filters=filters, order_by="Rank (avg)", path=path)
+    return apply_schema(df.drop(columns=["ranking"] + PARTITION_COLUMNS))
+
+
+def get_setpiece(competition=None, season=None, team_id=None, path=None):
+    """Índices de balón parado por equipo"""
+    path = path or store_path()
+    filters = _partition_filters(competition, season, path)
+    filters["team_id"] = team_id
+    return apply_schema(query("setpiece", filters=filters, path=path).drop(columns=PARTITION_COLUMNS))
+
+
+def get_form(form=None, competition=None, season=None, path=None):
+    """KPIs de forma por equipo ('form': last, ewma, home o away; por defecto todos)"""
+    path = path or store_path()
+    filters = _partition_filters(competition, season, path)
+    filters["form"] = form
+    return apply_schema(query("form", filters=filters, path=path).drop(columns=PARTITION_COLUMNS))
+
+
+def get_team_cumulative(match_week=None, competition=None, season=None, path=None):
+    """
+    Sumas y partidos acumulados por equipo al final de cada jornada (o de una sola jornada).
+    Con `match_week` se leen solo las filas de esa jornada: una por equipo.
+    """
+    path = path or store_path()
+    filters = _partition_filters(competition, season, path)
+    filters["match_week"] = None if match_week is None else int(match_week)
+    return apply_schema(query("team_cumulative", filters=filters, path=path).drop(columns=PARTITION_COLUMNS))
+
+
+def get_team_ci(kpi=None, competition=None, season=None, path=None):
+    """Intervalos bootstrap y probabilidades de posición por equipo (de un KPI o de todos)"""
+    path = path or store_path()
+    filters = _partition_filters(competition, season, path)
+    filters["kpi"] = kpi
+    return apply_schema(query("team_ci", filters=filters, path=path).drop(columns=PARTITION_COLUMNS))
+
+
+def get_bands(competition=None, season=None, path=None):
+    """Bandas de referencia (top-k, cuantiles y media) de una partición, con su competición y temporada"""
+    path = path or store_path()
+    return apply_schema(query("bands", filters=_partition_filters(competition, season, path), path=path))
@@ -0,0 +1,124 @@
+import os
+import time
+import hashlib
+import pandas as pd
+
+# Carpeta donde se guardan las copias columnar (Parquet) de los Excel de StatsBomb
+CACHE_DIR = os.path.join("AUDAX", ".cache")
+
+# Contadores globales de la caché (aciertos, fallos y tiempos acumulados)
+_cache_stats = {
+    "hits": 0,
+    "misses": 0,
+    "hit_seconds": 0.0,
+    "miss_seconds": 0.0,
+}
+
+
+def _hash(*parts):
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def _copy_key(path, read_kwargs):
+    """Identifica la copia: ruta absoluta + argumentos de lectura"""
+    return _hash(os.path.abspath(path), repr(sorted(read_kwargs.items())))
+
+
+def _version_key(path):
+    """Versión del Excel: mtime + tamaño"""
+    stat = os.stat(path)
+    return _hash(str(stat.st_mtime_ns), str(stat.st_size))
+
+
+def _cache_file(path, copy_key, version_key, cache_dir):
+    base = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"{base}-{copy_key}-{version_key}.parquet")
+
+
+def _remove_stale_copies(path, copy_key, current_file, cache_dir):
+    """
+    Elimina las versiones antiguas (otra mtime/tamaño) de la misma copia. Las copias del
+    mismo Excel leídas con otros argumentos (otra hoja, otras columnas) se conservan.
+    """
+    base = os.path.splitext(os.path.basename(path))[0]
+    prefix = f"{base}-{copy_key}-"
+    for name in os.listdir(cache_dir):
+        candidate = os.path.join(cache_dir, name)
+        if name.startswith(prefix) and name.endswith(".parquet") and candidate != current_file:
+            try:
+                os.remove(candidate)
+            except OSError:
+                pass
+
+
+def read_excel_cached(path, cache_dir=CACHE_DIR, verbose=True, **read_kwargs):
+    """
+    Lee un archivo Excel pasando por una caché columnar en Parquet.
+
+    La primera lectura convierte el Excel a Parquet; las siguientes se sirven desde
+    la copia columnar mientras la ruta, la fecha de modificación y el tamaño del
+    Excel no cambien. Si `path` ya es un archivo Parquet (p. ej. datos sintéticos de
+    benchmark) se lee directamente, sin caché.
+
+    Parámetros:
+    - path: Ruta del archivo Excel (o Parquet)
+    - cache_dir: Carpeta donde se guardan las copias Parquet
+    - verbose: Si es True, imprime el tiempo de cada acierto/fallo
+    - read_kwargs: Argumentos adicionales para pd.read_excel
+
+    Retorna:
+    - DataFrame con el contenido del Excel
+    """
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+
+    start = time.perf_counter()
+    copy_key = _copy_key(path, read_kwargs)
+    cache_file = _cache_file(path, copy_key, _version_key(path), cache_dir)
+
+    if os.path.exists(cache_file):
+        try:
+            df = pd.read_parquet(cache_file)
+            elapsed = time.perf_counter() - start
+            _cache_stats["hits"] += 1
+            _cache_stats["hit_seconds"] += elapsed
+            if verbose:
+                print(f"⚡ Caché Excel (hit): {os.path.basename(path)} en {elapsed:.3f}s")
+            return df
+        except Exception:
+            # Copia corrupta o motor Parquet no disponible: se relee el Excel
+            pass
+
+    df = pd.read_excel(path, **read_kwargs)
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        df.to_parquet(tmp_file, index=False)
+        os.replace(tmp_file, cache_file)
+        _remove_stale_copies(path, copy_key, cache_file, cache_dir)
+    except Exception as e:
+        # Sin pyarrow/fastparquet o con tipos no serializables se sigue sin caché
+        if verbose:
+            print(f"⚠️ No se pudo guardar la caché de {os.path.basename(path)}: {e}")
+
+    elapsed = time.perf_counter() - start
+    _cache_stats["misses"] += 1
+    _cache_stats["miss_seconds"] += elapsed
+    if verbose:
+        print(f"🐢 Caché Excel (miss): {os.path.basename(path)} en {elapsed:.3f}s")
+    return df
+
+
+def get_cache_stats():
+    """Devuelve una copia de los contadores de aciertos/fallos y sus tiempos"""
+    return dict(_cache_stats)
+
+
+def clear_cache(cache_dir=CACHE_DIR):
+    """Elimina todas las copias Parquet de la caché"""
+    if not os.path.isdir(cache_dir):
+        return
+    for name in os.listdir(cache_dir):
+        if name.endswith(".parquet"):
+            os.remove(os.path.join(cache_dir, name))
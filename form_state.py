@@ -0,0 +1,230 @@
+import os
+import numpy as np
+import pandas as pd
+
+from incremental_state import STATE_DIR, TEAM_KEYS
+
+# KPIs de forma: nombre en las tablas de salida -> columna normalizada por partido
+FORM_KPIS = {
+    "Goal Performance Index": "Goal Performance Index",
+    "Goal Envolvement Index": "Goal Envolvement Index (norm)",
+    "Goal Conversion Index": "Goal Conversion Index (norm)",
+    "Possession GoalChance Index": "Possession GoalChance Index (norm)",
+}
+
+# Partidos de la ventana "últimos N" y peso del último partido en la media exponencial
+FORM_WINDOW = 5
+EWMA_ALPHA = 0.3
+
+# Tipos de forma (columna 'form' de df_form.csv) y su etiqueta en las páginas
+FORM_TYPES = {
+    "last": f"Últimos {FORM_WINDOW} partidos",
+    "ewma": "Media exponencial (EWMA)",
+    "home": "Como local",
+    "away": "Como visitante",
+}
+
+FORM_STATE_FILE = "form_state.csv"
+
+_K = len(FORM_KPIS)
+
+
+# -------------------------------------------
+# 📌 ESTADO POR EQUIPO
+# -------------------------------------------
+# Por equipo se guardan los últimos FORM_WINDOW valores de cada KPI (w0 = el más reciente),
+# la media exponencial y las sumas y conteos como local y visitante. Añadir una jornada
+# solo toca una fila por equipo: no se vuelve a agrupar el historial.
+def _state_columns():
+    columns = TEAM_KEYS + ["n_matches", "last_week", "last_date"]
+    for k in range(_K):
+        columns += [f"ewma_{k}", f"home_sum_{k}", f"home_n_{k}", f"away_sum_{k}", f"away_n_{k}"]
+        columns += [f"w{j}_{k}" for j in range(FORM_WINDOW)]
+    return columns
+
+
+def empty_form_state():
+    """Estado sin partidos"""
+    return pd.DataFrame(columns=_state_columns())
+
+
+def _to_arrays(state):
+    n = len(state)
+    arrays = {
+        "n_matches": state["n_matches"].to_numpy(dtype=np.int64, copy=True),
+        "last_week": state["last_week"].to_numpy(dtype=float, copy=True),
+        "ewma": np.full((n, _K), np.nan),
+        "home_sum": np.zeros((n, _K)), "home_n": np.zeros((n, _K)),
+        "away_sum": np.zeros((n, _K)), "away_n": np.zeros((n, _K)),
+        "window": np.full((n, FORM_WINDOW, _K), np.nan),
+    }
+    for k in range(_K):
+        for name in ["ewma", "home_sum", "home_n", "away_sum", "away_n"]:
+            arrays[name][:, k] = state[f"{name}_{k}"].to_numpy(dtype=float)
+        for j in range(FORM_WINDOW):
+            arrays["window"][:, j, k] = state[f"w{j}_{k}"].to_numpy(dtype=float)
+    return arrays
+
+
+def _from_arrays(teams, last_date, arrays):
+    state = teams.reset_index(drop=True).copy()
+    state["n_matches"] = arrays["n_matches"]
+    state["last_week"] = arrays["last_week"]
+    state["last_date"] = last_date
+    columns = {}
+    for k in range(_K):
+        for name in ["ewma", "home_sum", "home_n", "away_sum", "away_n"]:
+            columns[f"{name}_{k}"] = arrays[name][:, k]
+        for j in range(FORM_WINDOW):
+            columns[f"w{j}_{k}"] = arrays["window"][:, j, k]
+    return pd.concat([state, pd.DataFrame(columns)], axis=1)[_state_columns()]
+
+
+def is_chronological(state, matches):
+    """
+    Indica si los partidos nuevos van después del último partido de cada equipo en el estado.
+
+    Se exige una jornada y una fecha posteriores: un partido aplazado de una jornada ya
+    procesada cambia el orden de la ventana y obliga a recalcular. Las fechas se comparan
+    como fechas (no como texto); si alguna no se puede interpretar, se recalcula.
+    """
+    if state.empty or matches.empty:
+        return True
+    state = state.set_index("team_id")
+    last_date = pd.to_datetime(state["last_date"], format="mixed", errors="coerce")
+    new = matches.assign(match_date=pd.to_datetime(matches["match_date"], format="mixed", errors="coerce"))
+    if new["match_date"].isna().any():
+        return False
+    first_new = new.groupby("team_id").agg(match_week=("match_week", "min"), match_date=("match_date", "min"))
+    common = first_new.index.intersection(state.index)
+    later_week = first_new.loc[common, "match_week"] > state.loc[common, "last_week"]
+    later_date = first_new.loc[common, "match_date"] > last_date[common]
+    return bool((later_week & later_date).all())
+
+
+def update_form_state(state, matches):
+    """
+    Añade partidos al estado de forma (en orden de jornada y fecha).
+
+    Cada jornada actualiza una fila por equipo con operaciones vectorizadas, así que el
+    coste de añadir una jornada es O(equipos) y no depende del historial.
+
+    Parámetros:
+    - state: Estado anterior (empty_form_state() para empezar de cero)
+    - matches: Filas por partido con los KPIs normalizados, 'home_team' y 'match_date'
+
+    Retorna:
+    - Nuevo estado (DataFrame con una fila por equipo)
+    """
+    if matches.empty:
+        return state.copy()
+
+    # Equipos nuevos se añaden al final del estado
+    teams = state[TEAM_KEYS]
+    new_teams = matches[TEAM_KEYS].drop_duplicates("team_id")
+    new_teams = new_teams[~new_teams["team_id"].isin(teams["team_id"])]
+    if not new_teams.empty:
+        state = pd.concat([state, new_teams.assign(n_matches=0, last_week=np.nan)], ignore_index=True)
+        for k in range(_K):
+            state[[f"home_sum_{k}", f"home_n_{k}", f"away_sum_{k}", f"away_n_{k}"]] = (
+                state[[f"home_sum_{k}", f"home_n_{k}", f"away_sum_{k}", f"away_n_{k}"]].fillna(0)
+            )
+    state["team_id"] = state["team_id"].astype("int64")
+    teams = state[TEAM_KEYS]
+    arrays = _to_arrays(state)
+    last_date = state["last_date"].astype(object).to_numpy(copy=True)
+    position = pd.Series(np.arange(len(teams)), index=teams["team_id"].to_numpy())
+
+    matches = matches.sort_values(["match_week", "match_date", "match_id"], kind="stable")
+    # Lote = n-ésimo partido de cada equipo dentro de los nuevos (normalmente una jornada)
+    batch = matches.groupby("team_id").cumcount().to_numpy()
+    values_all = matches[list(FORM_KPIS.values())].to_numpy(dtype=float)
+    rows_all = position.loc[matches["team_id"].to_numpy()].to_numpy()
+    home_all = (matches["team_name"] == matches["home_team"]).to_numpy()
+    week_all = matches["match_week"].to_numpy(dtype=float)
+    date_all = matches["match_date"].astype(str).to_numpy()
+
+    for b in range(batch.max() + 1):
+        sel = batch == b
+        rows, values, home = rows_all[sel], values_all[sel], home_all[sel]
+        has_value = ~np.isnan(values)
+
+        # Ventana de los últimos N partidos
+        window = arrays["window"]
+        window[rows, 1:] = window[rows, :-1]
+        window[rows, 0] = values
+
+        # Media exponencial (el primer partido la inicializa; los vacíos no la modifican)
+        previous = arrays["ewma"][rows]
+        updated = np.where(np.isnan(previous), values, EWMA_ALPHA * values + (1 - EWMA_ALPHA) * previous)
+        arrays["ewma"][rows] = np.where(has_value, updated, previous)
+
+        # Local / visitante
+        filled = np.where(has_value, values, 0.0)
+        for side, mask in [("home", home), ("away", ~home)]:
+            arrays[f"{side}_sum"][rows[mask]] += filled[mask]
+            arrays[f"{side}_n"][rows[mask]] += has_value[mask]
+
+        arrays["n_matches"][rows] += 1
+        arrays["last_week"][rows] = week_all[sel]
+        last_date[rows] = date_all[sel]
+
+    return _from_arrays(teams, last_date, arrays)
+
+
+def build_form_state(matches):
+    """Estado de forma a partir de todos los partidos (cálculo completo)"""
+    return update_form_state(empty_form_state(), matches)
+
+
+# -------------------------------------------
+# 📌 TABLA DE FORMA
+# -------------------------------------------
+def form_table(state):
+    """
+    KPIs de forma por equipo a partir del estado.
+
+    Retorna:
+    - DataFrame largo: una fila por equipo y tipo de forma ('form': last, ewma, home, away)
+      con 'matches' (partidos que entran en el cálculo) y una columna por KPI de FORM_KPIS
+    """
+    arrays = _to_arrays(state)
+    window = arrays["window"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        window_n = (~np.isnan(window)).sum(axis=1)
+        values = {
+            "last": np.where(window_n > 0, np.nansum(window, axis=1) / np.maximum(window_n, 1), np.nan),
+            "ewma": arrays["ewma"],
+            "home": np.where(arrays["home_n"] > 0, arrays["home_sum"] / np.maximum(arrays["home_n"], 1), np.nan),
+            "away": np.where(arrays["away_n"] > 0, arrays["away_sum"] / np.maximum(arrays["away_n"], 1), np.nan),
+        }
+    counts = {
+        "last": np.minimum(arrays["n_matches"], FORM_WINDOW),
+        "ewma": arrays["n_matches"],
+        "home": arrays["home_n"][:, 0].astype(int),
+        "away": arrays["away_n"][:, 0].astype(int),
+    }
+
+    tables = []
+    for form in FORM_TYPES:
+        table = state[TEAM_KEYS].reset_index(drop=True).copy()
+        table.insert(0, "form", form)
+        table["match_week"] = arrays["last_week"]
+        table["matches"] = counts[form]
+        table[list(FORM_KPIS)] = values[form]
+        tables.append(table)
+    return pd.concat(tables, ignore_index=True)
+
+
+def load_form_state(state_dir=STATE_DIR):
+    """Estado de forma guardado (o None si no existe)"""
+    path = os.path.join(state_dir, FORM_STATE_FILE)
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path, float_precision="round_trip", dtype={"last_date": str})
+
+
+def save_form_state(state, state_dir=STATE_DIR):
+    """Guarda el estado de forma junto al estado incremental"""
+    os.makedirs(state_dir, exist_ok=True)
+    state.to_csv(os.path.join(state_dir, FORM_STATE_FILE), index=False)
@@ -2,8 +2,64 @@ import pandas as pd
 import numpy as np
 from sklearn.preprocessing import MinMaxScaler
 import os
-import matplotlib.pyplot as plt
-import streamlit as st
+import sys
+import json
+import argparse
+import contextlib
+from datetime import datetime
+from excel_cache import read_excel_cached
+from kpi_registry import MATCH_KPIS, evaluate_kpis, registry_signature
+from ranking_engine import DEFAULT_RANKINGS, DISPLAY_KPIS, ADJUSTED_DISPLAY_KPIS, build_rankings
+from benchmark_bands import (
+    BANDS_PATH, DEFAULT_TOP_K, DEFAULT_QUANTILES, TOP_MIN, TOP_MAX,
+    build_benchmark_bands, save_benchmark_bands, load_benchmark_bands
+)
+from incremental_state import (
+    RAW_KPI_COLUMNS, compute_team_sums, add_team_sums, team_means, load_state, save_state,
+    weekly_cumulative, load_weekly_cumulative, save_weekly_cumulative, match_hashes, changed_matches
+)
+from opponent_adjustment import ADJUSTED_KPIS, RIDGE_ALPHA, add_opponent_adjusted
+from bootstrap_ci import BOOTSTRAP_RESAMPLES, CI_LEVEL, BOOTSTRAP_SEED, bootstrap_team_kpis
+from form_state import (
+    FORM_WINDOW, EWMA_ALPHA, build_form_state, update_form_state, is_chronological, form_table,
+    load_form_state, save_form_state
+)
+from pipeline_stages import stage, run_stages, clear_stages, measure
+import data_store
+import snapshots
+from partitioning import (
+    partition_slug, split_partitions, run_partitions, uses_pool, primary_partition,
+    publish_partition, write_partition_index
+)
+
+# Carpetas por defecto de entrada (Excel de StatsBomb) y salida (CSV)
+INPUT_DIR = "AUDAX"
+OUTPUT_DIR = "data"
+
+# Archivos de entrada de StatsBomb
+EXCEL_MATCH_STATS = os.path.join(INPUT_DIR, "sb_team_match_stats_2025.xlsx")
+EXCEL_MATCHES = os.path.join(INPUT_DIR, "sb_matches_2025.xlsx")
+EXCEL_SEASON_STATS = os.path.join(INPUT_DIR, "sb_team_season_stats_2025.xlsx")
+
+# Mensajes de las particiones que no necesitaron recalcularse
+NO_CHANGES = "sin cambios"
+NO_NEW_MATCHES = "sin partidos nuevos"
+
+# Archivos que genera cada partición y que se publican en data/ para las páginas
+OUTPUT_FILES = [
+    "df_final.csv",
+    "df_ranking_avg_display_GCI.csv",
+    "df_ranking_avg_display_GEI.csv",
+    "df_ranking_avg_display_PGI.csv",
+    "df_ranking_avg_display_GPI.csv",
+    "df_setpiece.csv",
+    "df_setpiece_efficiency.csv",
+    "df_GoalKPIs.csv",
+    "df_GoalKPIs_TopValues.csv",
+    "df_form.csv",
+    "df_team_cumulative.csv",
+    "df_team_ci.csv",
+]
 
 def normalize_to_range(series, new_min=0.5, new_max=9.5):
     old_min = series.min()
@@ -14,655 +70,1041 @@ def normalize_to_range(series, new_min=0.5, new_max=9.5):
     scaled = normalized * (new_max - new_min) + new_min
     return scaled
 
-def generate_all_csvs():
-    try:
-        """
-        Función que procesa los datos de fútbol y genera todos los DataFrames como archivos CSV
-        en el directorio 'data/'.
-        """
-
-        # Crear directorio 'data' si no existe
-        os.makedirs('data', exist_ok=True)
+def _write_csv(df, path, only_if_changed=False):
+    """Escribe un CSV; con only_if_changed=True no toca el archivo si el contenido es idéntico"""
+    content = df.to_csv(index=False)
+    if only_if_changed and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            if f.read() == content:
+                return False
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return True
+
+def _match_kpi_signature():
+    """Hash de las fórmulas que intervienen en los KPIs por partido"""
+    return registry_signature(MATCH_KPIS + ["Goal Performance Index"])
+
+def _input_path(path, input_dir=INPUT_DIR):
+    """Ruta de un Excel de entrada dentro de input_dir (o de su versión Parquet si no hay Excel)"""
+    excel_path = os.path.join(input_dir, os.path.basename(path))
+    parquet_path = os.path.splitext(excel_path)[0] + ".parquet"
+    if not os.path.exists(excel_path) and os.path.exists(parquet_path):
+        return parquet_path
+    return excel_path
+
+def load_match_data(input_dir=INPUT_DIR):
+    """Lee estadísticas por partido y las une con la información de cada partido"""
+    cache_dir = os.path.join(input_dir, ".cache")
+    df = read_excel_cached(_input_path(EXCEL_MATCH_STATS, input_dir), cache_dir=cache_dir)
+    
+    df_matches = read_excel_cached(_input_path(EXCEL_MATCHES, input_dir), cache_dir=cache_dir)
+    
+    # Selecciona solo las columnas deseadas de df_matches
+    df_matches_filtered = df_matches[['match_id', 'match_date', 'competition', 'season', 'match_week',  'competition_stage', 'home_team', 'away_team']]
+
+    # Haz el merge (unión) por match_id, manteniendo todas las columnas de df
+    df = pd.merge(df, df_matches_filtered, on='match_id', how='left')
+
+    df.columns = df.columns.str.replace("^team_match_", "", regex=True)
+
+    return df
+
+def compute_match_kpis(df):
+    """Calcula GEI, GCI y PGC por partido (sin normalizar) con el registro de KPIs"""
+    # Sustituir NaN por 0.01
+    df = df.fillna(0.01)
+
+    # --- GEI, GCI y PGC en una sola pasada (producto matricial) ---
+    df[MATCH_KPIS] = evaluate_kpis(df, MATCH_KPIS)
+
+    # Sustituir NaN por 0.01
+    df[MATCH_KPIS] = df[MATCH_KPIS].fillna(0.01)
+
+    return df
+
+def normalize_match_kpis(df, kpi_min=None, kpi_max=None):
+    """
+    Normaliza los KPIs por partido entre 0.5 y 9.5 y calcula el Goal Performance Index.
+
+    Si se indican kpi_min/kpi_max se usa ese rango en lugar del de los datos, para poder
+    normalizar partidos nuevos con la misma escala que los ya procesados.
+    """
+    kpi_columns = RAW_KPI_COLUMNS
+
+    # Escalar valores (con el rango indicado o con el de los propios datos)
+    if kpi_min is None or kpi_max is None:
+        kpi_min = df[kpi_columns].min().to_numpy()
+        kpi_max = df[kpi_columns].max().to_numpy()
+    scaler = MinMaxScaler(feature_range=(0.5, 9.5))
+    scaler.fit(np.vstack([kpi_min, kpi_max]))
+    df[[col + " (norm)" for col in kpi_columns]] = scaler.transform(df[kpi_columns].to_numpy())
+
+    # --- KPI Compuesto ponderado (con tope de 9.75) ---
+    df["Goal Performance Index"] = evaluate_kpis(df, ["Goal Performance Index"])["Goal Performance Index"]
+
+    return df, (kpi_min, kpi_max)
+
+def build_match_scores(df):
+    """
+    Marcador de cada partido con un self-join local/visitante vectorizado.
+
+    Retorna:
+    - scores: Una fila por match_id con home_goals, away_goals y 'match_score'
+      tipo "home(goals) - away(goals)" (None si el partido está incompleto)
+    - incomplete: Lista de match_id a los que les falta la fila de algún equipo
+    """
+    home = df.loc[df["team_name"] == df["home_team"], ["match_id", "goals"]].drop_duplicates("match_id")
+    away = df.loc[df["team_name"] == df["away_team"], ["match_id", "goals"]].drop_duplicates("match_id")
+
+    scores = (
+        df[["match_id", "home_team", "away_team"]].drop_duplicates("match_id")
+        .merge(home.rename(columns={"goals": "home_goals"}), on="match_id", how="left")
+        .merge(away.rename(columns={"goals": "away_goals"}), on="match_id", how="left")
+    )
+
+    complete = scores["home_goals"].notna() & scores["away_goals"].notna()
+    score_text = (
+        scores["home_team"].astype(str) + "(" + scores["home_goals"].fillna(0).astype(int).astype(str) + ") - " +
+        scores["away_team"].astype(str) + "(" + scores["away_goals"].fillna(0).astype(int).astype(str) + ")"
+    )
+    scores["match_score"] = score_text.where(complete, None)
+
+    incomplete = scores.loc[~complete, "match_id"].tolist()
+    return scores, incomplete
+
+def add_match_scores(df):
+    """
+    Añade a las filas por partido 'match_score', el resultado del equipo (W/D/L)
+    y su diferencia de goles.
+    """
+    scores, incomplete = build_match_scores(df)
+    if incomplete:
+        print(f"⚠️ Partidos incompletos (sin marcador): {incomplete}")
+
+    df = df.merge(scores[["match_id", "home_goals", "away_goals", "match_score"]], on="match_id", how="left")
+
+    # Goles a favor / en contra desde el punto de vista de cada equipo
+    is_home = (df["team_name"] == df["home_team"]).to_numpy()
+    goals_against = np.where(is_home, df["away_goals"], df["home_goals"])
+    df["goal_difference"] = df["goals"].to_numpy() - goals_against
+    df["result"] = np.select(
+        [df["goal_difference"] > 0, df["goal_difference"] == 0, df["goal_difference"] < 0],
+        ["W", "D", "L"],
+        default=None
+    )
+
+    return df.drop(columns=["home_goals", "away_goals"])
+
+# Métricas por partido que las páginas y los reportes muestran como percentil
+PERCENTILE_METRICS = [
+    "np_xg", "np_shots", "obv_shot", "xgchain", "goals",
+    "Goal Envolvement Index (norm)", "Goal Conversion Index (norm)",
+    "Possession GoalChance Index (norm)", "Goal Performance Index"
+]
+
+def add_match_percentiles(matches):
+    """
+    Añade las columnas '<métrica>_pctl' (0-100): percentil de cada partido frente a todos
+    los partidos de su competición y temporada (sin filas de promedio).
+    """
+    matches = matches.copy()
+    grouped = matches.groupby(["competition", "season"], dropna=False)[PERCENTILE_METRICS]
+    pctl = grouped.rank(pct=True) * 100
+    matches[[col + "_pctl" for col in PERCENTILE_METRICS]] = pctl.to_numpy()
+    return matches
+
+def build_df_final(matches, team_sums, max_week):
+    """Une las filas por partido con los promedios por equipo y ALL_TEAMS_AVG"""
+    # --- Calcular promedio por equipo (incluyendo team_id) ---
+    avg_kpis = team_means(team_sums)
+
+    # --- KPIs ajustados por rival: un solo ajuste con todos los partidos ---
+    matches = add_opponent_adjusted(matches)
+    adjusted_cols = list(ADJUSTED_KPIS.values())
+    avg_kpis = avg_kpis.merge(
+        matches.groupby("team_id", as_index=False)[adjusted_cols].mean(), on="team_id", how="left"
+    )
+
+    # --- Cuenta, competición y temporada de la partición ---
+    account_id = matches["account_id"].iloc[0]
+    competition = matches["competition"].iloc[0]
+    season = matches["season"].iloc[0]
+
+    # --- Añadir columnas identificadoras de promedio ---
+    avg_kpis["match_id"] = "AVG"
+    avg_kpis["match_date"] = pd.NaT  # las filas de promedio no tienen fecha
+    avg_kpis["account_id"] = account_id
+    avg_kpis["competition"] = competition
+    avg_kpis["season"] = season
+    avg_kpis["match_week"] = max_week  # jornada máxima jugada
+    avg_kpis["competition_stage"] = "Regular Season"
+    avg_kpis["home_team"] = "AVG"
+    avg_kpis["away_team"] = "AVG"
+
+    # --- Reordenar columnas para que coincidan con df original ---
+    avg_kpis = avg_kpis[[
+        "match_id", "team_name", "team_id", "account_id", "match_date", "competition", "season", "match_week",
+        "competition_stage", "home_team", "away_team", "np_xg", "np_shots", "obv_shot", "xgchain", "goals",
+        "Goal Envolvement Index (norm)", "Goal Conversion Index (norm)",
+        "Possession GoalChance Index (norm)", "Goal Performance Index"
+    ] + adjusted_cols]
+
+    # --- Calcular promedio general (ALL_TEAMS_AVG) ---
+    all_teams_avg = avg_kpis[[
+        "np_xg", "np_shots", "goals",
+        "Goal Envolvement Index (norm)", "Goal Conversion Index (norm)",
+        "Possession GoalChance Index (norm)", "Goal Performance Index"
+    ] + adjusted_cols].mean()
+
+    # --- Crear fila para ALL_TEAMS_AVG ---
+    all_teams_avg_row = {
+        "match_id": "AVG",
+        "team_name": "ALL_TEAMS_AVG",
+        "team_id": 1,
+        "account_id": account_id,
+        "match_date": pd.NaT,
+        "competition": competition,
+        "season": season,
+        "match_week": max_week,
+        "competition_stage": "Regular Season",
+        "home_team": "AVG",
+        "away_team": "AVG",
+        **all_teams_avg.to_dict()
+    }
+
+    # --- Añadir fila de promedio general a avg_kpis ---
+    avg_kpis = pd.concat([avg_kpis, pd.DataFrame([all_teams_avg_row])], ignore_index=True)
+
+    # --- Percentiles por partido (las filas de promedio quedan vacías) ---
+    matches = add_match_percentiles(matches)
+
+    # --- Concatenar el dataframe original con los promedios ---
+    df_final = pd.concat([matches[[
+        "match_id", "team_name", "team_id", "account_id", "match_date", "competition", "season", "match_week",
+        "competition_stage", "home_team", "away_team", "np_xg", "np_shots", "obv_shot", "xgchain", "goals",
+        "Goal Envolvement Index (norm)", "Goal Conversion Index (norm)",
+        "Possession GoalChance Index (norm)", "Goal Performance Index"
+    ] + adjusted_cols + [
+        "match_score", "result", "goal_difference"
+    ] + [col + "_pctl" for col in PERCENTILE_METRICS]], avg_kpis], ignore_index=True)
+
+    # Rellenar NaN (filas "AVG" y partidos incompletos)
+    df_final = df_final.fillna({
+        "match_score": "AVG"
+    })
+
+    return df_final
+
+def write_rankings(df_final, only_if_changed=False, rankings=None, out_dir="data"):
+    """
+    Genera y escribe los rankings por KPI a partir de las filas AVG de df_final.
+
+    Parámetros:
+    - df_final: DataFrame final con las filas de promedio por equipo
+    - only_if_changed: Si es True, solo reescribe los rankings cuyo contenido cambió
+    - rankings: dict sufijo -> KPI del registro (por defecto GCI, GEI, PGI y GPI)
+    - out_dir: Carpeta donde se escriben los rankings
+
+    Retorna:
+    - ranking_avg_display_GPI y la lista de archivos reescritos
+    """
+    # --- Filtrar solo filas de promedio por equipo (excluyendo ALL_TEAMS_AVG) ---
+    avg_only = df_final[
+        (df_final["match_id"] == "AVG") & (df_final["team_name"] != "ALL_TEAMS_AVG")
+    ]
+
+    # --- Renombrar columnas (quitar '(norm)') ---
+    avg_only = avg_only.rename(columns={
+        "Goal Envolvement Index (norm)": "Goal Envolvement Index",
+        "Goal Conversion Index (norm)": "Goal Conversion Index",
+        "Possession GoalChance Index (norm)": "Possession GoalChance Index"
+    })
+
+    # --- Obtener valor máximo de jornadas jugadas ---
+    max_jornada = df_final[df_final["match_id"] != "AVG"]["match_week"].max()
+
+    # --- Todos los rankings a partir de la misma matriz de promedios ---
+    rankings = rankings or dict(DEFAULT_RANKINGS)
+    rankings.setdefault("GPI", "Goal Performance Index")
+    # Los KPIs ajustados por rival acompañan a los originales (si df_final los tiene)
+    display_kpis = DISPLAY_KPIS + [col for col in ADJUSTED_DISPLAY_KPIS if col in avg_only.columns]
+    ranking_tables = build_rankings(avg_only, rankings, match_week=max_jornada, display_kpis=display_kpis)
+
+    # --- Escribir todos los rankings ---
+    written = []
+    for suffix, ranking in ranking_tables.items():
+        if _write_csv(ranking, os.path.join(out_dir, f"df_ranking_avg_display_{suffix}.csv"), only_if_changed):
+            written.append(f"df_ranking_avg_display_{suffix}.csv")
+
+    return ranking_tables["GPI"], written
+
+def build_setpiece_efficiency(team_ids=None, season=None, out_dir="data", season_stats_path=EXCEL_SEASON_STATS):
+    """
+    Calcula los índices de balón parado a partir de las estadísticas de temporada.
+
+    Con team_ids/season solo se usan los equipos y la temporada de la partición, de modo
+    que la normalización no mezcla ligas distintas.
+    """
+    cache_dir = os.path.join(os.path.dirname(season_stats_path), ".cache")
+    df = read_excel_cached(season_stats_path, cache_dir=cache_dir)
+    if team_ids is not None:
+        df = df[df["team_id"].isin(team_ids)]
+    if season is not None and "season_name" in df.columns:
+        same_season = df["season_name"].astype(str) == str(season)
+        if same_season.any():
+            df = df[same_season]
+        else:
+            print(f"⚠️ Sin estadísticas de temporada para {season}: se usan las disponibles.")
+    df = df.reset_index(drop=True)
+
+    def normalize_series_min_max(s, new_min=0.5, new_max=9.5):
+        old_min = s.min()
+        old_max = s.max()
+        if old_max == old_min:
+            return pd.Series(np.full_like(s, (new_min + new_max) / 2), index=s.index)
+        normalized = (s - old_min) / (old_max - old_min)
+        scaled = normalized * (new_max - new_min) + new_min
+        return scaled
+
+    # Cálculo de eficiencias a balón parado
+    df['corner_shot_efficiency'] = df['team_season_shots_from_corners_pg'] / df['team_season_corners_pg']
+    df['corner_goal_efficiency'] = df['team_season_goals_from_corners_pg'] / df['team_season_corners_pg']
+    df['corner_xg_efficiency'] = df['team_season_corner_xg_pg'] / df['team_season_corners_pg']
+
+    df['free_kick_shot_efficiency'] = df['team_season_shots_from_free_kicks_pg'] / df['team_season_free_kicks_pg']
+    df['free_kick_goal_efficiency'] = df['team_season_goals_from_free_kicks_pg'] / df['team_season_free_kicks_pg']
+    df['free_kick_xg_efficiency'] = df['team_season_free_kick_xg_pg'] / df['team_season_free_kicks_pg']
+
+    df['dfk_goal_efficiency'] = df['team_season_direct_free_kick_goals_pg'] / df['team_season_direct_free_kicks_pg']
+    df['dfk_xg_efficiency'] = df['team_season_direct_free_kick_xg_pg'] / df['team_season_direct_free_kicks_pg']
+    df['direct_free_kick_shot_efficiency'] = df['team_season_shots_from_direct_free_kicks_pg'] / df['team_season_direct_free_kicks_pg']
+
+    df['throw_in_shot_efficiency'] = df['team_season_shots_from_throw_ins_pg'] / df['team_season_throw_ins_pg']
+    df['throw_in_goal_efficiency'] = df['team_season_goals_from_throw_ins_pg'] / df['team_season_throw_ins_pg']
+    df['throw_in_xg_efficiency'] = df['team_season_throw_in_xg_pg'] / df['team_season_throw_ins_pg']
+
+    # Subíndices ponderados
+    df['corner_subindex'] = (
+        df['corner_goal_efficiency'] * 0.15 +
+        df['corner_xg_efficiency'] * 0.10 +
+        df['corner_shot_efficiency'] * 0.10
+    )
+
+    df['free_kick_subindex'] = (
+        df['free_kick_goal_efficiency'] * 0.15 +
+        df['free_kick_xg_efficiency'] * 0.10 +
+        df['free_kick_shot_efficiency'] * 0.10
+    )
+
+    df['directfk_subindex'] = (
+        df['dfk_goal_efficiency'] * 0.10 +
+        df['dfk_xg_efficiency'] * 0.05 +
+        df['direct_free_kick_shot_efficiency'] * 0.05
+    )
+
+    df['throw_in_subindex'] = (
+        df['throw_in_goal_efficiency'] * 0.10 +
+        df['throw_in_xg_efficiency'] * 0.05 +
+        df['throw_in_shot_efficiency'] * 0.05
+    )
+
+    # Normalizar subíndices
+    df['corner_subindex_norm'] = normalize_series_min_max(df['corner_subindex'], 0.5, 9.5)
+    df['free_kick_subindex_norm'] = normalize_series_min_max(df['free_kick_subindex'], 0.5, 9.5)
+    df['directfk_subindex_norm'] = normalize_series_min_max(df['directfk_subindex'], 0.5, 9.5)
+    df['throw_in_subindex_norm'] = normalize_series_min_max(df['throw_in_subindex'], 0.5, 9.5)
+
+    # DataFrame final con columnas normalizadas
+    df_setpiece = df[['team_name', 'team_id',
+                    'corner_subindex_norm',
+                    'free_kick_subindex_norm',
+                    'directfk_subindex_norm',
+                    'throw_in_subindex_norm']].copy()
+
+    # Eliminar filas con NaNs
+    df_setpiece.dropna(inplace=True)
+
+
+    # KPI global de balón parado con pesos
+    df_setpiece['SetPiece Eficcacy Index'] = evaluate_kpis(df_setpiece, ["SetPiece Eficcacy Index"])["SetPiece Eficcacy Index"]
+
+    # Eliminar (norm() de emcabezado)
+    df_setpiece.rename(columns=lambda x: x.replace('_norm', ''), inplace=True)
+
+    df_setpiece.to_csv(os.path.join(out_dir, "df_setpiece.csv"), index=False)
+
+    # Verificar columnas
+    required_columns = [
+        "team_season_sp_goal_ratio",
+        "team_season_xg_per_sp",
+        "team_season_sp_shot_ratio",
+        "team_season_sp_goals_pg",
+        "team_season_sp_pg",
         
+    ]
+
+    missing = [col for col in required_columns if col not in df.columns]
+    if missing:
+        raise ValueError(f"Faltan columnas necesarias: {missing}")
+
+    # Calcular volumen eficacia
+    volume_efficacy = df["team_season_sp_goals_pg"] / df["team_season_sp_pg"]
+
+    # Normalizar función
+    def normalize(s):
+        return (s - s.min()) / (s.max() - s.min())
+
+    # Normalizar variables
+    goal_conversion_norm = normalize(df["team_season_sp_goal_ratio"])
+    xg_efficiency_norm = normalize(df["team_season_xg_per_sp"])
+    shot_conversion_norm = normalize(df["team_season_sp_shot_ratio"])
+    volume_efficacy_norm = normalize(volume_efficacy)
+
+    # Calcular KPI combinado
+    df["GoalSetPiece Performance Index"] = (
+        0.35 * goal_conversion_norm +
+        0.25 * xg_efficiency_norm +
+        0.20 * shot_conversion_norm +
+        0.20 * volume_efficacy_norm
+    )* 9.5 + 0.5
+
+    # DataFrame reducido para análisis
+    df_setpiece_efficiency = df[["team_name", "team_id", "GoalSetPiece Performance Index"]].copy()
+
+    df_setpiece_efficiency  = df_setpiece.merge(
+        df_setpiece_efficiency.drop(columns=["team_name"]),
+        on='team_id',
+        how='inner'
+    )
+
+    df_setpiece_efficiency.sort_values("GoalSetPiece Performance Index", ascending=False)
+
+    df_setpiece_efficiency.to_csv(os.path.join(out_dir, "df_setpiece_efficiency.csv"), index=False)
+
+    return df_setpiece_efficiency
+
+def build_goal_kpis(ranking_avg_display_GPI, df_setpiece_efficiency, out_dir="data"):
+    """Combina el ranking GPI con los índices de balón parado (df_GoalKPIs)"""
+    df_GoalKPIs = ranking_avg_display_GPI.merge(
+        df_setpiece_efficiency.drop(columns=["team_name"]),
+        on='team_id',
+        how='inner'
+    )
+
+    # --- Normalizar subíndices entre 0.5 y 9.5 ---
+    def normalize_to_range(series, new_min=0.5, new_max=9.5):
+        old_min = series.min()
+        old_max = series.max()
+        if old_max == old_min:
+            return pd.Series([new_min] * len(series), index=series.index)
+        return ((series - old_min) / (old_max - old_min)) * (new_max - new_min) + new_min
+
+    cols_to_norm = [
+        "Goal Envolvement Index",
+        "Goal Conversion Index",
+        "Possession GoalChance Index",
+        "Goal Envolvement Index (adj)",
+        "Goal Conversion Index (adj)",
+        "Possession GoalChance Index (adj)",
+    ]
+    df_GoalKPIs.rename(columns={
+        "corner_subindex": "corner Efficiency",
+        "free_kick_subindex": "freekick Efficiency",
+        "directfk_subindex": "directfk Efficiency",
+        "throw_in_subindex": "throw in Efficiency"
+    }, inplace=True)
+
+    for col in [c for c in cols_to_norm if c in df_GoalKPIs.columns]:
+        df_GoalKPIs[col] = normalize_to_range(df_GoalKPIs[col], 0.500, 9.500)
+
+    df_GoalKPIs.to_csv(os.path.join(out_dir, "df_GoalKPIs.csv"), index=False)
+
+    return df_GoalKPIs
+
+def build_top_values(df_GoalKPIs, competition=None, season=None,
+                     top_k=DEFAULT_TOP_K, quantiles=DEFAULT_QUANTILES, out_dir="data"):
+    """
+    Añade las filas TopValues a df_GoalKPIs (df_GoalKPIs_TopValues).
+
+    Las bandas de referencia (top-k, cuantiles y media de liga) se guardan además
+    por competición y temporada en df_benchmark_bands.csv dentro de out_dir.
+    """
+    df = df_GoalKPIs.copy()
+
+    kpis = [
+        "Goal Performance Index", "Goal Envolvement Index",
+        "Goal Conversion Index", "Possession GoalChance Index",
+        "corner Efficiency", "freekick Efficiency",
+        "directfk Efficiency", "throw in Efficiency",
+        "SetPiece Eficcacy Index", "GoalSetPiece Performance Index"
+    ] + [col for col in ADJUSTED_DISPLAY_KPIS if col in df.columns]
+
+    # --- Bandas de referencia (top-k, cuantiles y media) para todos los KPIs a la vez ---
+    df_bands = build_benchmark_bands(df, kpis, competition, season, k=top_k, quantiles=quantiles)
+    save_benchmark_bands(df_bands, os.path.join(out_dir, "df_benchmark_bands.csv"))
+
+    # Filas TopValues (min/max del top-k) con 'team_name' como primera columna
+    df_KPIs_TopValues = df_bands[df_bands["band"].isin([TOP_MIN, TOP_MAX])][["band"] + kpis]
+    df_KPIs_TopValues = df_KPIs_TopValues.rename(columns={"band": "team_name"}).reset_index(drop=True)
+    df_KPIs_TopValues[kpis] = df_KPIs_TopValues[kpis].round(3)
+
+
+    # 1. Eliminar la columna team_id de ambos (si está presente)
+    if "team_id" in df_GoalKPIs.columns:
+        df_GoalKPIs = df_GoalKPIs.drop(columns=["team_id"])
+    if "team_id" in df_KPIs_TopValues.columns:
+        df_KPIs_TopValues = df_KPIs_TopValues.drop(columns=["team_id"])
+
+    # 2. Asegurar que 'Rank (avg)' y 'match_week' están en df_KPIs_TopValues
+    match_week_val = df_GoalKPIs["match_week"].iloc[0]
+    df_KPIs_TopValues["match_week"] = match_week_val
+    df_KPIs_TopValues["Rank (avg)"] = 0  # o cualquier valor placeholder
+
+
+    # 3. Reordenar columnas para que coincidan con df_GoalKPIs
+    cols = df_GoalKPIs.columns.tolist()
+    # Es importante que coincidan exactamente, de lo contrario concat() rellenará con NaN :contentReference[oaicite:1]{index=1}
+    df_KPIs_TopValues = df_KPIs_TopValues[cols]
+
+    # 4. Concatenar verticalmente
+    df_GoalKPIs_TopValues= pd.concat([df_KPIs_TopValues, df_GoalKPIs], ignore_index=True).round(2)
+
+
+    df_GoalKPIs_TopValues.to_csv(os.path.join(out_dir, "df_GoalKPIs_TopValues.csv"), index=False)
+
+    return df_GoalKPIs_TopValues
+
+def write_form(form_state, out_dir="data"):
+    """Escribe df_form.csv (KPIs de forma por equipo: últimos N, EWMA, local y visitante)"""
+    df_form = form_table(form_state)
+    df_form.to_csv(os.path.join(out_dir, "df_form.csv"), index=False)
+    return df_form
+
+def write_team_cumulative(cumulative, out_dir="data"):
+    """Escribe df_team_cumulative.csv (sumas y partidos acumulados por equipo y jornada)"""
+    cumulative.to_csv(os.path.join(out_dir, "df_team_cumulative.csv"), index=False)
+    return cumulative
+
+def write_team_ci(df_final, out_dir="data"):
+    """Escribe df_team_ci.csv (intervalos bootstrap y probabilidades de posición por equipo y KPI)"""
+    df_team_ci = bootstrap_team_kpis(df_final[df_final["match_id"] != "AVG"])
+    df_team_ci.to_csv(os.path.join(out_dir, "df_team_ci.csv"), index=False)
+    return df_team_ci
+
+def _write_outputs(df_final, partition, paths, only_if_changed=False):
+    """Escribe df_final, rankings, balón parado y GoalKPIs; devuelve los rankings reescritos"""
+    out_dir = paths["out_dir"]
+    df_final.to_csv(os.path.join(out_dir, "df_final.csv"), index=False)
+    ranking_avg_display_GPI, written = write_rankings(df_final, only_if_changed, out_dir=out_dir)
+    df_setpiece_efficiency = build_setpiece_efficiency(
+        partition["team_ids"], partition["season"], out_dir, paths["season_stats"]
+    )
+
+    df_GoalKPIs = build_goal_kpis(ranking_avg_display_GPI, df_setpiece_efficiency, out_dir)
+    build_top_values(df_GoalKPIs, partition["competition"], partition["season"], out_dir=out_dir)
+    return written
+
+# -------------------------------------------
+# 📌 ETAPAS DEL PIPELINE
+# -------------------------------------------
+# Cada etapa declara sus entradas y salidas; run_stages() la salta si el código,
+# la configuración y el contenido de sus entradas no cambiaron desde la última vez.
+# Las etapas se ejecutan por partición: 'match_data' y 'partition' son las filas y
+# los datos (competición, temporada, equipos) de la partición, y 'paths' sus carpetas.
+def _stage_match_kpis(match_data):
+    df = compute_match_kpis(match_data)
+    df, kpi_scale = normalize_match_kpis(df)
+    df = add_match_scores(df)
+    return {"matches": df, "kpi_scale": [list(map(float, v)) for v in kpi_scale],
+            "match_hashes": match_hashes(match_data)}
+
+def _stage_team_averages(matches, kpi_scale, match_hashes, paths):
+    max_week = matches['match_week'].dropna().max()  # jornada máxima jugada
+    team_sums = compute_team_sums(matches)
+    df_final = build_df_final(matches, team_sums, max_week)
+    df_final.to_csv(os.path.join(paths["out_dir"], "df_final.csv"), index=False)
+
+    # El estado incremental parte siempre del último cálculo completo
+    kpi_min, kpi_max = kpi_scale
+    save_state(matches, team_sums, kpi_min, kpi_max, max_week, _match_kpi_signature(), paths["state_dir"],
+               hashes=match_hashes)
+    return {"df_final": df_final}
+
+def _stage_form(matches, paths):
+    form_state = build_form_state(matches)
+    write_form(form_state, paths["out_dir"])
+    save_form_state(form_state, paths["state_dir"])
+    return {}
+
+def _stage_team_cumulative(matches, paths):
+    cumulative = weekly_cumulative(matches)
+    write_team_cumulative(cumulative, paths["out_dir"])
+    save_weekly_cumulative(cumulative, paths["state_dir"])
+    return {}
+
+def _stage_team_ci(df_final, paths):
+    write_team_ci(df_final, paths["out_dir"])
+    return {}
+
+def _stage_rankings(df_final, paths):
+    ranking_avg_display_GPI, _ = write_rankings(df_final, out_dir=paths["out_dir"])
+    return {"ranking_GPI": ranking_avg_display_GPI}
+
+def _stage_setpiece(partition, paths):
+    setpiece = build_setpiece_efficiency(
+        partition["team_ids"], partition["season"], paths["out_dir"], paths["season_stats"]
+    )
+    return {"setpiece_efficiency": setpiece}
+
+def _stage_goal_kpis(ranking_GPI, setpiece_efficiency, paths):
+    return {"goal_kpis": build_goal_kpis(ranking_GPI, setpiece_efficiency, paths["out_dir"])}
+
+def _stage_top_values(goal_kpis, partition, paths):
+    build_top_values(goal_kpis, partition["competition"], partition["season"], out_dir=paths["out_dir"])
+    return {}
+
+def build_stages(paths):
+    """Etapas del cálculo completo de una partición, en orden de ejecución"""
+    rankings = dict(DEFAULT_RANKINGS, GPI="Goal Performance Index")
+
+    def out(name):
+        return os.path.join(paths["out_dir"], name)
+
+    return [
+        stage("match_kpis", _stage_match_kpis, inputs=["match_data"],
+              outputs=["matches", "kpi_scale", "match_hashes"],
+              code=[compute_match_kpis, normalize_match_kpis, build_match_scores, add_match_scores, match_hashes],
+              params={"kpis": _match_kpi_signature()}),
+        stage("team_averages", _stage_team_averages, inputs=["matches", "kpi_scale", "match_hashes", "paths"],
+              outputs=["df_final"],
+              writes=[out("df_final.csv"), os.path.join(paths["state_dir"], "state.json")],
+              code=[compute_team_sums, team_means, add_match_percentiles, add_opponent_adjusted,
+                    build_df_final, save_state],
+              params={"ridge_alpha": RIDGE_ALPHA}),
+        stage("form", _stage_form, inputs=["matches", "paths"],
+              writes=[out("df_form.csv"), os.path.join(paths["state_dir"], "form_state.csv")],
+              code=[build_form_state, update_form_state, form_table, write_form],
+              params={"window": FORM_WINDOW, "alpha": EWMA_ALPHA}),
+        stage("team_cumulative", _stage_team_cumulative, inputs=["matches", "paths"],
+              writes=[out("df_team_cumulative.csv"), os.path.join(paths["state_dir"], "team_cumulative.csv")],
+              code=[weekly_cumulative, write_team_cumulative]),
+        stage("team_ci", _stage_team_ci, inputs=["df_final", "paths"], writes=[out("df_team_ci.csv")],
+              code=[bootstrap_team_kpis, write_team_ci],
+              params={"resamples": BOOTSTRAP_RESAMPLES, "level": CI_LEVEL, "seed": BOOTSTRAP_SEED}),
+        stage("rankings", _stage_rankings, inputs=["df_final", "paths"], outputs=["ranking_GPI"],
+              writes=[out(f"df_ranking_avg_display_{suffix}.csv") for suffix in rankings],
+              code=[write_rankings, build_rankings],
+              params={"rankings": rankings, "kpis": registry_signature(list(rankings.values()))}),
+        stage("setpiece", _stage_setpiece, inputs=["partition", "paths"], outputs=["setpiece_efficiency"],
+              files=[paths["season_stats"]],
+              writes=[out("df_setpiece.csv"), out("df_setpiece_efficiency.csv")],
+              code=[build_setpiece_efficiency],
+              params={"kpis": registry_signature(["SetPiece Eficcacy Index"])}),
+        stage("goal_kpis", _stage_goal_kpis, inputs=["ranking_GPI", "setpiece_efficiency", "paths"],
+              outputs=["goal_kpis"], writes=[out("df_GoalKPIs.csv")], code=[build_goal_kpis]),
+        stage("top_values", _stage_top_values, inputs=["goal_kpis", "partition", "paths"],
+              writes=[out("df_GoalKPIs_TopValues.csv"), out("df_benchmark_bands.csv")],
+              code=[build_top_values, build_benchmark_bands],
+              params={"top_k": DEFAULT_TOP_K, "quantiles": list(DEFAULT_QUANTILES)}),
+    ]
+
+def _print_stage(name, status, seconds):
+    icon = "⏭️" if status == "skipped" else "✅"
+    print(f"{icon} Etapa '{name}': {'sin cambios' if status == 'skipped' else 'ejecutada'} ({seconds:.2f}s)")
+
+def _generate_full(df, partition, paths, force=False, track_memory=False, on_stage=_print_stage):
+    """
+    Recalcula las etapas de la partición cuyas entradas cambiaron (todas con force=True).
+
+    Retorna:
+    - Mensaje resumen y el informe de run_stages (tiempo y memoria por etapa)
+    """
+    report = run_stages(
+        build_stages(paths),
+        stage_dir=paths["stage_dir"],
+        artifacts={"match_data": df, "partition": partition, "paths": paths},
+        force=force,
+        on_stage=on_stage,
+        track_memory=track_memory,
+    )
+    ran = [r["stage"] for r in report if r["status"] == "ran"]
+    if not ran:
+        return NO_CHANGES, report
+    return f"etapas ejecutadas: {', '.join(ran)}", report
+
+def _generate_incremental(df, partition, paths, track_memory=False, on_stage=_print_stage):
+    """
+    Procesa solo los match_id nuevos de la partición respecto al estado guardado.
+
+    Los KPIs por partido se calculan solo para los partidos nuevos y los promedios por
+    equipo se actualizan sumando sus acumulados. Si los partidos nuevos amplían el rango
+    de normalización, se re-escalan los KPIs brutos guardados (sin volver a calcular las
+    fórmulas) y se reconstruyen los acumulados. Si algún partido ya procesado se editó o
+    desapareció (según match_hashes), se recurre al cálculo completo.
+
+    Retorna:
+    - Mensaje resumen y el informe por etapa si se recurrió al cálculo completo (o None)
+    """
+    state = load_state(paths["state_dir"])
+    if state is None:
+        print("ℹ️ No hay estado incremental previo: se ejecuta el cálculo completo.")
+        return _generate_full(df, partition, paths, track_memory=track_memory, on_stage=on_stage)
+    if state.get("kpi_signature") != _match_kpi_signature():
+        print("ℹ️ Las fórmulas de los KPIs cambiaron: se ejecuta el cálculo completo.")
+        return _generate_full(df, partition, paths, track_memory=track_memory, on_stage=on_stage)
+
+    outdated = not {"match_score", "result", "goal_difference"} <= set(state["matches"].columns)
+    if outdated or state["hashes"] is None:
+        print("ℹ️ El estado guardado es de una versión anterior: se ejecuta el cálculo completo.")
+        return _generate_full(df, partition, paths, track_memory=track_memory, on_stage=on_stage)
+
+    # Partidos guardados que se editaron en el Excel (mismo match_id, otro contenido) o
+    # que desaparecieron
+    hashes = match_hashes(df)
+    if changed_matches(state["hashes"], hashes):
+        print("ℹ️ Los partidos ya procesados cambiaron o desaparecieron: se ejecuta el cálculo completo.")
+        return _generate_full(df, partition, paths, track_memory=track_memory, on_stage=on_stage)
+
+    known = df["match_id"].isin(state["matches"]["match_id"])
+    df_new = df[~known]
+    if df_new.empty:
+        return NO_NEW_MATCHES, None
+
+    print(f"🆕 Partidos nuevos: {df_new['match_id'].nunique()}")
+    df_new = compute_match_kpis(df_new)
+
+    old_min = np.asarray(state["kpi_min"])
+    old_max = np.asarray(state["kpi_max"])
+    kpi_min = np.minimum(old_min, df_new[RAW_KPI_COLUMNS].min().to_numpy())
+    kpi_max = np.maximum(old_max, df_new[RAW_KPI_COLUMNS].max().to_numpy())
+
+    df_new = add_match_scores(df_new)
+    if np.array_equal(kpi_min, old_min) and np.array_equal(kpi_max, old_max):
+        # Misma escala: solo se normalizan los partidos nuevos
+        df_new, _ = normalize_match_kpis(df_new, kpi_min, kpi_max)
+        matches = pd.concat([state["matches"], df_new[state["matches"].columns]], ignore_index=True)
+        team_sums = add_team_sums(state["sums"], compute_team_sums(df_new))
+
+        # Forma: solo se añaden los partidos nuevos al estado por equipo
+        form_state = load_form_state(paths["state_dir"])
+        if form_state is not None and is_chronological(form_state, df_new):
+            form_state = update_form_state(form_state, df_new)
+        else:
+            form_state = build_form_state(matches)
+
+        # Acumulado por jornada: solo se suman los partidos nuevos
+        cumulative = load_weekly_cumulative(paths["state_dir"])
+        cumulative = weekly_cumulative(matches if cumulative is None else df_new, cumulative)
+    else:
+        # La escala cambió: se re-escalan los KPIs brutos ya guardados
+        print("ℹ️ El rango de normalización cambió: se re-escalan los partidos guardados.")
+        matches = pd.concat([state["matches"], df_new.reindex(columns=state["matches"].columns)], ignore_index=True)
+        matches, _ = normalize_match_kpis(matches, kpi_min, kpi_max)
+        team_sums = compute_team_sums(matches)
+        form_state = build_form_state(matches)
+        cumulative = weekly_cumulative(matches)
+
+    max_week = max(state["max_week"], df_new['match_week'].dropna().max())
+    df_final = build_df_final(matches, team_sums, max_week)
+
+    written = _write_outputs(df_final, partition, paths, only_if_changed=True)
+    write_form(form_state, paths["out_dir"])
+    write_team_cumulative(cumulative, paths["out_dir"])
+    write_team_ci(df_final, paths["out_dir"])
+    save_state(matches, team_sums, kpi_min, kpi_max, max_week, _match_kpi_signature(), paths["state_dir"],
+               hashes=hashes)
+    save_form_state(form_state, paths["state_dir"])
+    save_weekly_cumulative(cumulative, paths["state_dir"])
+    # Los CSV ya no corresponden a las etapas memorizadas del cálculo completo
+    clear_stages(paths["stage_dir"])
+    return (
+        f"{df_new['match_id'].nunique()} partidos nuevos "
+        f"(rankings reescritos: {len(written)})"
+    ), None
+
+# -------------------------------------------
+# 📌 PARTICIONES (competición, temporada)
+# -------------------------------------------
+def partition_paths(competition, season, output_dir=OUTPUT_DIR, input_dir=INPUT_DIR):
+    """Carpetas de salidas, estado incremental y etapas de una partición"""
+    slug = partition_slug(competition, season)
+    return {
+        "slug": slug,
+        "out_dir": os.path.join(output_dir, "partitions", slug),
+        "state_dir": os.path.join(output_dir, "incremental", slug),
+        "stage_dir": os.path.join(output_dir, ".pipeline", slug),
+        "season_stats": _input_path(EXCEL_SEASON_STATS, input_dir),
+    }
+
+def _process_partition(task):
+    """Procesa una partición (se ejecuta en un proceso del pool)"""
+    df = task["data"]
+    # Solo las particiones que se procesan en el propio proceso pueden avisar de cada etapa
+    on_stage = task.get("on_stage") or _print_stage
+    competition, season = task["competition"], task["season"]
+    paths = partition_paths(competition, season, task["output_dir"], task["input_dir"])
+    os.makedirs(paths["out_dir"], exist_ok=True)
+
+    partition = {
+        "competition": competition,
+        "season": season,
+        "team_ids": sorted(int(t) for t in df["team_id"].unique()),
+    }
+
+    print(f"🏟️ Partición {competition} {season}: {df['match_id'].nunique()} partidos")
+    with measure(paths["slug"], task["track_memory"]) as total:
+        if task["incremental"]:
+            with measure("incremental", task["track_memory"]) as step:
+                message, stages = _generate_incremental(df, partition, paths, task["track_memory"], on_stage)
+            stages = stages or [dict(step, status="ran")]
+        else:
+            message, stages = _generate_full(df, partition, paths, task["force"], task["track_memory"], on_stage)
+    changed = message not in (NO_CHANGES, NO_NEW_MATCHES)
+
+    return {
+        "competition": competition,
+        "season": str(season),
+        "slug": paths["slug"],
+        "out_dir": paths["out_dir"],
+        "n_matches": int(df["match_id"].nunique()),
+        "max_week": float(df["match_week"].dropna().max()),
+        "message": message,
+        "changed": changed,
+        "seconds": total["seconds"],
+        "peak_mb": total.get("peak_mb"),
+        "stages": stages,
+    }
+
+def _merge_benchmark_bands(results, path=BANDS_PATH):
+    """Une las bandas de todas las particiones en un único df_benchmark_bands.csv"""
+    tables = [
+        load_benchmark_bands(path=os.path.join(r["out_dir"], "df_benchmark_bands.csv"))
+        for r in results
+    ]
+    tables = [t for t in tables if t is not None]
+    if tables:
+        save_benchmark_bands(pd.concat(tables, ignore_index=True), path)
+
+def _publish_snapshot(results, primary, index, output_dir=OUTPUT_DIR):
+    """
+    Escribe un snapshot nuevo (base de datos + CSV publicados) y lo publica con un cambio
+    atómico del puntero, de modo que las páginas nunca mezclan archivos de dos ejecuciones.
+
+    La base de datos parte de la del snapshot anterior y solo se recargan las particiones
+    con cambios. Si nada cambió se mantiene el snapshot publicado. Si la base de datos
+    anterior tiene otro formato (SCHEMA_VERSION), el snapshot nuevo se carga desde cero con
+    todas las particiones del índice; la anterior no se modifica.
+
+    Retorna:
+    - Id del snapshot publicado
+    """
+    current = snapshots.current_snapshot(output_dir)
+    previous_db = data_store.store_path(current, output_dir) if current else None
+    if previous_db and not data_store.is_current(previous_db):
+        previous_db = None
+    # Las particiones que no se procesaron en esta ejecución se cargan desde su carpeta
+    # cuando faltan en la base de datos anterior (o no se puede partir de ella)
+    processed = {r["slug"] for r in results}
+    candidates = list(results) + [
+        dict(row, out_dir=os.path.join(output_dir, "partitions", row["slug"]), changed=False)
+        for row in index.to_dict("records")
+        if row["slug"] not in processed
+    ]
+    pending = [
+        r for r in candidates
+        if r["changed"] or not previous_db
+        or not data_store.has_partition(r["competition"], r["season"], previous_db)
+    ]
+    if current and not pending:
+        competition, season = data_store.default_partition(previous_db)
+        if (competition, str(season)) == (primary["competition"], str(primary["season"])):
+            return current
+
+    snapshot_id, snapshot_dir = snapshots.new_snapshot(output_dir)
+    db_path = os.path.join(snapshot_dir, data_store.DB_FILE)
+    if previous_db:
+        data_store.copy_store(previous_db, db_path)
+    for r in pending:
+        data_store.write_partition(r["out_dir"], r["competition"], r["season"],
+                                   r["n_matches"], r["max_week"], db_path)
+    data_store.set_published(primary["competition"], primary["season"], db_path)
+
+    publish_partition(primary["out_dir"], OUTPUT_FILES, snapshot_dir)
+    publish_partition(output_dir, [os.path.basename(BANDS_PATH)], snapshot_dir)
+
+    snapshots.publish_snapshot(snapshot_id, output_dir)
+    removed = snapshots.cleanup_snapshots(output_dir)
+    print(f"📸 Snapshot publicado: {snapshot_id}" + (f" ({len(removed)} antiguo(s) borrado(s))" if removed else ""))
+    return snapshot_id
+
+def _stage_progress(on_progress, slug):
+    """Callback de etapa que además de imprimirla la comunica a on_progress"""
+    def on_stage(name, status, seconds):
+        _print_stage(name, status, seconds)
+        on_progress({"step": "stage", "partition": slug, "stage": name, "status": status, "seconds": seconds})
+    return on_stage
+
+def run_pipeline(incremental=False, force=False, max_workers=None, input_dir=INPUT_DIR,
+                 output_dir=OUTPUT_DIR, partitions=None, track_memory=False, on_progress=None):
+    """
+    Ejecuta el pipeline completo y devuelve un informe con tiempos (y memoria) por etapa.
+
+    Parámetros:
+    - incremental: Procesar solo los partidos nuevos de cada partición
+    - force: Ejecutar todas las etapas aunque no hayan cambiado sus entradas
+    - max_workers: Procesos del pool (por defecto uno por partición, hasta el nº de CPUs)
+    - input_dir: Carpeta con los Excel de StatsBomb
+    - output_dir: Carpeta donde se escriben los CSV
+    - partitions: Lista de particiones a procesar (slug, p. ej. 'chile_primera_division_2025',
+      o nombre de competición); por defecto todas
+    - track_memory: Medir el pico de memoria de cada etapa con tracemalloc
+    - on_progress: Callback opcional on_progress(evento) con el avance (lectura, etapas,
+      particiones terminadas y publicación); las etapas solo se comunican cuando las
+      particiones se procesan en el propio proceso
+
+    Retorna:
+    - dict serializable a JSON con 'message', 'seconds', 'steps' (lectura y publicación)
+      y 'partitions' (con el detalle de cada etapa)
+    """
+    report = {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "incremental": incremental,
+        "input_dir": input_dir,
+        "output_dir": output_dir,
+        "steps": [],
+    }
+    progress = on_progress or (lambda event: None)
+    with measure("total", track_memory) as total:
+        os.makedirs(output_dir, exist_ok=True)
+
         print("📊 Iniciando procesamiento de datos...")
-        
-        # --- 1. LEER ARCHIVOS EXCEL ---
         print("📖 Leyendo archivos Excel...")
-        excel_path = "AUDAX/sb_team_match_stats_2025.xlsx"
-        df = pd.read_excel(excel_path)
-        
-        excel_path_matches = "AUDAX/sb_matches_2025.xlsx"
-        df_matches = pd.read_excel(excel_path_matches)
-        
-        # Selecciona solo las columnas deseadas de df_matches
-        df_matches_filtered = df_matches[['match_id', 'match_date', 'competition', 'season', 'match_week',  'competition_stage', 'home_team', 'away_team']]
-
-        # Haz el merge (unión) por match_id, manteniendo todas las columnas de df
-        df = pd.merge(df, df_matches_filtered, on='match_id', how='left')
-
-        df.columns = df.columns.str.replace("^team_match_", "", regex=True)
-
-        # --- Calcular Goal Envolvement Index (GEI) ---
-        df["Goal Envolvement Index"] = (
-            (df["xa"] + df["key_passes"] + df["assists"]) * (10 * 0.3) / 3 +
-            (df["through_balls"] + df["passes_into_box"] + df["passes_inside_box"] + df["crosses_into_box"]) * (10 * 0.2) / 4 +
-            df["box_cross_ratio"] * (10 * 0.05) +
-            (df["sp_xa"] + df["deep_progressions"] + df["touches_inside_box"]) * (10 * 0.15) / 3 +
-            (df["xgchain"] + df["xgbuildup"]) * (10 * 0.1) / 2 +
-            (df["xgchain_per_possession"] + df["xgbuildup_per_possession"]) * (10 * 0.1) / 2 +
-            (df["obv_pass"] + df["obv_dribble_carry"]) * (10 * 0.05) / 2 +
-            df["forward_passes"] * (10 * 0.05)
-        ) / df["minutes"]
-
-        # --- Calcular Goal Conversion Index (GCI) ---
-        df["Goal Conversion Index"] = (
-            df["goals"] * (10 * 0.3) +
-            df["np_xg"] * (10 * 0.2) +
-            df["np_xg_per_shot"] * (10 * 0.2) +
-            df["np_shots_on_target"] * (10 * 0.1) +
-            df["shot_touch_ratio"] * (10 * 0.1) +
-            df["penalties_won"] * (10 * 0.05) +
-            df["obv_shot"] * (10 * 0.05)
-        ) / df["np_shots"]
-
-        # --- Calcular Possession GoalChance Index (PGC) ---
-        df["Possession GoalChance Index"] = (
-            (df["key_passes"] + df["assists"] + df["xa"] + df["xgchain"]) * (10 * 0.85) / 4 +
-            df["touches_inside_box"] * (10 * 0.15)
-        ) / df["possession"]
-
-        # --- KPI Compuesto ponderado sin normalización ---
-        df["Goal Performance Index"] = (
-            df["Goal Envolvement Index"] +
-            df["Goal Conversion Index"] +
-            df["Possession GoalChance Index"] 
-        ) 
-
-        # Sustituir NaN por 0.01
-        df = df.fillna(0.01) 
-
-        # --- Mostrar resultado ---
-        df[[
-            'match_id', 'team_name', 'team_id', 'account_id', 'match_date', 'competition',
-            'season', 'match_week', 'competition_stage', 'home_team', 'away_team', 'np_xg', 'np_shots', 'obv_shot', 'xgchain', 'goals',
-            "Goal Envolvement Index", "Goal Conversion Index",
-            "Possession GoalChance Index", "Goal Performance Index"
-        ]]
-
-        # --- Calcular Goal Envolvement Index (GEI) ---
-        # Ponderaciones ajustadas para que sumen 10
-        df["Goal Envolvement Index"] = (
-            (df["xa"] + df["key_passes"] + df["assists"]) * (10 * 0.3) / 3 +  # 3 métricas, 30%
-            (df["through_balls"] + df["passes_into_box"] + df["passes_inside_box"] + df["crosses_into_box"]) * (10 * 0.2) / 4 +  # 4 métricas, 20%
-            df["box_cross_ratio"] * (10 * 0.05) +  # 5%
-            (df["sp_xa"] + df["deep_progressions"] + df["touches_inside_box"]) * (10 * 0.15) / 3 +  # 15%
-            (df["xgchain"] + df["xgbuildup"]) * (10 * 0.1) / 2 +  # 10%
-            (df["xgchain_per_possession"] + df["xgbuildup_per_possession"]) * (10 * 0.1) / 2 +  # 10%
-            (df["obv_pass"] + df["obv_dribble_carry"]) * (10 * 0.05) / 2 +  # 5%
-            df["forward_passes"] * (10 * 0.05)  # 5%
-        ) / ((df["minutes"])*0.35)
-
-        # --- Calcular Goal Conversion Index (GCI) ---
-        df["Goal Conversion Index"] = (
-            df["goals"] * (10 * 0.3) +  # 30%
-            df["np_xg"] * (10 * 0.2) +  # 20%
-            df["np_xg_per_shot"] * (10 * 0.2) +  # 20%
-            df["np_shots_on_target"] * (10 * 0.1) +  # 10%
-            df["shot_touch_ratio"] * (10 * 0.1) +  # 10%
-            df["penalties_won"] * (10 * 0.05) +  # 5%
-            df["obv_shot"] * (10 * 0.05)  # 5%
-        ) / ((df["np_shots"])*0.45)
-
-        # --- Calcular Possession GoalChance Index (PGC) ---
-        df["Possession GoalChance Index"] = (
-            (df["key_passes"] + df["assists"] + df["xa"] + df["xgchain"]) * (10 * 0.85) / 4 +  # 85%
-            df["touches_inside_box"] * (10 * 0.15)  # 15%
-        ) / ((df["possession"])* 0.2)
-
-        # --- Normalizar KPIs entre 0 y 10 ---
-        kpi_columns = ["Goal Envolvement Index", "Goal Conversion Index", "Possession GoalChance Index"]
-
-        # Sustituir NaN por 0.01
-        df[kpi_columns] = df[kpi_columns].fillna(0.01) 
-
-        # Escalar valores
-        scaler = MinMaxScaler(feature_range=(0.5, 9.5))
-        df[[col + " (norm)" for col in kpi_columns]] = scaler.fit_transform(df[kpi_columns])
-
-        # --- KPI Compuesto promedio ---
-        df["Goal Performance Index"] = df[[col + " (norm)" for col in kpi_columns]].mean(axis=1)
-
-        # --- Mostrar resultado (opcional) ---
-        df[['match_id', 'team_name', 'team_id', 'account_id', 'match_date', 'competition',
-            'season', 'match_week', 'competition_stage', 'home_team', 'away_team', 'np_xg', 'np_shots', 'obv_shot', 'xgchain', 'goals',
-            "Goal Envolvement Index", "Goal Conversion Index",
-            "Possession GoalChance Index", "Goal Performance Index"]]
-
-        # --- Calcular Goal Envolvement Index (GEI) ---
-        df["Goal Envolvement Index"] = (
-            (df["xa"] + df["key_passes"] + df["assists"]) * (10 * 0.3) / 3 +
-            (df["through_balls"] + df["passes_into_box"] + df["passes_inside_box"] + df["crosses_into_box"]) * (10 * 0.2) / 4 +
-            df["box_cross_ratio"] * (10 * 0.05) +
-            (df["sp_xa"] + df["deep_progressions"] + df["touches_inside_box"]) * (10 * 0.15) / 3 +
-            (df["xgchain"] + df["xgbuildup"]) * (10 * 0.1) / 2 +
-            (df["xgchain_per_possession"] + df["xgbuildup_per_possession"]) * (10 * 0.1) / 2 +
-            (df["obv_pass"] + df["obv_dribble_carry"]) * (10 * 0.05) / 2 +
-            df["forward_passes"] * (10 * 0.05)
-        ) / df["minutes"]
-
-        # --- Calcular Goal Conversion Index (GCI) ---
-        df["Goal Conversion Index"] = (
-            df["goals"] * (10 * 0.3) +
-            df["np_xg"] * (10 * 0.2) +
-            df["np_xg_per_shot"] * (10 * 0.2) +
-            df["np_shots_on_target"] * (10 * 0.1) +
-            df["shot_touch_ratio"] * (10 * 0.1) +
-            df["penalties_won"] * (10 * 0.05) +
-            df["obv_shot"] * (10 * 0.05)
-        ) / df["np_shots"]
-
-        # --- Calcular Possession GoalChance Index (PGC) ---
-        df["Possession GoalChance Index"] = (
-            (df["key_passes"] + df["assists"] + df["xa"] + df["xgchain"]) * (10 * 0.85) / 4 +
-            df["touches_inside_box"] * (10 * 0.15)
-        ) / df["possession"]
-
-        # --- Normalizar KPIs entre 0 y 9.5 ---
-        kpi_columns = ["Goal Envolvement Index", "Goal Conversion Index", "Possession GoalChance Index"]
-
-        # Sustituir NaN por 0.01
-        df[kpi_columns] = df[kpi_columns].fillna(0.01) 
-
-        # Escalar valores
-        scaler = MinMaxScaler(feature_range=(0.5, 9.5))
-        df[[col + " (norm)" for col in kpi_columns]] = scaler.fit_transform(df[kpi_columns])
-
-        # --- KPI Compuesto ponderado ---
-        df["Goal Performance Index"] = ((
-            df["Goal Envolvement Index (norm)"] * 3 +
-            df["Goal Conversion Index (norm)"] * 4.5 +
-            df["Possession GoalChance Index (norm)"] * 2
-        ) / (9.5)+ 3)  
-
-        # Tope de 9.7
-        df["Goal Performance Index"] = df["Goal Performance Index"].clip(upper=9.75)
-
-        # --- Mostrar resultado ---
-        df[[
-            'match_id', 'team_name', 'team_id', 'account_id', 'match_date', 'competition', 'season', 'match_week', 'competition_stage', 
-            'home_team', 'away_team',  'np_xg', 'np_shots', 'obv_shot', 'xgchain', 'goals',
-            "Goal Envolvement Index (norm)", "Goal Conversion Index (norm)",
-            "Possession GoalChance Index (norm)", "Goal Performance Index"
-        ]]
-
-        # --- Calcular promedio por equipo (incluyendo team_id) ---
-        avg_kpis = df.groupby(["team_name", "team_id"])[[
-            "np_xg", "np_shots", "obv_shot", "xgchain", "goals",
-            "Goal Envolvement Index (norm)",
-            "Goal Conversion Index (norm)",
-            "Possession GoalChance Index (norm)",
-            "Goal Performance Index"
-        ]].mean().reset_index()
-
-        # --- Añadir columnas identificadoras de promedio ---
-        avg_kpis["match_id"] = "AVG"
-        avg_kpis["match_date"] = 2005
-        avg_kpis["account_id"] = 7336
-        avg_kpis["competition"] = "Chile - Primera División"
-        avg_kpis["season"] = 2005
-        avg_kpis["match_week"] = df['match_week'].dropna().max()  # jornada máxima jugada
-        avg_kpis["competition_stage"] = "Regular Season"
-        avg_kpis["home_team"] = "AVG"
-        avg_kpis["away_team"] = "AVG"
-
-        # --- Reordenar columnas para que coincidan con df original ---
-        avg_kpis = avg_kpis[[
-            "match_id", "team_name", "team_id", "account_id", "match_date", "competition", "season", "match_week",
-            "competition_stage", "home_team", "away_team", "np_xg", "np_shots", "obv_shot", "xgchain", "goals",
-            "Goal Envolvement Index (norm)", "Goal Conversion Index (norm)",
-            "Possession GoalChance Index (norm)", "Goal Performance Index"
-        ]]
-
-        # --- Calcular promedio general (ALL_TEAMS_AVG) ---
-        all_teams_avg = avg_kpis[[
-            "np_xg", "np_shots", "goals",
-            "Goal Envolvement Index (norm)", "Goal Conversion Index (norm)",
-            "Possession GoalChance Index (norm)", "Goal Performance Index"
-        ]].mean()
-
-        # --- Crear fila para ALL_TEAMS_AVG ---
-        all_teams_avg_row = {
-            "match_id": "AVG",
-            "team_name": "ALL_TEAMS_AVG",
-            "team_id": 1,
-            "account_id": 7336,
-            "match_date": 2005,
-            "competition": "Chile - Primera División",
-            "season": 2005 ,
-            "match_week": df['match_week'].dropna().max(),
-            "competition_stage": "Regular Season",
-            "home_team": "AVG",
-            "away_team": "AVG",
-            **all_teams_avg.to_dict()
-        }
-
-        # --- Añadir fila de promedio general a avg_kpis ---
-        avg_kpis = pd.concat([avg_kpis, pd.DataFrame([all_teams_avg_row])], ignore_index=True)
-
-        # --- Concatenar el dataframe original con los promedios ---
-        df_final = pd.concat([df[[
-            "match_id", "team_name", "team_id", "account_id", "match_date", "competition", "season", "match_week",
-            "competition_stage", "home_team", "away_team", "np_xg", "np_shots", "obv_shot", "xgchain", "goals",
-            "Goal Envolvement Index (norm)", "Goal Conversion Index (norm)",
-            "Possession GoalChance Index (norm)", "Goal Performance Index"
-        ]], avg_kpis], ignore_index=True)
-
-        # --- Crear columna 'match_score' tipo "home(goals) - away(goals)" ---
-        # Obtener goles por equipo por partido
-        goals_pivot = df.pivot_table(index="match_id", columns="team_name", values="goals", aggfunc="first")
-
-        # Obtener combinaciones únicas de partidos
-        df_scores = df[["match_id", "home_team", "away_team"]].drop_duplicates()
-
-        # Crear columna con formato deseado
-        def get_score(row):
-            try:
-                home_goals = goals_pivot.loc[row["match_id"], row["home_team"]]
-                away_goals = goals_pivot.loc[row["match_id"], row["away_team"]]
-                return f'{row["home_team"]}({int(home_goals)}) - {row["away_team"]}({int(away_goals)})'
-            except:
-                return None  # En caso de partidos incompletos o filas "AVG"
-
-        df_scores["match_score"] = df_scores.apply(get_score, axis=1)
-
-        # Unir con df_final
-        df_final = df_final.merge(df_scores[["match_id", "match_score"]], on="match_id", how="left")
-        # 8. Rellenar NaN
-        df_final = df_final.fillna({
-            "match_score": "AVG"
-        })
-
-        df_final.to_csv("data/df_final.csv", index=False)
-
-        # --- Filtrar solo filas de promedio por equipo (excluyendo ALL_TEAMS_AVG) ---
-        avg_only = df_final[
-            (df_final["match_id"] == "AVG") & (df_final["team_name"] != "ALL_TEAMS_AVG")
-        ].copy()
-
-        # --- Crear columna de ranking según Goal Conversion Index (norm) (descendente) ---
-        avg_only["Rank (avg)"] = avg_only["Goal Conversion Index (norm)"].rank(
-            ascending=False, method="min"
-        ).astype(int)
-
-        # --- Ordenar por ranking ---
-        ranking_avg = avg_only.sort_values(by="Rank (avg)").reset_index(drop=True)
-
-        # --- Obtener valor máximo de jornadas jugadas ---
-        max_jornada = df_final[df_final["match_id"] != "AVG"]["match_week"].max()
-
-        # --- Crear columna 'match_week' con ese valor constante ---
-        ranking_avg["match_week"] = max_jornada
-
-        # --- Renombrar columnas (quitar '(norm)') ---
-        ranking_avg = ranking_avg.rename(columns={
-            "Goal Performance Index": "Goal Performance Index",
-            "Goal Envolvement Index (norm)": "Goal Envolvement Index",
-            "Goal Conversion Index (norm)": "Goal Conversion Index",
-            "Possession GoalChance Index (norm)": "Possession GoalChance Index"
-        })
-
-        # --- Seleccionar columnas finales ---
-        ranking_avg_display_GCI = ranking_avg[[
-            "Rank (avg)", "team_name", "team_id", "match_week",
-            "Goal Performance Index", 
-            "Goal Envolvement Index", 
-            "Goal Conversion Index", 
-            "Possession GoalChance Index"
-        ]]
-
-        ranking_avg_display_GCI.to_csv("data/df_ranking_avg_display_GCI.csv", index=False)
-
-        # --- Filtrar solo filas de promedio por equipo (excluyendo ALL_TEAMS_AVG) ---
-        avg_only = df_final[
-            (df_final["match_id"] == "AVG") & (df_final["team_name"] != "ALL_TEAMS_AVG")
-        ].copy()
-
-        # --- Crear columna de ranking según Goal Performance Index (descendente) ---
-        avg_only["Rank (avg)"] = avg_only["Goal Envolvement Index (norm)"].rank(ascending=False, method="min").astype(int)
-
-        # --- Ordenar por ranking ---
-        ranking_avg = avg_only.sort_values(by="Rank (avg)").reset_index(drop=True)
-
-        # --- Obtener valor máximo de jornadas jugadas ---
-        max_jornada = df_final[df_final["match_id"] != "AVG"]["match_week"].max()
-
-        # --- Crear columna 'match_week' con ese valor constante ---
-        ranking_avg["match_week"] = max_jornada
-
-        # --- Renombrar columnas (quitar '(norm)') ---
-        ranking_avg = ranking_avg.rename(columns={
-            "Goal Performance Index": "Goal Performance Index",
-            "Goal Envolvement Index (norm)": "Goal Envolvement Index",
-            "Goal Conversion Index (norm)": "Goal Conversion Index",
-            "Possession GoalChance Index (norm)": "Possession GoalChance Index"
-        })
-
-        # --- Seleccionar columnas finales ---
-        ranking_avg_display_GEI = ranking_avg[[
-            "Rank (avg)", "team_name", "team_id", "match_week",
-            "Goal Performance Index", 
-            "Goal Envolvement Index", 
-            "Goal Conversion Index",  
-            "Possession GoalChance Index"
-        ]]
-
-        ranking_avg_display_GEI.to_csv("data/df_ranking_avg_display_GEI.csv", index=False)
-
-        # --- Filtrar solo filas de promedio por equipo (excluyendo ALL_TEAMS_AVG) ---
-        avg_only = df_final[
-            (df_final["match_id"] == "AVG") & (df_final["team_name"] != "ALL_TEAMS_AVG")
-        ].copy()
-
-        # --- Crear columna de ranking según Goal Performance Index (descendente) ---
-        avg_only["Rank (avg)"] = avg_only[ "Possession GoalChance Index (norm)"].rank(ascending=False, method="min").astype(int)
-
-        # --- Ordenar por ranking ---
-        ranking_avg = avg_only.sort_values(by="Rank (avg)").reset_index(drop=True)
-
-        # --- Obtener valor máximo de jornadas jugadas ---
-        max_jornada = df_final[df_final["match_id"] != "AVG"]["match_week"].max()
-
-        # --- Crear columna 'match_week' con ese valor constante ---
-        ranking_avg["match_week"] = max_jornada
-
-        # --- Renombrar columnas (quitar '(norm)') ---
-        ranking_avg = ranking_avg.rename(columns={
-            "Goal Performance Index": "Goal Performance Index",
-            "Goal Envolvement Index (norm)": "Goal Envolvement Index",
-            "Goal Conversion Index (norm)": "Goal Conversion Index",
-            "Possession GoalChance Index (norm)": "Possession GoalChance Index"
-        })
-
-        # --- Seleccionar columnas finales ---
-        ranking_avg_display_PGI = ranking_avg[[
-            "Rank (avg)", "team_name", "team_id", "match_week",
-            "Goal Performance Index", 
-            "Goal Envolvement Index", 
-            "Goal Conversion Index",  
-            "Possession GoalChance Index"
-        ]]
-        
-        ranking_avg_display_PGI.to_csv("data/df_ranking_avg_display_PGI.csv", index=False)
-
-        # --- Filtrar solo filas de promedio por equipo (excluyendo ALL_TEAMS_AVG) ---
-        avg_only = df_final[
-            (df_final["match_id"] == "AVG") & (df_final["team_name"] != "ALL_TEAMS_AVG")
-        ].copy()
-
-        # --- Crear columna de ranking según Goal Performance Index (descendente) ---
-        avg_only["Rank (avg)"] = avg_only["Goal Performance Index"].rank(ascending=False, method="min").astype(int)
-
-        # --- Ordenar por ranking ---
-        ranking_avg = avg_only.sort_values(by="Rank (avg)").reset_index(drop=True)
-
-        # --- Obtener valor máximo de jornadas jugadas ---
-        max_jornada = df_final[df_final["match_id"] != "AVG"]["match_week"].max()
-
-        # --- Crear columna 'match_week' con ese valor constante ---
-        ranking_avg["match_week"] = max_jornada
-
-        # --- Renombrar columnas (quitar '(norm)') ---
-        ranking_avg = ranking_avg.rename(columns={
-            "Goal Performance Index": "Goal Performance Index",
-            "Goal Envolvement Index (norm)": "Goal Envolvement Index",
-            "Goal Conversion Index (norm)": "Goal Conversion Index",
-            "Possession GoalChance Index (norm)": "Possession GoalChance Index"
-        })
-
-        # --- Seleccionar columnas finales ---
-        ranking_avg_display_GPI = ranking_avg[[
-            "Rank (avg)", "team_name", "team_id", "match_week",
-            "Goal Performance Index", 
-            "Goal Envolvement Index", 
-            "Goal Conversion Index",  
-            "Possession GoalChance Index"
-        ]]
-
-        ranking_avg_display_GPI.to_csv("data/df_ranking_avg_display_GPI.csv", index=False)
-        
-        excel_path = "AUDAX/sb_team_season_stats_2025.xlsx"
-        df = pd.read_excel(excel_path)
-
-        def normalize_series_min_max(s, new_min=0.5, new_max=9.5):
-            old_min = s.min()
-            old_max = s.max()
-            if old_max == old_min:
-                return pd.Series(np.full_like(s, (new_min + new_max) / 2), index=s.index)
-            normalized = (s - old_min) / (old_max - old_min)
-            scaled = normalized * (new_max - new_min) + new_min
-            return scaled
-
-        # Cálculo de eficiencias a balón parado
-        df['corner_shot_efficiency'] = df['team_season_shots_from_corners_pg'] / df['team_season_corners_pg']
-        df['corner_goal_efficiency'] = df['team_season_goals_from_corners_pg'] / df['team_season_corners_pg']
-        df['corner_xg_efficiency'] = df['team_season_corner_xg_pg'] / df['team_season_corners_pg']
-
-        df['free_kick_shot_efficiency'] = df['team_season_shots_from_free_kicks_pg'] / df['team_season_free_kicks_pg']
-        df['free_kick_goal_efficiency'] = df['team_season_goals_from_free_kicks_pg'] / df['team_season_free_kicks_pg']
-        df['free_kick_xg_efficiency'] = df['team_season_free_kick_xg_pg'] / df['team_season_free_kicks_pg']
-
-        df['dfk_goal_efficiency'] = df['team_season_direct_free_kick_goals_pg'] / df['team_season_direct_free_kicks_pg']
-        df['dfk_xg_efficiency'] = df['team_season_direct_free_kick_xg_pg'] / df['team_season_direct_free_kicks_pg']
-        df['direct_free_kick_shot_efficiency'] = df['team_season_shots_from_direct_free_kicks_pg'] / df['team_season_direct_free_kicks_pg']
-
-        df['throw_in_shot_efficiency'] = df['team_season_shots_from_throw_ins_pg'] / df['team_season_throw_ins_pg']
-        df['throw_in_goal_efficiency'] = df['team_season_goals_from_throw_ins_pg'] / df['team_season_throw_ins_pg']
-        df['throw_in_xg_efficiency'] = df['team_season_throw_in_xg_pg'] / df['team_season_throw_ins_pg']
-
-        # Subíndices ponderados
-        df['corner_subindex'] = (
-            df['corner_goal_efficiency'] * 0.15 +
-            df['corner_xg_efficiency'] * 0.10 +
-            df['corner_shot_efficiency'] * 0.10
-        )
-
-        df['free_kick_subindex'] = (
-            df['free_kick_goal_efficiency'] * 0.15 +
-            df['free_kick_xg_efficiency'] * 0.10 +
-            df['free_kick_shot_efficiency'] * 0.10
-        )
-
-        df['directfk_subindex'] = (
-            df['dfk_goal_efficiency'] * 0.10 +
-            df['dfk_xg_efficiency'] * 0.05 +
-            df['direct_free_kick_shot_efficiency'] * 0.05
-        )
-
-        df['throw_in_subindex'] = (
-            df['throw_in_goal_efficiency'] * 0.10 +
-            df['throw_in_xg_efficiency'] * 0.05 +
-            df['throw_in_shot_efficiency'] * 0.05
-        )
-
-        # Normalizar subíndices
-        df['corner_subindex_norm'] = normalize_series_min_max(df['corner_subindex'], 0.5, 9.5)
-        df['free_kick_subindex_norm'] = normalize_series_min_max(df['free_kick_subindex'], 0.5, 9.5)
-        df['directfk_subindex_norm'] = normalize_series_min_max(df['directfk_subindex'], 0.5, 9.5)
-        df['throw_in_subindex_norm'] = normalize_series_min_max(df['throw_in_subindex'], 0.5, 9.5)
-
-        # DataFrame final con columnas normalizadas
-        df_setpiece = df[['team_name', 'team_id',
-                        'corner_subindex_norm',
-                        'free_kick_subindex_norm',
-                        'directfk_subindex_norm',
-                        'throw_in_subindex_norm']].copy()
-
-        # Eliminar filas con NaNs
-        df_setpiece.dropna(inplace=True)
-
-
-        # KPI global de balón parado con pesos
-        df_setpiece['SetPiece Eficcacy Index'] = (
-            df_setpiece['corner_subindex_norm'] * 0.50 +
-            df_setpiece['free_kick_subindex_norm'] * 0.25 +
-            df_setpiece['directfk_subindex_norm'] * 0.15 +
-            df_setpiece['throw_in_subindex_norm'] * 0.10
-        )
-
-        # Eliminar (norm() de emcabezado)
-        df_setpiece.rename(columns=lambda x: x.replace('_norm', ''), inplace=True)
-
-        df_setpiece.to_csv("data/df_setpiece.csv", index=False)
-
-        # Verificar columnas
-        required_columns = [
-            "team_season_sp_goal_ratio",
-            "team_season_xg_per_sp",
-            "team_season_sp_shot_ratio",
-            "team_season_sp_goals_pg",
-            "team_season_sp_pg",
-            
-        ]
-
-        missing = [col for col in required_columns if col not in df.columns]
-        if missing:
-            raise ValueError(f"Faltan columnas necesarias: {missing}")
-
-        # Calcular volumen eficacia
-        volume_efficacy = df["team_season_sp_goals_pg"] / df["team_season_sp_pg"]
-
-        # Normalizar función
-        def normalize(s):
-            return (s - s.min()) / (s.max() - s.min())
-
-        # Normalizar variables
-        goal_conversion_norm = normalize(df["team_season_sp_goal_ratio"])
-        xg_efficiency_norm = normalize(df["team_season_xg_per_sp"])
-        shot_conversion_norm = normalize(df["team_season_sp_shot_ratio"])
-        volume_efficacy_norm = normalize(volume_efficacy)
-
-        # Calcular KPI combinado
-        df["GoalSetPiece Performance Index"] = (
-            0.35 * goal_conversion_norm +
-            0.25 * xg_efficiency_norm +
-            0.20 * shot_conversion_norm +
-            0.20 * volume_efficacy_norm
-        )* 9.5 + 0.5
-
-        # DataFrame reducido para análisis
-        df_setpiece_efficiency = df[["team_name", "team_id", "GoalSetPiece Performance Index"]].copy()
-
-        df_setpiece_efficiency  = df_setpiece.merge(
-            df_setpiece_efficiency.drop(columns=["team_name"]),
-            on='team_id',
-            how='inner'
-        )
-
-        df_setpiece_efficiency.sort_values("GoalSetPiece Performance Index", ascending=False)
-
-        df_setpiece_efficiency.to_csv("data/df_setpiece_efficiency.csv", index=False)
-
-        df_GoalKPIs = ranking_avg_display_GPI.merge(
-            df_setpiece_efficiency.drop(columns=["team_name"]),
-            on='team_id',
-            how='inner'
-        )
-
-        # --- Normalizar subíndices entre 0.5 y 9.5 ---
-        def normalize_to_range(series, new_min=0.5, new_max=9.5):
-            old_min = series.min()
-            old_max = series.max()
-            if old_max == old_min:
-                return pd.Series([new_min] * len(series), index=series.index)
-            return ((series - old_min) / (old_max - old_min)) * (new_max - new_min) + new_min
-
-        cols_to_norm = [
-            "Goal Envolvement Index",
-            "Goal Conversion Index",
-            "Possession GoalChance Index",
-            
-        ]
-        df_GoalKPIs.rename(columns={
-            "corner_subindex": "corner Efficiency",
-            "free_kick_subindex": "freekick Efficiency",
-            "directfk_subindex": "directfk Efficiency",
-            "throw_in_subindex": "throw in Efficiency"
-        }, inplace=True)
-
-        for col in cols_to_norm:
-            df_GoalKPIs[col] = normalize_to_range(df_GoalKPIs[col], 0.500, 9.500)
-
-        df_GoalKPIs.to_csv("data/df_GoalKPIs.csv", index=False)
-        
-        df = df_GoalKPIs.copy()
-
-        kpis = [
-            "Goal Performance Index", "Goal Envolvement Index",
-            "Goal Conversion Index", "Possession GoalChance Index",
-            "corner Efficiency", "freekick Efficiency",
-            "directfk Efficiency", "throw in Efficiency",
-            "SetPiece Eficcacy Index", "GoalSetPiece Performance Index"
+        progress({"step": "ingest", "status": "running"})
+        with measure("ingest", track_memory) as step:
+            df = load_match_data(input_dir)
+        report["steps"].append(step)
+        progress({"step": "ingest", "status": "done", "seconds": step["seconds"]})
+
+        tasks = [
+            {"competition": competition, "season": season, "data": part,
+             "incremental": incremental, "force": force, "track_memory": track_memory,
+             "input_dir": input_dir, "output_dir": output_dir}
+            for competition, season, part in split_partitions(df)
+            if not partitions
+            or partition_slug(competition, season) in partitions
+            or competition in partitions
         ]
+        if not tasks:
+            raise ValueError(f"No hay partidos para las particiones indicadas: {partitions or 'todas'}")
+
+        if on_progress is not None and not uses_pool(len(tasks), max_workers):
+            for task in tasks:
+                task["on_stage"] = _stage_progress(on_progress, partition_slug(task["competition"], task["season"]))
+
+        done = []
+        def on_result(result):
+            done.append(result["slug"])
+            progress({"step": "partition", "partition": result["slug"], "message": result["message"],
+                      "done": len(done), "total": len(tasks)})
+
+        progress({"step": "partition", "done": 0, "total": len(tasks)})
+        results = run_partitions(_process_partition, tasks, max_workers, on_result)
+
+        progress({"step": "publish", "status": "running"})
+        with measure("publish", track_memory) as step:
+            index = write_partition_index(results, os.path.join(output_dir, "partitions", "index.csv"))
+            _merge_benchmark_bands(results, os.path.join(output_dir, "df_benchmark_bands.csv"))
+            # La partición publicada se elige entre todas las del índice, no solo entre las de
+            # esta ejecución: procesar una temporada antigua no cambia la que muestran las páginas
+            primary = primary_partition(index.to_dict("records"))
+            processed = next((r for r in results if r["slug"] == primary["slug"]), None)
+            primary = processed or dict(primary, out_dir=os.path.join(output_dir, "partitions", primary["slug"]))
+            report["snapshot"] = _publish_snapshot(results, primary, index, output_dir)
+            if processed is not None:
+                publish_partition(primary["out_dir"], OUTPUT_FILES, output_dir)
+        report["steps"].append(step)
+        progress({"step": "publish", "status": "done", "seconds": step["seconds"], "snapshot": report["snapshot"]})
+
+    summary = "; ".join(f"{r['competition']} {r['season']}: {r['message']}" for r in results)
+    report["message"] = (
+        f"Archivos CSV generados en la carpeta {output_dir} ({len(results)} partición(es), "
+        f"publicada {primary['competition']} {primary['season']}). {summary}."
+    )
+    report["published"] = primary["slug"]
+    report["partitions"] = [{k: v for k, v in r.items() if k != "out_dir"} for r in results]
+    report["seconds"] = total["seconds"]
+    if track_memory:
+        report["peak_mb"] = total["peak_mb"]
+    return report
+
+def generate_all_csvs(incremental=False, force=False, max_workers=None):
+    """
+    Función que procesa los datos de fútbol y genera todos los DataFrames como archivos CSV
+    en el directorio 'data/'.
+
+    Los partidos se dividen por (competición, temporada) y cada partición se procesa en un
+    pool de procesos con su propia normalización. Las salidas de cada partición se escriben
+    en data/partitions/<partición>/ y las de la temporada más reciente se publican en data/.
+
+    Con incremental=True solo se procesan los partidos que no estaban en la última ejecución.
+    En el cálculo completo se saltan las etapas sin cambios, salvo con force=True.
+    """
+    try:
+        report = run_pipeline(incremental=incremental, force=force, max_workers=max_workers)
+        return True, report["message"]
 
-        # Crear DataFrame con índice y ahora columna 'team_name'
-        df_KPIs_TopValues = pd.DataFrame(
-            {
-                "team_name": ["TopValues (min)", "TopValues (max)"],
-            },
-            index=["TopValues (min)", "TopValues (max)"]
-        )
-
-        # Rellenar los valores min y max por KPI
-        for idx_label in ["TopValues (min)", "TopValues (max)"]:
-            row = {}
-            for kpi in kpis:
-                top7 = df.nlargest(7, columns=kpi)[kpi]
-                val = top7.min() if idx_label.endswith("(min)") else top7.max()
-                row[kpi] = round(val, 3)
-            df_KPIs_TopValues.loc[idx_label, kpis] = pd.Series(row)
-
-        # Asegúrate de que 'team_name' es la primera columna
-        df_KPIs_TopValues = df_KPIs_TopValues.reset_index(drop=True)
-
-
-        # 1. Eliminar la columna team_id de ambos (si está presente)
-        if "team_id" in df_GoalKPIs.columns:
-            df_GoalKPIs = df_GoalKPIs.drop(columns=["team_id"])
-        if "team_id" in df_KPIs_TopValues.columns:
-            df_KPIs_TopValues = df_KPIs_TopValues.drop(columns=["team_id"])
-
-        # 2. Asegurar que 'Rank (avg)' y 'match_week' están en df_KPIs_TopValues
-        match_week_val = df_GoalKPIs["match_week"].iloc[0]
-        df_KPIs_TopValues["match_week"] = match_week_val
-        df_KPIs_TopValues["Rank (avg)"] = 0  # o cualquier valor placeholder
-
-
-        # 3. Reordenar columnas para que coincidan con df_GoalKPIs
-        cols = df_GoalKPIs.columns.tolist()
-        # Es importante que coincidan exactamente, de lo contrario concat() rellenará con NaN :contentReference[oaicite:1]{index=1}
-        df_KPIs_TopValues = df_KPIs_TopValues[cols]
-
-        # 4. Concatenar verticalmente
-        df_GoalKPIs_TopValues= pd.concat([df_KPIs_TopValues, df_GoalKPIs], ignore_index=True).round(2)
-
-
-        df_GoalKPIs_TopValues.to_csv("data/df_GoalKPIs_TopValues.csv", index=False)
-
-        return True, "Archivos CSV generados correctamente en la carpeta AUDAX."
-        
     except Exception as e:
         return False, f"Error al generar archivos CSV: {str(e)}"
 
-# Función para ejecutar desde la aplicación principal
-def run_generation():
-    with st.spinner('Generando archivos CSV...'):
-        success, message = generate_all_csvs()
-        if success:
-            st.success(message)
-        else:
-            st.error(message)
+# -------------------------------------------
+# 📌 LÍNEA DE COMANDOS
+# -------------------------------------------
+def main(argv=None):
+    """
+    Genera los CSV sin la interfaz de Streamlit y escribe un informe JSON con el tiempo y
+    la memoria de cada etapa (stdout por defecto; los mensajes de progreso van a stderr).
+
+    Ejemplo (cron):
+        python generate_csv_files.py --incremental --report logs/generacion.json
+    """
+    parser = argparse.ArgumentParser(description="Genera los CSV de AUDAX GoalKPIs a partir de los Excel de StatsBomb.")
+    parser.add_argument("--input-dir", default=INPUT_DIR, help="Carpeta con los Excel de StatsBomb (por defecto: %(default)s)")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR, help="Carpeta de salida de los CSV (por defecto: %(default)s)")
+    parser.add_argument("--partition", action="append", dest="partitions", metavar="PARTICIÓN",
+                        help="Partición a procesar (slug o nombre de competición); se puede repetir")
+    parser.add_argument("--incremental", action="store_true", help="Procesar solo los partidos nuevos")
+    parser.add_argument("--force", action="store_true", help="Ejecutar todas las etapas aunque no hayan cambiado")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos del pool de particiones")
+    parser.add_argument("--report", default="-", help="Archivo del informe JSON ('-' = stdout)")
+    parser.add_argument("--no-memory", action="store_true", help="No medir la memoria (tracemalloc) por etapa")
+    args = parser.parse_args(argv)
+
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            report = run_pipeline(
+                incremental=args.incremental,
+                force=args.force,
+                max_workers=args.workers,
+                input_dir=args.input_dir,
+                output_dir=args.output_dir,
+                partitions=args.partitions,
+                track_memory=not args.no_memory,
+            )
+        report["success"] = True
+    except Exception as e:
+        report = {"success": False, "error": f"{type(e).__name__}: {e}"}
+
+    content = json.dumps(report, indent=2, ensure_ascii=False, default=str)
+    if args.report == "-":
+        print(content)
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(args.report)), exist_ok=True)
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(content + "\n")
+        print(report.get("message") or report.get("error"), file=sys.stderr)
+    return 0 if report["success"] else 1
 
 # Si se ejecuta directamente este script
 if __name__ == "__main__":
-    success, message = generate_csv_files()
-    print(message)
+    sys.exit(main())
@@ -1,15 +1,12 @@
 import streamlit as st
-import pandas as pd
 import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-import matplotlib.patheffects as path_effects
-import matplotlib.colors as mcolors
-import matplotlib.cm as cm
-from PIL import Image
-from mplsoccer import PyPizza
-from mplsoccer.utils import add_image
 import os
 import numpy as np
+import data_repository
+import ranking_engine
+import render_cache
+import team_charts
+from benchmark_bands import TOP_MIN, TOP_MAX
 
 def app():
     # Configuración de la página
@@ -22,36 +19,38 @@ def app():
     # -------------------------------------------
     # 📌 CARGA DE DATOS
     # -------------------------------------------
-    @st.cache_data
-    def load_data():
-        """Cargar datos desde el CSV"""
+    def load_data(competition, season):
+        """Cargar GoalKPIs (con TopValues) de una competición y temporada"""
         try:
-            # Intentar cargar desde diferentes ubicaciones posibles
-            possible_paths = [
-                "data/df_GoalKPIs_TopValues.csv",
-                "data/goal_kpis_with_top_values.csv",
-                "goal_kpis_with_top_values.csv",
-                "data/goal_kpis.csv",
-                "goal_kpis.csv",
-                "data/df_GoalKPIs.csv"
-            ]
-            
-            for path in possible_paths:
-                if os.path.exists(path):
-                    df = pd.read_csv(path)
-                    st.success(f"✅ Datos cargados desde: {path}")
-                    return df
-            
-            st.error("❌ No se encontró el archivo CSV. Asegúrate de tener los datos disponibles.")
-            return None
-            
+            return data_repository.load("goal_kpis", competition=competition, season=season)
         except Exception as e:
             st.error(f"❌ Error al cargar los datos: {str(e)}")
             return None
     
+    # Competición y temporada (por defecto, la publicada por el pipeline)
+    try:
+        partitions = data_repository.load("partitions")
+    except Exception as e:
+        st.error(f"❌ No se encontraron datos: {str(e)}")
+        st.stop()
+    options = list(zip(partitions["competition"], partitions["season"]))
+    published = partitions.index[partitions["published"] == 1]
+    competition, season = options[published[0] if len(published) else len(options) - 1]
+    if len(options) > 1:
+        competition, season = st.selectbox(
+            "Competición / temporada:",
+            options,
+            index=options.index((competition, season)),
+            format_func=lambda p: f"{p[0]} {p[1]}",
+            key="partition"
+        )
+
     # Cargar datos
     with st.spinner("📊 Cargando datos..."):
-        df = load_data()
+        df = load_data(competition, season)
+        bands_df = data_repository.load("bands", competition=competition, season=season)
+        if df is not None:
+            st.success(f"✅ Datos cargados: {competition} {season}")
     
     if df is None:
         st.stop()
@@ -65,6 +64,20 @@ def app():
     with tab1:
         st.header("🏆 Rankings Interactivos por KPI")
         
+        # Ranking a una jornada: promedios desde el acumulado por jornada (sin releer partidos)
+        ranking_df = df
+        as_of_week = None
+        weeks = data_repository.available_weeks(competition, season)
+        if len(weeks) > 1:
+            as_of_week = st.select_slider(
+                "📅 Ranking a la jornada:", options=weeks, value=weeks[-1], key="ranking_week"
+            )
+            if as_of_week != weeks[-1]:
+                cumulative = data_repository.load(
+                    "team_cumulative", match_week=as_of_week, competition=competition, season=season
+                )
+                ranking_df = ranking_engine.goal_kpis_as_of(df, cumulative)
+        
         # Mostrar información básica
         col1, col2, col3 = st.columns(3)
         
@@ -73,8 +86,8 @@ def app():
             st.metric("🏆 Total de Equipos", total_teams)
         
         with col2:
-            if 'match_week' in df.columns:
-                max_week = df[df['match_week'].notna()]['match_week'].max()
+            if 'match_week' in ranking_df.columns:
+                max_week = ranking_df[ranking_df['match_week'].notna()]['match_week'].max()
                 st.metric("📅 Jornada Actual", int(max_week) if max_week else "N/A")
         
         with col3:
@@ -94,17 +107,16 @@ def app():
             "freekick Efficiency",
             "directfk Efficiency",
             "throw in Efficiency"
-        ]
+        ] + ranking_engine.ADJUSTED_DISPLAY_KPIS
         
         for kpi in possible_kpis:
-            if kpi in df.columns:
+            if kpi in ranking_df.columns:
                 available_kpis.append(kpi)
         
         # Función para crear ranking (EXACTAMENTE tu función original)
         def plot_ranking(selected_kpi):
             # Crear copia para no modificar el original
-            # df_plot = ranking_df.copy()
-            df_plot = pd.read_csv("data/df_GoalKPIs_TopValues.csv")
+            df_plot = ranking_df.copy()
             
             # Calcular Rank dinámicamente según KPI seleccionado
             df_plot["Rank (avg)"] = df_plot[selected_kpi].rank(ascending=False, method='min').astype(int)
@@ -130,7 +142,7 @@ def app():
                 "Possession GoalChance Index",
                 "SetPiece Eficcacy Index",
                 "GoalSetPiece Performance Index"
-            ]]
+            ] + ([selected_kpi] if selected_kpi in ranking_engine.ADJUSTED_DISPLAY_KPIS else [])]
 
             # Crear tabla
             table = ax.table(
@@ -197,14 +209,14 @@ def app():
             # Generar y mostrar gráfico
             with st.spinner("📊 Generando ranking..."):
                 # fig = plot_ranking(df, selected_kpi)
-                fig = plot_ranking(selected_kpi)
-                
-                if fig:
-                    st.pyplot(fig, use_container_width=True)
-                    plt.close(fig)
+                png = render_cache.get_png(
+                    "ranking", lambda: plot_ranking(selected_kpi),
+                    competition=competition, season=season, kpi=selected_kpi, week=as_of_week
+                )
+                st.image(png, width="stretch")
             
             # Mostrar estadísticas del KPI
-            teams_df = df[~df['team_name'].str.contains('TopValues', na=False)]
+            teams_df = ranking_df[~ranking_df['team_name'].str.contains('TopValues', na=False)]
             if selected_kpi in teams_df.columns:
                 with st.expander("📊 Estadísticas del KPI seleccionado"):
                     kpi_stats = teams_df[selected_kpi].describe()
@@ -229,6 +241,20 @@ def app():
         # Selección de equipo
         team_name = st.selectbox('Selecciona equipo:', sorted(equipos), key="individual_team")
         
+        # Banda de referencia para la comparativa (sin recalcular: viene del pipeline)
+        band_options = {"TopValues (min - max)": (TOP_MIN, TOP_MAX)}
+        team_bands = None
+        if bands_df is not None and not bands_df.empty:
+            team_bands = bands_df.set_index("band")
+            k = int(team_bands["k"].iloc[0])
+            band_options = {f"Top {k} (min - max)": (TOP_MIN, TOP_MAX)}
+            for low, high, label in [("p25", "p75", "Rango intercuartil (p25 - p75)"),
+                                     ("p50", "p90", "Mediana - p90 (p50 - p90)"),
+                                     ("mean", TOP_MAX, f"Media liga - máximo Top {k}")]:
+                if low in team_bands.index and high in team_bands.index:
+                    band_options[label] = (low, high)
+        band_label = st.selectbox("Banda de referencia:", list(band_options), key="individual_band")
+        
         if st.button("🔍 Generar Análisis Completo"):
             try:
 
@@ -236,197 +262,41 @@ def app():
                 # Carpetas y rutas
                 output_dir = "AUDAX/"
                 os.makedirs(output_dir, exist_ok=True)
-                badge_path = f"Chile Primeradivision/{team_name}.png"
-                ligue_path = f"Chile Primeradivision/Liga de Primera Itaú.png"
-
-                # Columnas para visualización
-                display_cols = [
-                    "team_name",
-                    "Goal Performance Index", "Goal Envolvement Index",
-                    "Goal Conversion Index", "Possession GoalChance Index",
-                    "corner Efficiency", "freekick Efficiency",
-                    "directfk Efficiency", "throw in Efficiency",
-                    "SetPiece Eficcacy Index", "GoalSetPiece Performance Index"
-                ]
-                
-                # Filtrar solo columnas que existen
-                existing_cols = ["team_name"] + [col for col in display_cols[1:] if col in df.columns]
-                
-                # Obtener datos del equipo
-                team_data = df[df["team_name"] == team_name][existing_cols].iloc[0]
-                values = team_data[1:].astype(float).values
-                
-                # Obtener valores top
-                top_min = df[df["team_name"] == "TopValues (min)"][existing_cols[1:]].astype(float).values[0]
-                
-                # Preparar parámetros para el radar
-                params = [c.replace(" Index", "").replace(" Efficiency", "").replace(" Eficcacy", "") for c in existing_cols[1:]]
-                min_values = [0.5] * len(params)
-                max_values = [9.5] * len(params)
-                slice_colors = ["lightgreen" if values[i] < top_min[i] else "darkgreen" for i in range(len(values))]
 
-                bg_color = '#0E3F5C'
+                # Los tres gráficos se sirven desde la caché compartida (mismo equipo y
+                # datos = mismo PNG) y se exportan a AUDAX/ como hasta ahora
+                chart_params = dict(competition=competition, season=season, team=team_name)
 
                 # --------------------- 1. RADAR CHART (MEJORADO) ---------------------
-                baker = PyPizza(
-                    params=params,
-                    min_range=min_values,
-                    max_range=max_values,
-                    background_color=bg_color,
-                    straight_line_color="white",
-                    last_circle_color="white",
-                    last_circle_lw=1.5,
-                    straight_line_lw=1,
-                    other_circle_lw=0,
-                    other_circle_color="white",
-                    inner_circle_size=12,
-                )
-
-                fig1, ax = baker.make_pizza(
-                    values,
-                    figsize=(8, 8),
-                    color_blank_space="same",
-                    blank_alpha=0.3,
-                    param_location=110,
-                    slice_colors=slice_colors,
-                    kwargs_slices=dict(facecolor="lightgreen", edgecolor="lightgreen", zorder=1, linewidth=1),
-                    kwargs_params=dict(color="lightgreen", fontsize=10, va="center"),
-                    kwargs_values=dict(color="white", fontsize=12,
-                                    bbox=dict(edgecolor="lightgreen", facecolor="green",
-                                                boxstyle="round,pad=0.2", lw=1))
-                )
+                def render_radar():
+                    return team_charts.team_radar(df, team_name)
                 
-                fig1.text(0.5, 0.97, team_name, size=18, ha="center", color="white")
-                fig1.text(0.5, 0.94,
-                        "Chile - Primera División | Tactical SetPiece Profile",
-                        size=13, ha="center", color="white")
-                fig1.text(0.99, 0.005,
-                        "Data from StatsBomb | Code by @Sevi | TPAC Methodology",
-                        size=9, color="#F2F2F2", ha="right")
-                
-                # Añadir logos con posiciones mejoradas
-                if os.path.exists(badge_path):
-                    badge = Image.open(badge_path)
-                    add_image(badge, fig1, left=0.435, bottom=0.43, width=0.15, height=0.15)
-                if os.path.exists(ligue_path):
-                    ligue = Image.open(ligue_path)
-                    add_image(ligue, fig1, left=0.02, bottom=0.01, width=0.15, height=0.15)
-                
-                radar_path = f"{output_dir}{team_name}_GoalPerformance_Profile.png"
-                fig1.savefig(radar_path, dpi=300, bbox_inches='tight', facecolor=fig1.get_facecolor())
-                plt.close(fig1)
+                radar_png = render_cache.get_png("radar", render_radar, dpi=300, **chart_params)
+                radar_path = render_cache.export_png(radar_png, f"{output_dir}{team_name}_GoalPerformance_Profile.png")
 
                 # Mostrar métricas numéricas
-                # st.subheader("📋 Resumen Numérico")
-                # team_metrics = df.loc[df["team_name"] == team_name, existing_cols[1:]].iloc[0]
-                # for i, (kpi, value) in enumerate(team_metrics.items()):
-                #     if i % 2 == 0:
-                #         col_a, col_b = st.columns(2)
-                #         col_a.metric(kpi.replace(" Index", "").replace(" Efficiency", ""), f"{value:.2f}")
-                #     else:
-                #         if i < len(team_metrics) - 1:
-                #             next_kpi = list(team_metrics.items())[i][0]
-                #             next_value = list(team_metrics.items())[i][1]
-                #             col_b.metric(next_kpi.replace(" Index", "").replace(" Efficiency", ""), f"{next_value:.2f}")
                 # --------------------- 2. BOXPLOT ---------------------
-                kpi_names = existing_cols[1:]
-                if "TopValues (min)" in df["team_name"].values and "TopValues (max)" in df["team_name"].values:
-                    top_min_vals = df.loc[df["team_name"] == "TopValues (min)", kpi_names].iloc[0].astype(float)
-                    top_max_vals = df.loc[df["team_name"] == "TopValues (max)", kpi_names].iloc[0].astype(float)
-                    team_vals = df.loc[df["team_name"] == team_name, kpi_names].iloc[0].astype(float)
-                    data = [[top_min_vals[kpi], team_vals[kpi], top_max_vals[kpi]] for kpi in kpi_names]
+                kpi_names = team_charts.profile_columns(df)
+                bounds = team_charts.top_values(df)
+                if bounds is not None:
+                    top_min_vals, top_max_vals = bounds
+                    low_band, high_band = band_options[band_label]
+                    if team_bands is not None and all(kpi in team_bands.columns for kpi in kpi_names):
+                        top_min_vals = team_bands.loc[low_band, kpi_names].astype(float)
+                        top_max_vals = team_bands.loc[high_band, kpi_names].astype(float)
 
-                    def get_color(val, mn, mx):
-                        return 'lightgreen' if val < mn else 'darkgreen'
-
-                    fig2, ax = plt.subplots(figsize=(14, 10))
-                    fig2.patch.set_facecolor(bg_color)
-                    ax.set_facecolor(bg_color)
-                    ax.boxplot(data, vert=False, patch_artist=True, widths=0.6,
-                            boxprops=dict(color='white'), medianprops=dict(color='white'),
-                            whiskerprops=dict(color='white'), capprops=dict(color='white'),
-                            flierprops=dict(marker='o', color='white', alpha=0.5))
-                    
-                    for i, kpi in enumerate(kpi_names):
-                        val = team_vals[kpi]
-                        color = get_color(val, top_min_vals[kpi], top_max_vals[kpi])
-                        ax.plot(val, i+1, 'o', markersize=12, color=color, markeredgecolor='black', markeredgewidth=1.5)
-                        ax.text(val, i+1 + 0.2, f'{val:.2f}', ha='center', va='bottom', fontsize=11, color='white', fontweight='bold')
-                        ax.text(top_min_vals[kpi] - 0.3, i+1, f'{top_min_vals[kpi]:.2f}', ha='right', va='center', fontsize=9, color='white')
-                        ax.text(top_max_vals[kpi] + 0.3, i+1, f'{top_max_vals[kpi]:.2f}', ha='left', va='center', fontsize=9, color='white')
+                    def render_boxplot():
+                        return team_charts.team_boxplot(df, team_name, top_min_vals, top_max_vals, band_label)
                     
-                    ax.set_yticks(range(1, len(kpi_names)+1))
-                    ax.set_yticklabels(kpi_names, color='white', fontsize=12, fontweight='bold')
-                    ax.set_xlabel("Valor", color='white', fontsize=12)
-                    ax.tick_params(axis='x', colors='white')
-                    for side in ['top', 'right']:
-                        ax.spines[side].set_visible(False)
-                    for side in ['bottom', 'left']:
-                        ax.spines[side].set_color('white')
-                    ax.set_title(f'GoalPerformace {team_name} vs TopValues', color='white', fontsize=16, fontweight='bold')
-                    
-                    if os.path.exists(badge_path):
-                        badge = Image.open(badge_path)
-                        add_image(badge, fig2, left=0.25, bottom=0.2, width=0.65, height=0.65, alpha=0.2)
-                    
-                    boxplot_path = f"{output_dir}GoalPerformance{team_name}_vs_TopValues.png"
-                    fig2.savefig(boxplot_path, dpi=300, bbox_inches='tight', facecolor=fig2.get_facecolor())
-                    plt.close(fig2)
+                    boxplot_png = render_cache.get_png("boxplot", render_boxplot, dpi=300, band=band_label, **chart_params)
+                    boxplot_path = render_cache.export_png(boxplot_png, f"{output_dir}GoalPerformance{team_name}_vs_TopValues.png")
 
                     # --------------------- 3. PERFORMANCE BOXES ---------------------
-                    top_min = df.loc[df["team_name"] == "TopValues (min)", kpi_names].iloc[0].astype(float)
-                    top_max = df.loc[df["team_name"] == "TopValues (max)", kpi_names].iloc[0].astype(float)
-                    row = df.loc[df["team_name"] == team_name, kpi_names].iloc[0].astype(float)
-
-                    goal_perf = row.get("Goal Performance Index", 5.0)
-                    setpiece_perf = row.get("GoalSetPiece Performance Index", 5.0)
-                    below = (row < top_min).sum()
-                    improvement_pct = (below / len(kpi_names)) * 100
-                    x_perf = (row / top_max).mean() * (9.5 - 0.5) + 0.5
-
-                    metrics = [
-                        ("Goal\nPerformance", goal_perf),
-                        ("Goal SetPiece\nPerformance", setpiece_perf),
-                        ("Improvement\nArea (%)", improvement_pct),
-                        ("xPerformance\nPotential", x_perf)
-                    ]
-
-                    cmap = cm.get_cmap('Greens')
-                    norm = mcolors.Normalize(vmin=0, vmax=10)
-                    outline_effect = [path_effects.withStroke(linewidth=2, foreground='black')]
-                    spacing = 6
-                    box_width, box_height = 3.5, 1
-
-                    fig3, ax = plt.subplots(figsize=(20, 5))
-                    fig3.patch.set_facecolor(bg_color)
-                    ax.set_facecolor(bg_color)
-                    
-                    for i, (label, val) in enumerate(metrics):
-                        x0 = i * spacing
-                        color = cmap(norm(val))
-                        box = patches.FancyBboxPatch((x0, 0.5), width=box_width, height=box_height,
-                                                boxstyle="round,pad=0.2", edgecolor='black', facecolor=color)
-                        ax.add_patch(box)
-                        ax.text(x0 + box_width/2, 1.3, label, ha='center', va='center',
-                                fontsize=18, fontweight='bold', color='white', path_effects=outline_effect)
-                        ax.text(x0 + box_width/2, 0.7, f"{val:.2f}", ha='center', va='center',
-                                fontsize=35, fontweight='bold', color='white', path_effects=outline_effect)
-                    
-                    ax.set_xlim(-2.5, spacing * len(metrics))
-                    ax.set_ylim(0, 2.5)
-                    ax.axis('off')
-                    ax.set_title(f"{team_name}\nAdvanced Performance Keys", color='lightgray', fontsize=30, fontweight='bold', pad=3)
-                    
-                    if os.path.exists(badge_path):
-                        badge = Image.open(badge_path)
-                        add_image(badge, fig3, left=0.12, bottom=0.75, width=0.25, height=0.25, alpha=0.8)
-                    if os.path.exists(ligue_path):
-                        ligue = Image.open(ligue_path)
-                        add_image(ligue, fig3, left=0.65, bottom=0.73, width=0.25, height=0.25)
+                    def render_profile():
+                        return team_charts.team_profile(df, team_name)
                     
-                    box_path = f"{output_dir}GoalPerformance_{team_name}_Advanced_Indexes.png"
-                    fig3.savefig(box_path, dpi=300, bbox_inches='tight', facecolor=fig3.get_facecolor())
-                    plt.close(fig3)
+                    box_png = render_cache.get_png("profile", render_profile, dpi=300, **chart_params)
+                    box_path = render_cache.export_png(box_png, f"{output_dir}GoalPerformance_{team_name}_Advanced_Indexes.png")
 
                     # --------------------- MOSTRAR RESULTADOS ---------------------
                     st.success("✅ Análisis generado exitosamente!")
@@ -435,19 +305,16 @@ def app():
                     
                     with col1:
                         st.subheader("🎯 Perfil de Goal Performance")
-                        if os.path.exists(radar_path):
-                            st.image(radar_path)
+                        st.image(radar_png)
                         
                         
                     
                     with col2:
                         st.subheader("📈 Índices Avanzados")
-                        if os.path.exists(box_path):
-                            st.image(box_path)
+                        st.image(box_png)
                         
                         st.subheader("📊 Comparativa vs TopValues")
-                        if os.path.exists(boxplot_path):
-                            st.image(boxplot_path)
+                        st.image(boxplot_png)
                 else:
                     st.warning("⚠️ No se encontraron valores TopValues para comparación")
                     
@@ -2,14 +2,21 @@ import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
-import os
+import data_repository
+import render_cache
+import ranking_engine
+from bootstrap_ci import BOOTSTRAP_KPIS, BOOTSTRAP_RESAMPLES, CI_LEVEL
+from form_state import FORM_KPIS, FORM_TYPES
+
+# Tamaño de la figura del ranking (pulgadas)
+RANKING_FIGSIZE = (18, 12)
 
 def app():
     st.title("Goal Performance Ranking")
     
     try:
-        # Cargar datos
-        ranking_df = pd.read_csv('AUDAX/df_GoalKPIs_TopValues.csv')
+        # Cargar datos (sin las filas TopValues)
+        ranking_df = data_repository.load("goal_kpis", include_top=False)
         
         # Lista de KPIs disponibles
         kpi_options = [
@@ -23,12 +30,28 @@ def app():
             "throw in Efficiency",
             "SetPiece Eficcacy Index",
             "GoalSetPiece Performance Index"
-        ]
+        ] + ranking_engine.ADJUSTED_DISPLAY_KPIS
+        
+        # Periodo: temporada completa o forma reciente (tabla precalculada por el pipeline)
+        periods = {"season": "Temporada completa", **FORM_TYPES}
+        period = st.radio("Periodo:", list(periods), format_func=periods.get, horizontal=True)
+        if period != "season":
+            ranking_df = data_repository.load("form", form=period)
+            kpi_options = list(FORM_KPIS)
         
-        # Filtrar equipos (excluir TopValues)
-        ranking_df = ranking_df[~ranking_df["team_name"].str.contains("TopValues")]
+        # Temporada completa hasta una jornada (acumulado por jornada del pipeline)
+        as_of_week = None
+        weeks = data_repository.available_weeks() if period == "season" else []
+        if len(weeks) > 1:
+            as_of_week = st.select_slider("Jornada:", options=weeks, value=weeks[-1])
+            if as_of_week == weeks[-1]:
+                as_of_week = None
+            else:
+                cumulative = data_repository.load("team_cumulative", match_week=as_of_week)
+                ranking_df = ranking_engine.goal_kpis_as_of(ranking_df, cumulative)
         
-        # Selector de KPI
+        # Selector de KPI (los ajustados por rival solo existen para la temporada completa)
+        kpi_options = [kpi for kpi in kpi_options if kpi in ranking_df.columns]
         selected_kpi = st.selectbox("Selecciona KPI para ranking:", kpi_options)
         
         if st.button("Generar ranking"):
@@ -46,89 +69,133 @@ def app():
             df_plot[numeric_cols] = df_plot[numeric_cols].round(3)
             
             # Seleccionar columnas a mostrar
+            extra_cols = (
+                ["SetPiece Eficcacy Index", "GoalSetPiece Performance Index"] if period == "season" else ["matches"]
+            )
             display_df = df_plot[[
                 "Rank", "team_name", 
                 "Goal Performance Index",
                 "Goal Envolvement Index",
                 "Goal Conversion Index",
-                "Possession GoalChance Index",
-                "SetPiece Eficcacy Index",
-                "GoalSetPiece Performance Index"
-            ]]
+                "Possession GoalChance Index"
+            ] + extra_cols + ([selected_kpi] if selected_kpi in ranking_engine.ADJUSTED_DISPLAY_KPIS else [])]
             
-            # Crear figura para Streamlit
-            fig, ax = plt.subplots(figsize=(18, 12))
-            ax.set_facecolor("#0E3F5C")
-            fig.patch.set_facecolor("#0E3F5C")
+            # Título
+            title = f"Ranking por {selected_kpi}"
+            if period != "season":
+                title += f" ({periods[period]})"
+            elif as_of_week is not None:
+                title += f" (jornada {as_of_week})"
             
-            # Crear tabla
-            table = ax.table(
-                cellText=display_df.values,
-                colLabels=display_df.columns,
-                cellLoc='center',
-                loc='center',
-                colColours=["#1C5D77"] * display_df.shape[1]
-            )
+            def plot_ranking():
+                # Crear figura para Streamlit
+                fig, ax = plt.subplots(figsize=RANKING_FIGSIZE)
+                ax.set_facecolor("#0E3F5C")
+                fig.patch.set_facecolor("#0E3F5C")
             
-            # Estilo de la tabla
-            table.auto_set_font_size(False)
-            table.set_fontsize(14)
+                # Crear tabla
+                table = ax.table(
+                    cellText=display_df.values,
+                    colLabels=display_df.columns,
+                    cellLoc='center',
+                    loc='center',
+                    colColours=["#1C5D77"] * display_df.shape[1]
+                )
             
-            for (row, col), cell in table.get_celld().items():
-                if row == 0:
-                    # Encabezado
-                    cell.set_fontsize(16)
-                    cell.set_text_props(weight='bold', color='white')
-                    cell.set_edgecolor("white")
-                    cell.set_facecolor("#1C5D77")
-                    cell.set_height(0.08)
-                else:
-                    # Celdas de datos
-                    col_name = display_df.columns[col]
-                    value = display_df.iloc[row - 1][col_name]
+                # Estilo de la tabla
+                table.auto_set_font_size(False)
+                table.set_fontsize(14)
+            
+                for (row, col), cell in table.get_celld().items():
+                    if row == 0:
+                        # Encabezado
+                        cell.set_fontsize(16)
+                        cell.set_text_props(weight='bold', color='white')
+                        cell.set_edgecolor("white")
+                        cell.set_facecolor("#1C5D77")
+                        cell.set_height(0.08)
+                    else:
+                        # Celdas de datos
+                        col_name = display_df.columns[col]
+                        value = display_df.iloc[row - 1][col_name]
                     
-                    cell.set_text_props(color='white')
-                    cell.set_edgecolor("white")
-                    cell.set_facecolor("#0E3F5C")
-                    cell.set_height(0.1)
+                        cell.set_text_props(color='white')
+                        cell.set_edgecolor("white")
+                        cell.set_facecolor("#0E3F5C")
+                        cell.set_height(0.1)
                     
-                    # Resaltar KPI seleccionado
-                    if col_name == selected_kpi:
-                        if isinstance(value, (int, float)):
-                            if value >= 7:
-                                cell.set_facecolor("darkgreen")
-                            elif value >= 6.5:
-                                cell.set_facecolor("forestgreen")
-                            elif value >= 6:
-                                cell.set_facecolor("seagreen")
-                            else:
-                                cell.set_facecolor("mediumseagreen")
+                        # Resaltar KPI seleccionado
+                        if col_name == selected_kpi:
+                            if isinstance(value, (int, float, np.number)):
+                                if value >= 7:
+                                    cell.set_facecolor("darkgreen")
+                                elif value >= 6.5:
+                                    cell.set_facecolor("forestgreen")
+                                elif value >= 6:
+                                    cell.set_facecolor("seagreen")
+                                else:
+                                    cell.set_facecolor("mediumseagreen")
                 
-                # Ajustar anchos
-                col_name = display_df.columns[col]
-                if col_name in ["Rank"]:
-                    cell.set_width(0.18)
-                else:
-                    cell.set_width(0.45)
-            
-            ax.axis("off")
+                    # Ajustar anchos
+                    col_name = display_df.columns[col]
+                    if col_name in ["Rank"]:
+                        cell.set_width(0.18)
+                    else:
+                        cell.set_width(0.45)
             
-            # Título
-            plt.title(f"Ranking por {selected_kpi}", color="white", fontsize=20, pad=20)
+                ax.axis("off")
+                ax.set_title(title, color="white", fontsize=20, pad=20)
+                return fig
             
-            # Guardar y mostrar la figura
-            ranking_path = f"AUDAX/Ranking_{selected_kpi.replace(' ', '_')}.png"
-            plt.savefig(ranking_path, dpi=300, bbox_inches='tight', facecolor=fig.get_facecolor())
+            # PNG en memoria compartido por las sesiones (render_cache): resolución de pantalla
+            # para mostrarlo y 300 dpi solo si se pide la exportación
+            chart_params = dict(kpi=selected_kpi, period=period, week=as_of_week)
+            png = render_cache.get_png(
+                "ranking_page", plot_ranking, dpi=render_cache.screen_dpi(RANKING_FIGSIZE[0]), **chart_params
+            )
+            st.image(png, width="stretch")
+            suffix = "" if period == "season" else f"_{period}"
+            if as_of_week is not None:
+                suffix += f"_J{as_of_week}"
+            st.download_button(
+                "⬇️ Exportar en alta resolución (300 dpi)",
+                data=lambda: render_cache.get_png(
+                    "ranking_page", plot_ranking, dpi=render_cache.EXPORT_DPI, **chart_params
+                ),
+                file_name=f"Ranking_{selected_kpi.replace(' ', '_')}{suffix}.png",
+                mime="image/png",
+                on_click="ignore",
+            )
             
-            st.image(ranking_path)
+            # Incertidumbre de la temporada completa: intervalo del rango y posiciones que
+            # no se distinguen del equipo siguiente (bootstrap precalculado por el pipeline)
+            table_df = display_df
+            if period == "season" and as_of_week is None and selected_kpi in BOOTSTRAP_KPIS:
+                try:
+                    ci = data_repository.load("team_ci", kpi=selected_kpi)
+                except Exception:
+                    ci = None
+                if ci is not None and not ci.empty:
+                    rank_label = f"Rango IC {CI_LEVEL:.0%}"
+                    ci = ci.assign(team_name=ci["team_name"].astype(str))
+                    ci[rank_label] = ci["rank_low"].astype(str) + "–" + ci["rank_high"].astype(str)
+                    ci["≈ siguiente"] = ci["p_above_next"] < CI_LEVEL
+                    table_df = display_df.assign(team_name=display_df["team_name"].astype(str)).merge(
+                        ci[["team_name", rank_label, "≈ siguiente"]], on="team_name", how="left"
+                    )
             
             # Mostrar también como tabla interactiva
             st.subheader("Tabla de Ranking")
+            if table_df is not display_df:
+                st.caption(
+                    f"≈ siguiente: la diferencia con el equipo de la fila siguiente no es significativa "
+                    f"({CI_LEVEL:.0%}, bootstrap con {BOOTSTRAP_RESAMPLES} remuestreos por equipo)."
+                )
             st.dataframe(
-                display_df,
+                table_df,
                 column_config={
                     "Rank": st.column_config.NumberColumn(format="%d"),
-                    selected_kpi: st.column_config.NumberColumn(format="%.3f", background="greens")
+                    selected_kpi: st.column_config.NumberColumn(format="%.3f")
                 },
                 hide_index=True,
                 use_container_width=True
@@ -136,4 +203,4 @@ def app():
             
     except Exception as e:
         st.error(f"Error al cargar los datos: {e}")
-        st.info("Asegúrate de que el archivo 'AUDAX/df_GoalKPIs_TopValues.csv' exista y tenga el formato correcto.")
+        st.info("Asegúrate de haber generado los datos (botón 'Generar archivos CSV' o generate_csv_files.py).")
@@ -0,0 +1,182 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from kpi_registry import MATCH_KPIS
+
+# Carpeta donde se guarda el estado del modo incremental
+STATE_DIR = os.path.join("data", "incremental")
+CUMULATIVE_FILE = "team_cumulative.csv"
+HASH_FILE = "match_hashes.csv"
+
+TEAM_KEYS = ["team_name", "team_id"]
+
+# KPIs por partido antes de normalizar (se guardan para poder re-escalar)
+RAW_KPI_COLUMNS = MATCH_KPIS
+
+# Columnas que se promedian por equipo (filas "AVG" de df_final)
+AVG_COLUMNS = [
+    "np_xg", "np_shots", "obv_shot", "xgchain", "goals",
+    "Goal Envolvement Index (norm)",
+    "Goal Conversion Index (norm)",
+    "Possession GoalChance Index (norm)",
+    "Goal Performance Index"
+]
+
+
+def compute_team_sums(df):
+    """Sumas acumuladas y número de partidos por equipo para las columnas promediadas"""
+    grouped = df.groupby(TEAM_KEYS)
+    sums = grouped[AVG_COLUMNS].sum()
+    sums["n_matches"] = grouped.size()
+    return sums.reset_index()
+
+
+def add_team_sums(sums, delta):
+    """Añade a `sums` los acumulados de los partidos nuevos (`delta`)"""
+    return (
+        pd.concat([sums, delta], ignore_index=True)
+        .groupby(TEAM_KEYS, as_index=False)[AVG_COLUMNS + ["n_matches"]]
+        .sum()
+    )
+
+
+def team_means(sums):
+    """Promedio por equipo a partir de sumas y conteos"""
+    means = sums[TEAM_KEYS].copy()
+    means[AVG_COLUMNS] = sums[AVG_COLUMNS].div(sums["n_matches"], axis=0)
+    return means
+
+
+def _weekly_sums(matches):
+    """Sumas y partidos por equipo y jornada (sin acumular)"""
+    rows = matches.dropna(subset=["match_week"])
+    grouped = rows.groupby(TEAM_KEYS + ["match_week"])
+    weekly = grouped[AVG_COLUMNS].sum()
+    weekly["n_matches"] = grouped.size()
+    return weekly.reset_index()
+
+
+def weekly_cumulative(matches, previous=None):
+    """
+    Sumas y partidos acumulados por equipo al final de cada jornada (prefijos por jornada).
+
+    Con `previous` (el acumulado de una ejecución anterior) solo se suman los partidos
+    nuevos: el coste es O(equipos x jornadas) y no depende del número de partidos ya
+    procesados. Las jornadas se ordenan por número, así que también admite partidos
+    aplazados de jornadas anteriores.
+
+    Retorna:
+    - DataFrame con team_name, team_id, match_week, n_matches y las sumas de AVG_COLUMNS
+    """
+    delta = _weekly_sums(matches)
+    columns = AVG_COLUMNS + ["n_matches"]
+    frames = [delta] if previous is None else [previous, delta]
+
+    teams = pd.concat([f[TEAM_KEYS] for f in frames]).drop_duplicates("team_id")
+    weeks = np.sort(pd.concat([f["match_week"] for f in frames]).unique())
+    index = pd.MultiIndex.from_product([teams["team_id"], weeks], names=["team_id", "match_week"])
+
+    # Incremento de los partidos nuevos, acumulado por equipo
+    added = delta.set_index(["team_id", "match_week"])[columns].reindex(index, fill_value=0)
+    cumulative = added.groupby(level="team_id").cumsum()
+
+    if previous is not None:
+        # El acumulado anterior se arrastra a las jornadas sin partidos de ese equipo
+        carried = previous.set_index(["team_id", "match_week"])[columns].reindex(index)
+        carried = carried.groupby(level="team_id").ffill().fillna(0)
+        cumulative = cumulative + carried
+
+    cumulative = cumulative.reset_index()
+    cumulative["n_matches"] = cumulative["n_matches"].astype(int)
+    cumulative = cumulative.merge(teams, on="team_id", how="left")
+    return cumulative[TEAM_KEYS + ["match_week", "n_matches"] + AVG_COLUMNS]
+
+
+def match_hashes(df):
+    """
+    Hash del contenido de las filas de entrada de cada partido.
+
+    No depende del orden de las filas ni de las columnas, así que solo cambia si se edita,
+    añade o quita alguna fila del partido.
+
+    Retorna:
+    - DataFrame con match_id y hash (texto)
+    """
+    rows = pd.util.hash_pandas_object(df[sorted(df.columns)], index=False)
+    # La suma de uint64 desborda de forma determinista, que es lo que se busca
+    hashes = rows.groupby(df["match_id"].to_numpy()).sum()
+    return pd.DataFrame({"match_id": hashes.index, "hash": hashes.to_numpy().astype(str)})
+
+
+def changed_matches(stored, current):
+    """
+    match_id guardados que ya no coinciden con la entrada actual (editados o desaparecidos).
+
+    Parámetros:
+    - stored: Hashes guardados con el estado (match_hashes de la ejecución anterior)
+    - current: Hashes de la entrada actual
+    """
+    merged = stored.merge(current, on="match_id", how="left", suffixes=("", "_new"))
+    return merged.loc[merged["hash"] != merged["hash_new"], "match_id"].tolist()
+
+
+def load_state(state_dir=STATE_DIR):
+    """
+    Carga el estado guardado por la última ejecución.
+
+    Retorna:
+    - dict con 'matches' (filas por partido con KPIs brutos y normalizados),
+      'sums' (acumulados por equipo), 'kpi_min', 'kpi_max', 'max_week' y
+      'kpi_signature' (hash de las fórmulas con las que se calcularon) y 'hashes'
+      (match_hashes de la entrada, None si el estado es de una versión anterior),
+      o None si todavía no existe estado
+    """
+    meta_path = os.path.join(state_dir, "state.json")
+    if not os.path.exists(meta_path):
+        return None
+
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+
+    matches = pd.read_csv(os.path.join(state_dir, "match_kpis.csv"), float_precision="round_trip")
+    sums = pd.read_csv(os.path.join(state_dir, "team_sums.csv"), float_precision="round_trip")
+    hash_path = os.path.join(state_dir, HASH_FILE)
+    hashes = pd.read_csv(hash_path, dtype={"hash": str}) if os.path.exists(hash_path) else None
+    return {"matches": matches, "sums": sums, "hashes": hashes, **meta}
+
+
+def save_state(matches, sums, kpi_min, kpi_max, max_week, kpi_signature=None, state_dir=STATE_DIR,
+               hashes=None):
+    """Guarda filas por partido, acumulados por equipo, parámetros de escala y hashes de la entrada"""
+    os.makedirs(state_dir, exist_ok=True)
+    matches.to_csv(os.path.join(state_dir, "match_kpis.csv"), index=False)
+    sums.to_csv(os.path.join(state_dir, "team_sums.csv"), index=False)
+    hash_path = os.path.join(state_dir, HASH_FILE)
+    if hashes is not None:
+        hashes.to_csv(hash_path, index=False)
+    elif os.path.exists(hash_path):
+        os.remove(hash_path)
+
+    meta = {
+        "kpi_min": [float(v) for v in kpi_min],
+        "kpi_max": [float(v) for v in kpi_max],
+        "max_week": float(max_week),
+        "kpi_signature": kpi_signature,
+    }
+    with open(os.path.join(state_dir, "state.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+
+def load_weekly_cumulative(state_dir=STATE_DIR):
+    """Acumulado por jornada guardado (o None si no existe)"""
+    path = os.path.join(state_dir, CUMULATIVE_FILE)
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path, float_precision="round_trip")
+
+
+def save_weekly_cumulative(cumulative, state_dir=STATE_DIR):
+    """Guarda el acumulado por jornada junto al estado incremental"""
+    os.makedirs(state_dir, exist_ok=True)
+    cumulative.to_csv(os.path.join(state_dir, CUMULATIVE_FILE), index=False)
@@ -0,0 +1,180 @@
+import json
+import hashlib
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+
+def _group(columns, share, total=10):
+    """Reparte el peso `share` (sobre `total`) a partes iguales entre varias métricas"""
+    return {col: total * share / len(columns) for col in columns}
+
+
+# -------------------------------------------
+# 📌 REGISTRO DE KPIs
+# -------------------------------------------
+# Cada índice = componentes (columna -> peso) / denominador.
+# El denominador puede ser una columna, un número o None; offset se suma al
+# resultado y clip_upper lo acota.
+KPI_REGISTRY = {
+    "Goal Envolvement Index": {
+        "short": "GEI",
+        "components": {
+            **_group(["xa", "key_passes", "assists"], 0.30),  # Ocasiones directas
+            **_group(["through_balls", "passes_into_box", "passes_inside_box", "crosses_into_box"], 0.20),  # Pases incisivos
+            **_group(["box_cross_ratio"], 0.05),
+            **_group(["sp_xa", "deep_progressions", "touches_inside_box"], 0.15),  # Presencia ofensiva
+            **_group(["xgchain", "xgbuildup"], 0.10),  # Construcción de jugadas
+            **_group(["xgchain_per_possession", "xgbuildup_per_possession"], 0.10),  # Productividad por posesión
+            **_group(["obv_pass", "obv_dribble_carry"], 0.05),  # Calidad individual
+            **_group(["forward_passes"], 0.05),  # Intención ofensiva
+        },
+        "denominator": "minutes",
+    },
+    "Goal Conversion Index": {
+        "short": "GCI",
+        "components": {
+            **_group(["goals"], 0.30),
+            **_group(["np_xg"], 0.20),
+            **_group(["np_xg_per_shot"], 0.20),
+            **_group(["np_shots_on_target"], 0.10),
+            **_group(["shot_touch_ratio"], 0.10),
+            **_group(["penalties_won"], 0.05),
+            **_group(["obv_shot"], 0.05),
+        },
+        "denominator": "np_shots",
+    },
+    "Possession GoalChance Index": {
+        "short": "PGC",
+        "components": {
+            **_group(["key_passes", "assists", "xa", "xgchain"], 0.85),
+            **_group(["touches_inside_box"], 0.15),
+        },
+        "denominator": "possession",
+    },
+    # Compuesto sobre los índices ya normalizados (0.5 - 9.5)
+    "Goal Performance Index": {
+        "short": "GPI",
+        "components": {
+            "Goal Envolvement Index (norm)": 3,
+            "Goal Conversion Index (norm)": 4.5,
+            "Possession GoalChance Index (norm)": 2,
+        },
+        "denominator": 9.5,
+        "offset": 3,
+        "clip_upper": 9.75,
+    },
+    # Índice de Creación de Gol de la página principal (componentes ya normalizados)
+    "Goal Creation Index": {
+        "short": "GCrI",
+        "components": {
+            "np_xg": 0.30,
+            "xa": 0.20,
+            "deep_completions": 0.15,
+            "obv_shot": 0.15,
+            "obv_pass": 0.15,
+            "penalties_faced": 0.05,
+        },
+        "denominator": None,
+    },
+    # Índice global de balón parado sobre los subíndices normalizados
+    "SetPiece Eficcacy Index": {
+        "short": "SPE",
+        "components": {
+            "corner_subindex_norm": 0.50,
+            "free_kick_subindex_norm": 0.25,
+            "directfk_subindex_norm": 0.15,
+            "throw_in_subindex_norm": 0.10,
+        },
+        "denominator": None,
+    },
+}
+
+# Índices que se calculan por partido a partir de las estadísticas de StatsBomb
+MATCH_KPIS = ["Goal Envolvement Index", "Goal Conversion Index", "Possession GoalChance Index"]
+
+
+def get_kpi(name):
+    """Devuelve la definición de un índice del registro"""
+    if name not in KPI_REGISTRY:
+        raise KeyError(f"KPI no registrado: {name}")
+    return KPI_REGISTRY[name]
+
+
+def component_columns(names):
+    """Unión ordenada de las columnas que usan los índices indicados"""
+    columns = []
+    for name in names:
+        for col in get_kpi(name)["components"]:
+            if col not in columns:
+                columns.append(col)
+    return columns
+
+
+@lru_cache(maxsize=None)
+def _weight_matrix(names):
+    columns = component_columns(names)
+    weights = np.zeros((len(columns), len(names)))
+    for j, name in enumerate(names):
+        for col, weight in get_kpi(name)["components"].items():
+            weights[columns.index(col), j] = weight
+    return columns, weights
+
+
+def weight_matrix(names):
+    """
+    Matriz de pesos (componentes x índices) para evaluar varios índices a la vez.
+
+    Retorna:
+    - columns: Lista de columnas de componentes (filas de la matriz)
+    - weights: np.ndarray de forma (len(columns), len(names))
+    """
+    columns, weights = _weight_matrix(tuple(names))
+    return list(columns), weights.copy()
+
+
+def evaluate_kpis(df, names=None, prefix=""):
+    """
+    Evalúa varios índices del registro en una sola pasada sobre el DataFrame.
+
+    Los numeradores de todos los índices se obtienen con un único producto
+    matricial (filas x componentes) @ (componentes x índices).
+
+    Parámetros:
+    - df: DataFrame con las columnas de componentes
+    - names: Índices a evaluar (por defecto MATCH_KPIS)
+    - prefix: Prefijo de las columnas en df (p. ej. "team_match_")
+
+    Retorna:
+    - DataFrame con una columna por índice y el mismo índice que df
+    """
+    names = tuple(names or MATCH_KPIS)
+    columns, weights = _weight_matrix(names)
+
+    values = df[[prefix + col for col in columns]].to_numpy(dtype=float) @ weights
+
+    denominators = np.ones((len(df), len(names)))
+    offsets = np.zeros(len(names))
+    clip_upper = np.full(len(names), np.inf)
+    for j, name in enumerate(names):
+        kpi = get_kpi(name)
+        denominator = kpi.get("denominator")
+        if isinstance(denominator, str):
+            denominators[:, j] = df[prefix + denominator].to_numpy(dtype=float)
+        elif denominator is not None:
+            denominators[:, j] = denominator
+        offsets[j] = kpi.get("offset", 0)
+        clip_upper[j] = kpi.get("clip_upper", np.inf)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = values / denominators + offsets
+    values = np.minimum(values, clip_upper)
+
+    return pd.DataFrame(values, index=df.index, columns=list(names))
+
+
+def registry_signature(names=None):
+    """Hash de las definiciones de los índices (para detectar cambios de fórmula)"""
+    names = list(names or KPI_REGISTRY)
+    payload = json.dumps({name: get_kpi(name) for name in names}, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.linalg import splu
+
+# KPIs por partido que se ajustan por la fuerza del rival -> columna ajustada
+ADJUSTED_KPIS = {
+    "Goal Envolvement Index (norm)": "Goal Envolvement Index (adj)",
+    "Goal Conversion Index (norm)": "Goal Conversion Index (adj)",
+    "Possession GoalChance Index (norm)": "Possession GoalChance Index (adj)",
+    "Goal Performance Index": "Goal Performance Index (adj)",
+}
+
+# Penalización ridge de los efectos de ataque y defensa: con pocos partidos por equipo
+# los efectos se encogen hacia 0 (equivale a sumar ALPHA partidos "medios")
+RIDGE_ALPHA = 2.0
+
+# Cada competición y temporada tiene su propia media y sus propios efectos
+GROUP_KEYS = ["competition", "season"]
+
+
+def opponent_rows(matches):
+    """Posición de la fila del rival (la otra fila del mismo match_id) o -1 si no está"""
+    rows = matches[["match_id", "team_id"]].reset_index(drop=True).reset_index()
+    pairs = rows.merge(rows, on="match_id", suffixes=("", "_opponent"))
+    pairs = pairs[pairs["team_id"] != pairs["team_id_opponent"]].drop_duplicates("index")
+    opponent = np.full(len(rows), -1)
+    opponent[pairs["index"].to_numpy()] = pairs["index_opponent"].to_numpy()
+    return opponent
+
+
+def _solve(design, values, alpha):
+    """Resuelve (X'X + alpha I) b = X'y con una sola factorización dispersa para todas las columnas"""
+    normal = (design.T @ design + alpha * sparse.identity(design.shape[1], format="csc")).tocsc()
+    return splu(normal).solve(np.asarray(design.T @ values))
+
+
+def fit_attack_defence(values, team_idx, opp_idx, group_idx, n_teams, alpha=RIDGE_ALPHA):
+    """
+    Ajusta y = media del grupo + ataque[equipo] + defensa[rival] por mínimos cuadrados
+    con penalización ridge.
+
+    El modelo de todas las competiciones y temporadas es un único sistema disperso
+    (bloques independientes por grupo) de 2 x equipos incógnitas, así que el coste crece
+    con el número de partidos y no con el de ligas.
+
+    Parámetros:
+    - values: np.ndarray (filas x KPIs)
+    - team_idx, opp_idx: Índice (0..n_teams-1) del equipo y del rival de cada fila
+    - group_idx: Índice del grupo (competición, temporada) de cada fila
+    - n_teams: Número de equipos (cada competición y temporada por separado)
+    - alpha: Penalización ridge
+
+    Retorna:
+    - attack, defence: np.ndarray (equipos x KPIs); NaN en los KPIs sin valores
+    """
+    values = np.asarray(values, dtype=float)
+    n_rows, n_kpis = values.shape
+    attack = np.full((n_teams, n_kpis), np.nan)
+    defence = np.full((n_teams, n_kpis), np.nan)
+
+    # La media de cada grupo no se penaliza: se resta antes de ajustar
+    group_mean = pd.DataFrame(values).groupby(group_idx).transform("mean").to_numpy()
+    centered = values - group_mean
+
+    rows = np.arange(n_rows)
+    design = sparse.csr_matrix(
+        (np.ones(2 * n_rows), (np.concatenate([rows, rows]), np.concatenate([team_idx, n_teams + opp_idx]))),
+        shape=(n_rows, 2 * n_teams),
+    )
+
+    # Sin vacíos todos los KPIs comparten la matriz; si no, cada KPI usa solo sus filas con valor
+    valid = ~np.isnan(centered)
+    if valid.all():
+        solution = _solve(design, centered, alpha)
+        return solution[:n_teams], solution[n_teams:]
+    for k in range(n_kpis):
+        if valid[:, k].any():
+            solution = _solve(design[valid[:, k]], centered[valid[:, k], k], alpha)
+            attack[:, k], defence[:, k] = solution[:n_teams], solution[n_teams:]
+    return attack, defence
+
+
+def add_opponent_adjusted(matches, alpha=RIDGE_ALPHA):
+    """
+    Añade a cada partido los KPIs ajustados por rival (columnas de ADJUSTED_KPIS).
+
+    El valor ajustado es el del partido menos el efecto defensivo del rival: un partido
+    contra un rival que concede mucho cuenta menos y contra uno que concede poco, más.
+    Las filas sin rival en los datos se quedan con el valor sin ajustar.
+    """
+    matches = matches.copy()
+    kpis = list(ADJUSTED_KPIS)
+    opponent = opponent_rows(matches)
+    fitted = opponent >= 0
+
+    # Índice de equipo por (competición, temporada, team_id); el del rival sale de su fila
+    group_idx = matches.groupby(GROUP_KEYS, dropna=False, sort=False).ngroup().to_numpy()
+    team_idx = matches.groupby(GROUP_KEYS + ["team_id"], dropna=False, sort=False).ngroup().to_numpy()
+    n_teams = int(team_idx.max()) + 1 if len(team_idx) else 0
+
+    adjusted = matches[kpis].to_numpy(dtype=float).copy()
+    if fitted.any():
+        opp_idx = team_idx[opponent[fitted]]
+        _, defence = fit_attack_defence(
+            adjusted[fitted], team_idx[fitted], opp_idx, group_idx[fitted], n_teams, alpha
+        )
+        adjusted[fitted] -= np.nan_to_num(defence[opp_idx])
+    matches[list(ADJUSTED_KPIS.values())] = adjusted
+    return matches
@@ -0,0 +1,125 @@
+import os
+import re
+import shutil
+import filecmp
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+# Cada partición = una competición en una temporada
+PARTITION_KEYS = ["competition", "season"]
+
+# Carpeta con las salidas de cada partición (una subcarpeta por partición)
+PARTITIONS_DIR = os.path.join("data", "partitions")
+PARTITION_INDEX = os.path.join(PARTITIONS_DIR, "index.csv")
+
+
+def partition_slug(competition, season):
+    """Nombre de carpeta para una partición ('Chile - Primera División', 2025 -> 'chile_primera_division_2025')"""
+    text = unicodedata.normalize("NFKD", f"{competition} {season}").encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^A-Za-z0-9]+", "_", text).strip("_").lower()
+
+
+def split_partitions(df):
+    """
+    Divide las filas por partido en particiones (competición, temporada).
+
+    Retorna:
+    - Lista de tuplas (competition, season, DataFrame), ordenada por competición y temporada
+    """
+    return [
+        (competition, season, part.reset_index(drop=True))
+        for (competition, season), part in df.groupby(PARTITION_KEYS, sort=True, dropna=False)
+    ]
+
+
+def uses_pool(n_tasks, max_workers=None):
+    """Indica si run_partitions usará el pool de procesos (si no, se ejecuta en el propio proceso)"""
+    if max_workers is None:
+        max_workers = min(n_tasks, os.cpu_count() or 1)
+    return n_tasks > 1 and max_workers > 1
+
+
+def run_partitions(func, tasks, max_workers=None, on_result=None):
+    """
+    Ejecuta func(task) para cada partición en un pool de procesos.
+
+    Con una sola partición (o max_workers=1) se ejecuta en el propio proceso para no
+    pagar el arranque del pool. Los resultados se devuelven en el orden de `tasks`;
+    on_result(resultado), si se indica, se llama a medida que llegan.
+    """
+    if not uses_pool(len(tasks), max_workers):
+        results = map(func, tasks)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=max_workers or min(len(tasks), os.cpu_count() or 1))
+        results = pool.map(func, tasks)
+
+    collected = []
+    try:
+        for result in results:
+            collected.append(result)
+            if on_result is not None:
+                on_result(result)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return collected
+
+
+def primary_partition(results):
+    """Partición que se publica en data/: la temporada más reciente y, a igualdad, la de más partidos"""
+    return max(results, key=lambda r: (str(r["season"]), r["n_matches"]))
+
+
+def publish_partition(partition_dir, files, target_dir="data"):
+    """
+    Copia las salidas de una partición a `target_dir` (las que leen las páginas).
+
+    Cada archivo se copia primero a un temporal de la misma carpeta y se reemplaza con
+    os.replace, así que quien lo lea ve el archivo anterior o el nuevo, nunca uno a medias.
+    Solo se copian los archivos cuyo contenido cambió; retorna la lista de copiados.
+    """
+    copied = []
+    for name in files:
+        source = os.path.join(partition_dir, name)
+        target = os.path.join(target_dir, name)
+        if not os.path.exists(source):
+            continue
+        if os.path.exists(target) and filecmp.cmp(source, target, shallow=False):
+            continue
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        try:
+            shutil.copyfile(source, tmp_path)
+            os.replace(tmp_path, target)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        copied.append(name)
+    return copied
+
+
+def write_partition_index(results, path=PARTITION_INDEX):
+    """
+    Guarda el índice de particiones (competición, temporada, carpeta y tamaño).
+
+    Las particiones que no se procesaron en esta ejecución se conservan. La temporada se
+    guarda siempre como texto, para que las filas leídas y las nuevas se ordenen igual.
+    """
+    index = pd.DataFrame(results)[["competition", "season", "slug", "n_matches", "max_week"]]
+    index["season"] = index["season"].astype(str)
+    stored = load_partition_index(path)
+    if stored is not None:
+        index = pd.concat([stored[~stored["slug"].isin(index["slug"])], index], ignore_index=True)
+    index = index.sort_values(["competition", "season"], ignore_index=True)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    index.to_csv(path, index=False)
+    return index
+
+
+def load_partition_index(path=PARTITION_INDEX):
+    """Lee el índice de particiones (o None si todavía no existe)"""
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path, dtype={"season": str})
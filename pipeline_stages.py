@@ -0,0 +1,327 @@
+import os
+import sys
+import ast
+import json
+import time
+import pickle
+import hashlib
+import inspect
+import tracemalloc
+import contextlib
+import pandas as pd
+
+# Carpeta donde se guardan los resultados intermedios de cada etapa
+STAGE_DIR = os.path.join("data", ".pipeline")
+MANIFEST_FILE = "manifest.json"
+
+
+# -------------------------------------------
+# 📌 HASH DE CONTENIDO
+# -------------------------------------------
+def content_hash(obj):
+    """Hash del contenido de un artefacto (DataFrame, dict, lista o escalar)"""
+    h = hashlib.sha1()
+    if isinstance(obj, pd.DataFrame):
+        h.update(repr(list(obj.columns)).encode("utf-8"))
+        h.update(repr([str(t) for t in obj.dtypes]).encode("utf-8"))
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    else:
+        h.update(json.dumps(obj, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+def file_hash(path):
+    """Hash del contenido de un archivo de entrada"""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _code_names(code):
+    """Nombres globales que usa un objeto de código (incluidas lambdas y funciones internas)"""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _code_names(const)
+    return names
+
+
+def _project_module(value, root):
+    """Módulo del proyecto (archivo en `root`) al que pertenece un valor, o None"""
+    module = value if inspect.ismodule(value) else sys.modules.get(getattr(value, "__module__", None) or "")
+    path = getattr(module, "__file__", None)
+    if path and os.path.dirname(os.path.abspath(path)) == root:
+        return module
+    return None
+
+
+def _imported_modules(path):
+    """Módulos del proyecto (en la misma carpeta) que importa un archivo, con su ruta"""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    names = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.append(node.module)
+    root = os.path.dirname(os.path.abspath(path))
+    imported = {}
+    for name in names:
+        module_path = os.path.join(root, name.split(".")[0] + ".py")
+        if os.path.exists(module_path):
+            imported[name.split(".")[0]] = module_path
+    return imported
+
+
+def code_dependencies(functions):
+    """
+    Código del que dependen las funciones de una etapa.
+
+    Se siguen los nombres globales que usa cada función: las del módulo de la primera
+    función (el de la etapa) se recorren una a una (su código fuente) y los módulos
+    auxiliares del proyecto (kpi_registry, ranking_engine...) entran completos, junto con
+    los que importan (también dentro de funciones).
+
+    Retorna:
+    - sources: dict nombre calificado -> código fuente de las funciones
+    - constants: dict nombre -> valor de las constantes simples que usan esas funciones
+    - modules: dict nombre de módulo -> ruta del archivo de los módulos auxiliares
+    """
+    sources, constants, modules = {}, {}, {}
+    stack = list(functions)
+    module_stack = []
+    main_module = functions[0].__module__ if functions else None
+    while stack:
+        func = stack.pop()
+        name = f"{func.__module__}.{func.__qualname__}"
+        if name in sources:
+            continue
+        if func.__module__ != main_module:
+            # Función de un módulo auxiliar: entra el módulo completo
+            module = _project_module(func, os.path.dirname(os.path.abspath(inspect.getsourcefile(func))))
+            if module is not None:
+                module_stack.append((module.__name__, module.__file__))
+                continue
+        sources[name] = inspect.getsource(func)
+        root = os.path.dirname(os.path.abspath(inspect.getsourcefile(func)))
+        for global_name in _code_names(func.__code__):
+            if global_name not in func.__globals__:
+                continue
+            value = func.__globals__[global_name]
+            if inspect.isfunction(value) and value.__module__ == func.__module__:
+                stack.append(value)
+            elif isinstance(value, (str, int, float, bool, list, tuple, dict)):
+                constants[f"{func.__module__}.{global_name}"] = value
+            else:
+                module = _project_module(value, root)
+                if module is not None and module.__name__ != func.__module__:
+                    module_stack.append((module.__name__, module.__file__))
+
+    while module_stack:
+        name, path = module_stack.pop()
+        if name in modules:
+            continue
+        modules[name] = path
+        module_stack.extend(_imported_modules(path).items())
+    return sources, constants, modules
+
+
+def code_hash(functions):
+    """
+    Hash del código de una etapa: fuente de sus funciones (y de las del mismo módulo que
+    llaman), constantes que usan y contenido de los módulos auxiliares del proyecto.
+    """
+    sources, constants, modules = code_dependencies(functions)
+    payload = {
+        "sources": sources,
+        "constants": constants,
+        "modules": {name: file_hash(path) for name, path in modules.items()},
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def stage(name, func, inputs=(), outputs=(), files=(), writes=(), code=(), params=None):
+    """
+    Declara una etapa del pipeline.
+
+    Parámetros:
+    - name: Nombre de la etapa
+    - func: Función que recibe los artefactos de `inputs` como argumentos con nombre
+      y devuelve un dict con los artefactos de `outputs`
+    - inputs: Artefactos que produce otra etapa anterior
+    - outputs: Artefactos que produce esta etapa
+    - files: Archivos de entrada cuyo contenido forma parte de la clave
+    - writes: Archivos que escribe la etapa (si faltan, la etapa se vuelve a ejecutar)
+    - code: Funciones cuyo código forma parte de la clave (fórmulas, pesos...); también
+      cuentan los módulos auxiliares del proyecto que usan (ver code_dependencies)
+    - params: Configuración adicional (serializable a JSON) que forma parte de la clave
+    """
+    return {
+        "name": name,
+        "func": func,
+        "inputs": list(inputs),
+        "outputs": list(outputs),
+        "files": list(files),
+        "writes": list(writes),
+        "code": [func] + list(code),
+        "params": params or {},
+    }
+
+
+# -------------------------------------------
+# 📌 MEDICIÓN (tiempo y memoria)
+# -------------------------------------------
+# Pico de memoria de cada medición abierta (de la más externa a la más interna)
+_open_peaks = []
+
+
+def _record_peak():
+    peak = tracemalloc.get_traced_memory()[1]
+    for i, value in enumerate(_open_peaks):
+        _open_peaks[i] = max(value, peak)
+
+
+@contextlib.contextmanager
+def measure(name, track_memory=False):
+    """
+    Mide el tiempo y, con track_memory=True, el pico de memoria (tracemalloc) de un bloque.
+
+    Uso:
+        with measure("ingest", track_memory=True) as step:
+            ...
+        step -> {'stage': 'ingest', 'seconds': 0.12, 'peak_mb': 35.4}
+    """
+    step = {"stage": name}
+    started_tracing = False
+    if track_memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracing = True
+        # reset_peak() es global: se guarda antes el pico de las mediciones que contienen a esta
+        _record_peak()
+        tracemalloc.reset_peak()
+        _open_peaks.append(0)
+    start = time.perf_counter()
+    try:
+        yield step
+    finally:
+        step["seconds"] = round(time.perf_counter() - start, 4)
+        if track_memory:
+            _record_peak()
+            step["peak_mb"] = round(_open_peaks.pop() / 2**20, 2)
+            if started_tracing:
+                tracemalloc.stop()
+
+
+# -------------------------------------------
+# 📌 EJECUCIÓN
+# -------------------------------------------
+def _load_manifest(stage_dir):
+    path = os.path.join(stage_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_manifest(manifest, stage_dir):
+    path = os.path.join(stage_dir, MANIFEST_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _artifact_path(stage_dir, name):
+    return os.path.join(stage_dir, f"{name}.pkl")
+
+
+def _stage_key(spec, artifact_hashes):
+    """Clave de una etapa: código + parámetros + contenido de sus entradas"""
+    payload = {
+        "code": code_hash(spec["code"]),
+        "params": spec["params"],
+        "inputs": {name: artifact_hashes[name] for name in spec["inputs"]},
+        "files": {path: file_hash(path) for path in spec["files"]},
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _is_fresh(spec, entry, key, stage_dir):
+    if not entry or entry.get("key") != key:
+        return False
+    if any(not os.path.exists(_artifact_path(stage_dir, name)) for name in spec["outputs"]):
+        return False
+    return all(os.path.exists(path) for path in spec["writes"])
+
+
+def run_stages(stages, stage_dir=STAGE_DIR, artifacts=None, force=False, on_stage=None, track_memory=False):
+    """
+    Ejecuta las etapas en orden, saltando las que no cambiaron.
+
+    Una etapa se salta cuando su código, sus parámetros y el hash de contenido de
+    todas sus entradas coinciden con la última ejecución. Sus artefactos se leen
+    del disco solo si alguna etapa posterior los necesita.
+
+    Parámetros:
+    - stages: Lista de etapas declaradas con stage()
+    - stage_dir: Carpeta de artefactos intermedios y manifiesto
+    - artifacts: Artefactos iniciales (nombre -> valor) que pueden usar las etapas como entrada
+    - force: Si es True, ejecuta todas las etapas
+    - on_stage: Callback opcional on_stage(nombre, estado, segundos)
+    - track_memory: Si es True, mide además el pico de memoria de cada etapa ('peak_mb')
+
+    Retorna:
+    - Lista de dicts con 'stage', 'status' ('ran' o 'skipped'), 'seconds' y opcionalmente 'peak_mb'
+    """
+    os.makedirs(stage_dir, exist_ok=True)
+    manifest = _load_manifest(stage_dir)
+    artifacts = dict(artifacts or {})
+    artifact_hashes = {name: content_hash(value) for name, value in artifacts.items()}
+    report = []
+
+    def get_artifact(name):
+        if name not in artifacts:
+            with open(_artifact_path(stage_dir, name), "rb") as f:
+                artifacts[name] = pickle.load(f)
+        return artifacts[name]
+
+    for spec in stages:
+        with measure(spec["name"], track_memory) as step:
+            key = _stage_key(spec, artifact_hashes)
+            entry = manifest.get(spec["name"])
+
+            if not force and _is_fresh(spec, entry, key, stage_dir):
+                artifact_hashes.update(entry["hashes"])
+                step["status"] = "skipped"
+            else:
+                kwargs = {name: get_artifact(name) for name in spec["inputs"]}
+                outputs = spec["func"](**kwargs)
+
+                hashes = {}
+                for name in spec["outputs"]:
+                    artifacts[name] = outputs[name]
+                    hashes[name] = content_hash(outputs[name])
+                    with open(_artifact_path(stage_dir, name), "wb") as f:
+                        pickle.dump(outputs[name], f, protocol=pickle.HIGHEST_PROTOCOL)
+
+                artifact_hashes.update(hashes)
+                manifest[spec["name"]] = {"key": key, "hashes": hashes}
+                _save_manifest(manifest, stage_dir)
+                step["status"] = "ran"
+
+        report.append(step)
+        if on_stage is not None:
+            on_stage(spec["name"], step["status"], step["seconds"])
+
+    return report
+
+
+def clear_stages(stage_dir=STAGE_DIR):
+    """Invalida todas las etapas (la próxima ejecución las recalcula)"""
+    path = os.path.join(stage_dir, MANIFEST_FILE)
+    if os.path.exists(path):
+        os.remove(path)
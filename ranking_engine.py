@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+from kpi_registry import get_kpi
+from benchmark_bands import DEFAULT_TOP_K, TOP_MIN, TOP_MAX, compute_bands
+
+# Rankings que genera el pipeline: sufijo del archivo -> KPI del registro
+DEFAULT_RANKINGS = {
+    "GCI": "Goal Conversion Index",
+    "GEI": "Goal Envolvement Index",
+    "PGI": "Possession GoalChance Index",
+    "GPI": "Goal Performance Index",
+}
+
+# Columnas KPI que acompañan a cada ranking
+DISPLAY_KPIS = [
+    "Goal Performance Index",
+    "Goal Envolvement Index",
+    "Goal Conversion Index",
+    "Possession GoalChance Index"
+]
+
+# Los mismos KPIs ajustados por la fuerza del rival (opponent_adjustment.py)
+ADJUSTED_DISPLAY_KPIS = [kpi + " (adj)" for kpi in DISPLAY_KPIS]
+
+# KPIs de los rankings -> columna del acumulado por jornada (df_team_cumulative)
+AS_OF_KPIS = {
+    "Goal Performance Index": "Goal Performance Index",
+    "Goal Envolvement Index": "Goal Envolvement Index (norm)",
+    "Goal Conversion Index": "Goal Conversion Index (norm)",
+    "Possession GoalChance Index": "Possession GoalChance Index (norm)",
+}
+
+# Subíndices que df_GoalKPIs vuelve a escalar entre 0.5 y 9.5 sobre los equipos de la liga
+RESCALED_KPIS = ["Goal Envolvement Index", "Goal Conversion Index", "Possession GoalChance Index"]
+
+
+def rank_descending(values):
+    """
+    Ranking descendente con un único argsort (empates con el rango mínimo).
+
+    Parámetros:
+    - values: np.ndarray 1D con los valores del KPI
+
+    Retorna:
+    - order: Posiciones de las filas ordenadas de mayor a menor
+    - ranks: Rango (1 = mejor) de cada fila en ese mismo orden
+    """
+    order = np.argsort(-values, kind="stable")
+    sorted_values = values[order]
+    is_new = np.ones(len(values), dtype=bool)
+    is_new[1:] = sorted_values[1:] != sorted_values[:-1]
+    ranks = np.maximum.accumulate(np.where(is_new, np.arange(len(values)), 0)) + 1
+    return order, ranks
+
+
+def build_rankings(team_avg, rankings=None, match_week=None, display_kpis=DISPLAY_KPIS,
+                   rank_column="Rank (avg)"):
+    """
+    Genera varios rankings a partir de la matriz de promedios por equipo.
+
+    Parámetros:
+    - team_avg: DataFrame con una fila por equipo ('team_name', 'team_id' y columnas KPI)
+    - rankings: dict sufijo -> KPI del registro (por defecto DEFAULT_RANKINGS)
+    - match_week: Jornada que se muestra en la columna 'match_week'
+    - display_kpis: Columnas KPI que se incluyen en cada ranking
+
+    Retorna:
+    - dict sufijo -> DataFrame del ranking ordenado
+    """
+    rankings = rankings or DEFAULT_RANKINGS
+    kpi_columns = list(display_kpis)
+    for kpi in rankings.values():
+        get_kpi(kpi)
+        if kpi not in kpi_columns:
+            kpi_columns.append(kpi)
+
+    missing = [col for col in kpi_columns if col not in team_avg.columns]
+    if missing:
+        raise ValueError(f"Faltan columnas KPI para el ranking: {missing}")
+
+    # Matriz de promedios (equipos x KPIs) extraída una sola vez
+    team_avg = team_avg.reset_index(drop=True)
+    values = team_avg[kpi_columns].to_numpy(dtype=float)
+    base = team_avg[["team_name", "team_id"]].copy()
+    base["match_week"] = match_week
+    base[kpi_columns] = values
+
+    output_columns = [rank_column, "team_name", "team_id", "match_week"] + list(display_kpis)
+    result = {}
+    for suffix, kpi in rankings.items():
+        order, ranks = rank_descending(values[:, kpi_columns.index(kpi)])
+        ranking = base.iloc[order].reset_index(drop=True)
+        ranking.insert(0, rank_column, ranks)
+        columns = output_columns if kpi in display_kpis else output_columns + [kpi]
+        result[suffix] = ranking[columns]
+    return result
+
+
+# -------------------------------------------
+# 📌 RANKINGS A UNA JORNADA
+# -------------------------------------------
+def _rescale(values, new_min=0.5, new_max=9.5):
+    old_min, old_max = np.nanmin(values), np.nanmax(values)
+    if old_max == old_min:
+        return np.full(len(values), new_min)
+    return (values - old_min) / (old_max - old_min) * (new_max - new_min) + new_min
+
+
+def team_kpis_as_of(cumulative):
+    """
+    Promedios por equipo hasta una jornada a partir de las filas del acumulado de esa
+    jornada (una por equipo): O(equipos), sin volver a leer los partidos.
+
+    Retorna:
+    - DataFrame con team_name, team_id, match_week, n_matches y los KPIs de AS_OF_KPIS
+    """
+    kpis = cumulative[["team_name", "team_id", "match_week", "n_matches"]].reset_index(drop=True)
+    sums = cumulative[list(AS_OF_KPIS.values())].to_numpy(dtype=float)
+    n = cumulative["n_matches"].to_numpy(dtype=float)[:, None]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        kpis[list(AS_OF_KPIS)] = np.where(n > 0, sums / n, np.nan)
+    return kpis
+
+
+def goal_kpis_as_of(goal_kpis, cumulative, k=DEFAULT_TOP_K):
+    """
+    df_GoalKPIs_TopValues tal como estaba al final de una jornada.
+
+    Los KPIs por partido de AS_OF_KPIS se sustituyen por los promedios hasta esa jornada
+    (con el mismo re-escalado que df_GoalKPIs) y las filas TopValues se recalculan con el
+    top-k de esos valores. Los índices de balón parado son de temporada y no cambian; los
+    KPIs ajustados por rival se quitan porque su ajuste usa todos los partidos.
+
+    Parámetros:
+    - goal_kpis: Tabla GoalKPIs con sus filas TopValues
+    - cumulative: Filas del acumulado de la jornada (data_store.get_team_cumulative)
+    - k: Equipos que forman la banda TopValues
+
+    Retorna:
+    - DataFrame con las mismas columnas que goal_kpis
+    """
+    kpis = list(AS_OF_KPIS)
+    columns = [col for col in goal_kpis.columns if col not in ADJUSTED_DISPLAY_KPIS]
+    goal_kpis = goal_kpis.assign(team_name=goal_kpis["team_name"].astype(str))
+    is_top = goal_kpis["team_name"].isin([TOP_MIN, TOP_MAX])
+
+    as_of = team_kpis_as_of(cumulative).assign(team_name=lambda df: df["team_name"].astype(str))
+    teams = goal_kpis[~is_top].drop(columns=kpis + ["match_week"]).merge(
+        as_of[["team_name", "match_week"] + kpis], on="team_name", how="inner"
+    )
+    for col in RESCALED_KPIS:
+        teams[col] = _rescale(teams[col].to_numpy(dtype=float))
+
+    order, ranks = rank_descending(teams["Goal Performance Index"].to_numpy(dtype=float))
+    teams = teams.iloc[order].reset_index(drop=True)
+    if "Rank (avg)" in columns:
+        teams["Rank (avg)"] = ranks
+
+    bands = compute_bands(teams[kpis].to_numpy(dtype=float), k)
+    top = goal_kpis[is_top].astype({kpi: float for kpi in kpis})
+    for band in [TOP_MIN, TOP_MAX]:
+        top.loc[top["team_name"] == band, kpis] = bands[band]
+    top["match_week"] = teams["match_week"].max() if not teams.empty else np.nan
+
+    return pd.concat([top, teams], ignore_index=True)[columns].round(2)
@@ -0,0 +1,120 @@
+import io
+import threading
+from collections import OrderedDict
+import pandas as pd
+import matplotlib.pyplot as plt
+
+import data_repository
+import data_store
+
+# Memoria máxima de las imágenes guardadas (PNG); al superarse se descartan las menos usadas
+RENDER_CACHE_MAX_BYTES = 128 * 1024 ** 2
+
+# Resolución de exportación y ancho (px) con el que se muestran los gráficos en pantalla
+EXPORT_DPI = 300
+SCREEN_WIDTH_PX = 1600
+
+# Caché compartida por todas las sesiones del proceso: clave -> PNG (orden = uso más reciente al final)
+_cache = OrderedDict()
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+_size = 0
+_lock = threading.Lock()
+
+
+def render_key(kind, snapshot=None, **params):
+    """
+    Clave de un gráfico: tipo, parámetros y datos de los que sale.
+
+    Sin `snapshot` se usa el id del snapshot publicado (data_store.snapshot_id), o la firma
+    de data/audax.db si todavía no hay snapshots: al publicarse datos nuevos las claves
+    cambian y las imágenes anteriores dejan de servirse.
+    """
+    snapshot = snapshot or data_store.snapshot_id() or data_repository.store_signature()
+    return (kind, snapshot, tuple(sorted((k, str(v)) for k, v in params.items())))
+
+
+def screen_dpi(width_inches, target_px=SCREEN_WIDTH_PX):
+    """Resolución para mostrar en pantalla una figura de `width_inches` (como mucho EXPORT_DPI)"""
+    return int(max(50, min(EXPORT_DPI, target_px / width_inches)))
+
+
+def figure_png(fig, dpi=150):
+    """Guarda una figura como PNG en memoria y la cierra"""
+    buffer = io.BytesIO()
+    try:
+        fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight", facecolor=fig.get_facecolor())
+    finally:
+        plt.close(fig)
+    return buffer.getvalue()
+
+
+def _store(key, png):
+    global _size
+    with _lock:
+        if key in _cache:
+            return
+        _cache[key] = png
+        _size += len(png)
+        # Se descartan las imágenes usadas hace más tiempo (nunca la que se acaba de guardar)
+        while _size > RENDER_CACHE_MAX_BYTES and len(_cache) > 1:
+            _, evicted = _cache.popitem(last=False)
+            _size -= len(evicted)
+            _stats["evictions"] += 1
+
+
+def get_png(kind, render, dpi=150, snapshot=None, **params):
+    """
+    Devuelve el PNG de un gráfico, dibujándolo solo si no está en la caché.
+
+    Parámetros:
+    - kind: Tipo de gráfico ('ranking', 'radar', 'boxplot'...)
+    - render: Función sin argumentos que crea y devuelve la figura de matplotlib
+    - dpi: Resolución del PNG (forma parte de la clave)
+    - snapshot: Id de los datos (por defecto la base de datos publicada)
+    - params: Parámetros que determinan el gráfico (equipo, KPI, temporada...)
+
+    Retorna:
+    - bytes del PNG
+    """
+    key = render_key(kind, snapshot, dpi=dpi, **params)
+    with _lock:
+        png = _cache.get(key)
+        if png is not None:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return png
+        _stats["misses"] += 1
+
+    png = figure_png(render(), dpi)
+    _store(key, png)
+    return png
+
+
+def cache_stats():
+    """Aciertos, fallos, descartes, imágenes, memoria (MB) y tasa de aciertos"""
+    with _lock:
+        requests = _stats["hits"] + _stats["misses"]
+        row = {
+            **_stats,
+            "entries": len(_cache),
+            "mb": round(_size / 1024 ** 2, 2),
+            "hit_ratio": round(_stats["hits"] / requests, 3) if requests else 0.0,
+        }
+    return pd.DataFrame([row])
+
+
+def clear():
+    """Vacía la caché y los contadores"""
+    global _size
+    with _lock:
+        _cache.clear()
+        _size = 0
+        for name in _stats:
+            _stats[name] = 0
+
+
+def export_png(png, path):
+    """Escribe un PNG de la caché en disco (exportaciones de AUDAX/)"""
+    with open(path, "wb") as f:
+        f.write(png)
+    return path
@@ -0,0 +1,306 @@
+import argparse
+import json
+import os
+import shutil
+import time
+import zipfile
+import matplotlib
+matplotlib.use("Agg")  # Sin ventanas: también en los procesos del pool
+from PIL import Image
+
+import data_repository
+import data_store
+import ranking_engine
+import render_cache
+import team_charts
+from partitioning import partition_slug, run_partitions
+
+# Carpeta de los paquetes de reportes (uno por competición/temporada y jornada)
+PACK_DIR = os.path.join("AUDAX", "reportes")
+
+# Resolución de las páginas de los PDF y calidad JPEG con la que Pillow las guarda
+PAGE_DPI = 150
+PDF_QUALITY = 90
+
+MANIFEST_FILE = "manifest.json"
+PAGES_DIR = "pages"
+TEAMS_PDF = "Equipos.pdf"
+
+# Páginas de cada equipo, en orden (radar, boxplot vs TopValues y tarjetas)
+TEAM_PAGES = ["radar", "boxplot", "profile"]
+
+# Datos de cada paquete ya cargados en el proceso principal: (competición, temporada, jornada) -> dict.
+# Los procesos del pool no los leen de aquí: cada tarea lleva la tabla que dibuja, así que
+# funciona igual con fork que con spawn (macOS, Windows)
+_data = {}
+
+
+def pack_name(competition, season, match_week=None):
+    """Nombre del paquete: partición y jornada (o temporada completa)"""
+    slug = partition_slug(competition, season)
+    return f"{slug}_J{int(match_week):02d}" if match_week is not None else f"{slug}_temporada"
+
+
+def pack_data(competition, season, match_week=None):
+    """
+    GoalKPIs (con TopValues) y partidos de un paquete.
+
+    Con `match_week`, los KPIs de equipo son los acumulados hasta esa jornada
+    (ranking_engine.goal_kpis_as_of) y los partidos llegan hasta ella.
+    """
+    key = (competition, season, match_week)
+    if key in _data:
+        return _data[key]
+
+    goal_kpis = data_repository.load("goal_kpis", competition=competition, season=season)
+    matches = data_repository.load("matches", competition=competition, season=season)
+    weeks = data_repository.available_weeks(competition, season)
+    if match_week is not None:
+        matches = matches[matches["match_week"] <= match_week]
+        if weeks and match_week != weeks[-1]:
+            cumulative = data_repository.load(
+                "team_cumulative", match_week=match_week, competition=competition, season=season
+            )
+            goal_kpis = ranking_engine.goal_kpis_as_of(goal_kpis, cumulative)
+
+    _data[key] = {"goal_kpis": goal_kpis, "matches": team_charts.add_percentiles(matches)}
+    return _data[key]
+
+
+def plan_pages(competition, season, match_week=None):
+    """
+    Páginas del paquete en el orden de los PDF.
+
+    - Equipos.pdf: radar, boxplot vs TopValues y tarjetas de cada equipo (por nombre)
+    - Partidos_J<nn>.pdf: la comparativa de cada partido de la jornada (una por jornada
+      en el paquete de temporada), desde el punto de vista del local
+
+    Retorna:
+    - Lista de páginas (diccionarios con el PDF, el PNG de la página y lo que se dibuja)
+    """
+    data = pack_data(competition, season, match_week)
+    goal_kpis = data["goal_kpis"]
+    teams = sorted(goal_kpis.loc[~goal_kpis["team_name"].str.contains("TopValues", na=False), "team_name"].unique())
+    base = {"competition": competition, "season": season, "match_week": match_week}
+
+    pages = []
+    for team in teams:
+        for kind in TEAM_PAGES:
+            pages.append({**base, "pdf": TEAMS_PDF, "kind": kind, "team": team})
+
+    fixtures = team_charts.match_fixtures(data["matches"], match_week)
+    for fixture in fixtures.itertuples(index=False):
+        pages.append({**base, "pdf": f"Partidos_J{fixture.match_week:02d}.pdf", "kind": "comparison",
+                      "team": fixture.local, "match_id": fixture.match_id})
+
+    for number, page in enumerate(pages, start=1):
+        name = page["team"] if page["kind"] != "comparison" else f"{page['team']}_{page['match_id']}"
+        page["file"] = f"{number:04d}_{page['kind']}_{name.replace(' ', '_')}.png"
+    return pages
+
+
+def page_data(page, data):
+    """Tabla que necesita una página: GoalKPIs para las de equipo y los partidos para la comparativa"""
+    table = "matches" if page["kind"] == "comparison" else "goal_kpis"
+    return {table: data[table]}
+
+
+def _figure(page, data):
+    """Figura de una página (`data`: ver page_data)"""
+    if page["kind"] == "comparison":
+        return team_charts.match_comparison(data["matches"], page["team"], page["match_id"])
+    goal_kpis = data["goal_kpis"]
+    if page["kind"] == "radar":
+        return team_charts.team_radar(goal_kpis, page["team"])
+    if page["kind"] == "boxplot":
+        top_min, top_max = team_charts.top_values(goal_kpis)
+        return team_charts.team_boxplot(goal_kpis, page["team"], top_min, top_max, "TopValues (min - max)")
+    return team_charts.team_profile(goal_kpis, page["team"])
+
+
+def render_page(task):
+    """
+    Dibuja una página y la escribe como PNG (se ejecuta en el pool).
+
+    El PNG se escribe en un temporal y se renombra: si la exportación se interrumpe,
+    en la carpeta solo quedan páginas completas.
+
+    Retorna:
+    - (archivo, segundos)
+    """
+    start = time.perf_counter()
+    png = render_cache.figure_png(_figure(task["page"], task["data"]), task["dpi"])
+    path = os.path.join(task["pages_dir"], task["page"]["file"])
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(png)
+    os.replace(tmp_path, path)
+    return task["page"]["file"], time.perf_counter() - start
+
+
+class _PdfStream:
+    """
+    Escribe las páginas en los PDF en el orden del plan, a medida que llegan.
+
+    Cada página se lee de su PNG y se añade al final del PDF (Pillow, append=True), así
+    que solo hay una página en memoria. Los PDF se escriben como .part y se renombran al
+    completarse.
+    """
+
+    def __init__(self, pack_dir, pages, dpi):
+        self.pack_dir = pack_dir
+        self.pages = pages
+        self.dpi = dpi
+        self.next = 0
+        self.current = None
+
+    def close(self):
+        if self.current is None:
+            return
+        os.replace(os.path.join(self.pack_dir, f"{self.current}.part"), os.path.join(self.pack_dir, self.current))
+        self.current = None
+
+    def _write(self, page):
+        part = os.path.join(self.pack_dir, f"{page['pdf']}.part")
+        if page["pdf"] != self.current:
+            self.close()
+            self.current = page["pdf"]
+            if os.path.exists(part):
+                os.remove(part)  # PDF a medias de una ejecución interrumpida: se rehace desde los PNG
+        with Image.open(os.path.join(self.pack_dir, PAGES_DIR, page["file"])) as image:
+            image.convert("RGB").save(part, "PDF", resolution=self.dpi, quality=PDF_QUALITY,
+                                      append=os.path.exists(part))
+
+    def advance(self, ready):
+        """Escribe las páginas siguientes del plan mientras ready(página) sea cierto"""
+        while self.next < len(self.pages) and ready(self.pages[self.next]):
+            page = self.pages[self.next]
+            self.next += 1
+            if os.path.exists(os.path.join(self.pack_dir, page["pdf"])):
+                continue  # PDF terminado en una ejecución anterior
+            self._write(page)
+
+
+def _zip_pack(pack_dir, name, pdfs, pages):
+    """
+    Zip con los PDF y los PNG de las páginas (escrito como .part y renombrado al final).
+    Sin compresión: las páginas ya van comprimidas (PNG y JPEG dentro de los PDF).
+    """
+    zip_path = os.path.join(pack_dir, f"{name}.zip")
+    with zipfile.ZipFile(f"{zip_path}.part", "w", compression=zipfile.ZIP_STORED) as zf:
+        for pdf in pdfs:
+            zf.write(os.path.join(pack_dir, pdf), pdf)
+        for page in pages:
+            zf.write(os.path.join(pack_dir, PAGES_DIR, page["file"]), f"png/{page['file']}")
+    os.replace(f"{zip_path}.part", zip_path)
+    return zip_path
+
+
+def export_report_pack(competition=None, season=None, match_week=None, out_dir=PACK_DIR, dpi=PAGE_DPI,
+                       max_workers=None, on_progress=None):
+    """
+    Exporta el paquete de reportes de una temporada o de una jornada: PDF multipágina
+    (Equipos.pdf y Partidos_J<nn>.pdf) y un zip con los PDF y los PNG de cada página.
+
+    Las páginas se dibujan en un pool de procesos y se escriben en disco a medida que
+    terminan; los PDF se van llenando en orden, página a página, así que la memoria no
+    crece con el tamaño del paquete. Si la exportación se interrumpe, la siguiente
+    ejecución solo dibuja las páginas que faltan (mientras no cambien los datos
+    publicados ni la resolución).
+
+    Parámetros:
+    - competition, season: Partición (por defecto la publicada)
+    - match_week: Jornada del paquete (None = temporada completa)
+    - out_dir: Carpeta donde se crea <partición>_J<nn>/ o <partición>_temporada/
+    - dpi: Resolución de las páginas
+    - max_workers: Procesos del pool (1 = sin pool)
+    - on_progress: Función opcional que recibe un evento por página terminada
+
+    Retorna:
+    - Diccionario con la carpeta, los PDF, el zip, las páginas dibujadas y reutilizadas y el tiempo
+    """
+    start = time.perf_counter()
+    if competition is None or season is None:
+        partitions = data_repository.load("partitions")
+        published = partitions.index[partitions["published"] == 1]
+        row = partitions.loc[published[0]] if len(published) else partitions.iloc[-1]
+        competition, season = row["competition"], row["season"]
+
+    name = pack_name(competition, season, match_week)
+    pack_dir = os.path.join(out_dir, name)
+    pages_dir = os.path.join(pack_dir, PAGES_DIR)
+
+    # Las páginas de una ejecución anterior solo se reutilizan con los mismos datos y resolución
+    manifest = {"competition": competition, "season": str(season), "match_week": match_week, "dpi": dpi,
+                "snapshot": data_store.snapshot_id() or str(data_repository.store_signature())}
+    manifest_path = os.path.join(pack_dir, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            if json.load(f) != manifest:
+                print(f"♻️ Los datos cambiaron desde la última exportación de {name}: se empieza de cero.")
+                shutil.rmtree(pack_dir)
+    os.makedirs(pages_dir, exist_ok=True)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    pages = plan_pages(competition, season, match_week)
+    done = {file for file in os.listdir(pages_dir) if file.endswith(".png")}
+    # Las páginas de un PDF ya terminado no se vuelven a dibujar aunque falte su PNG
+    finished_pdfs = {page["pdf"] for page in pages if os.path.exists(os.path.join(pack_dir, page["pdf"]))}
+    pending = [page for page in pages if page["file"] not in done and page["pdf"] not in finished_pdfs]
+    if len(pending) < len(pages):
+        print(f"⏯️ Reanudando {name}: {len(pages) - len(pending)} de {len(pages)} páginas ya estaban listas.")
+
+    stream = _PdfStream(pack_dir, pages, dpi)
+    stream.advance(lambda page: page["file"] in done or page["pdf"] in finished_pdfs)
+    timings = []
+
+    def on_result(result):
+        file, seconds = result
+        done.add(file)
+        timings.append(seconds)
+        stream.advance(lambda page: page["file"] in done or page["pdf"] in finished_pdfs)
+        event = {"step": "pack", "done": len(timings), "total": len(pending), "page": file, "seconds": seconds}
+        if on_progress is not None:
+            on_progress(event)
+        else:
+            print(f"📄 [{event['done']}/{event['total']}] {file} ({seconds:.2f}s)")
+
+    data = pack_data(competition, season, match_week)
+    tasks = [{"page": page, "pages_dir": pages_dir, "dpi": dpi, "data": page_data(page, data)} for page in pending]
+    workers = max_workers or max(1, min(len(tasks), os.cpu_count() or 1))
+    run_partitions(render_page, tasks, workers, on_result)
+    stream.close()
+
+    pdfs = list(dict.fromkeys(page["pdf"] for page in pages))
+    zip_path = os.path.join(pack_dir, f"{name}.zip")
+    if pending or not os.path.exists(zip_path):
+        zip_path = _zip_pack(pack_dir, name, pdfs, [page for page in pages if page["file"] in done])
+    elapsed = time.perf_counter() - start
+    print(f"✅ Paquete {name}: {len(pdfs)} PDF, {len(pages)} páginas ({len(pending)} dibujadas, "
+          f"{len(pages) - len(pending)} reutilizadas) en {elapsed:.2f}s con {workers} proceso(s); "
+          f"dibujo acumulado {sum(timings):.2f}s")
+    return {
+        "pack_dir": pack_dir,
+        "pdfs": [os.path.join(pack_dir, pdf) for pdf in pdfs],
+        "zip": zip_path,
+        "pages": len(pages),
+        "rendered": len(pending),
+        "reused": len(pages) - len(pending),
+        "workers": workers,
+        "seconds": elapsed,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta el paquete de reportes (PDF + zip) de una temporada o jornada.")
+    parser.add_argument("--competition", default=None, help="Competición (por defecto la publicada)")
+    parser.add_argument("--season", default=None, help="Temporada (por defecto la publicada)")
+    parser.add_argument("--jornada", type=int, default=None, help="Jornada (sin indicar: temporada completa)")
+    parser.add_argument("--salida", default=PACK_DIR, help=f"Carpeta de salida (por defecto {PACK_DIR})")
+    parser.add_argument("--dpi", type=int, default=PAGE_DPI, help=f"Resolución de las páginas (por defecto {PAGE_DPI})")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos para dibujar (1 = sin pool)")
+    args = parser.parse_args()
+
+    export_report_pack(args.competition, args.season, args.jornada, out_dir=args.salida, dpi=args.dpi,
+                       max_workers=args.workers)
@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+# Cada regeneración se escribe en data/snapshots/<id>/ y se publica cambiando el puntero
+# CURRENT de una sola vez: quien lee ve la versión anterior completa o la nueva completa
+SNAPSHOTS_DIR = os.path.join("data", "snapshots")
+POINTER_FILE = "CURRENT"
+
+# Snapshots que se conservan (además del publicado)
+RETENTION = 3
+
+
+def snapshots_dir(output_dir="data"):
+    return os.path.join(output_dir, os.path.basename(SNAPSHOTS_DIR))
+
+
+def new_snapshot(output_dir="data"):
+    """
+    Crea la carpeta de un snapshot nuevo (todavía sin publicar).
+
+    Retorna:
+    - (snapshot_id, carpeta); el id ordena cronológicamente ('20250612T101500_123456')
+    """
+    root = snapshots_dir(output_dir)
+    os.makedirs(root, exist_ok=True)
+    snapshot_id = datetime.now().strftime("%Y%m%dT%H%M%S_%f")
+    path = os.path.join(root, snapshot_id)
+    os.makedirs(path)
+    return snapshot_id, path
+
+
+def current_snapshot(output_dir="data"):
+    """Id del snapshot publicado (o None si todavía no se publicó ninguno)"""
+    pointer = os.path.join(snapshots_dir(output_dir), POINTER_FILE)
+    try:
+        with open(pointer, encoding="utf-8") as f:
+            snapshot_id = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return snapshot_id or None
+
+
+def snapshot_path(snapshot_id, name=None, output_dir="data"):
+    """Ruta de un snapshot (o de un archivo dentro de él)"""
+    path = os.path.join(snapshots_dir(output_dir), snapshot_id)
+    return os.path.join(path, name) if name else path
+
+
+def publish_snapshot(snapshot_id, output_dir="data"):
+    """Publica un snapshot reemplazando el puntero CURRENT de forma atómica (os.replace)"""
+    root = snapshots_dir(output_dir)
+    fd, tmp_path = tempfile.mkstemp(dir=root, prefix=".current_")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(snapshot_id)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(root, POINTER_FILE))
+
+
+def cleanup_snapshots(output_dir="data", keep=RETENTION):
+    """
+    Borra los snapshots más antiguos, conservando los `keep` más recientes y el publicado.
+
+    Retorna:
+    - Lista de ids borrados
+    """
+    root = snapshots_dir(output_dir)
+    if not os.path.isdir(root):
+        return []
+    current = current_snapshot(output_dir)
+    ids = sorted(
+        name for name in os.listdir(root)
+        if os.path.isdir(os.path.join(root, name)) and not name.startswith(".")
+    )
+    removed = []
+    for snapshot_id in ids[:max(len(ids) - keep, 0)]:
+        if snapshot_id == current:
+            continue
+        # Una sesión que todavía lee el snapshot puede impedir el borrado (Windows): se reintenta en la siguiente
+        shutil.rmtree(os.path.join(root, snapshot_id), ignore_errors=True)
+        removed.append(snapshot_id)
+    return removed
@@ -0,0 +1,295 @@
+import os
+import math
+import numpy as np
+import pandas as pd
+
+# Nombres de archivo que espera el pipeline (ver generate_csv_files.EXCEL_*)
+MATCH_STATS_FILE = "sb_team_match_stats_2025"
+MATCHES_FILE = "sb_matches_2025"
+SEASON_STATS_FILE = "sb_team_season_stats_2025"
+
+TEAMS_PER_COMPETITION = 16
+WEEKS_PER_SEASON = 30
+FIRST_SEASON = 2025
+ACCOUNT_ID = 7336
+
+# Hasta este número de filas se escriben Excel reales; por encima, Parquet
+MAX_EXCEL_ROWS = 1_000
+
+# -------------------------------------------
+# 📌 ESQUEMA (columnas de StatsBomb y distribución aproximada)
+# -------------------------------------------
+# tipo: 'count' (Poisson), 'pos' (normal >= 0), 'ratio' (normal en [0, 1]), 'signed' (normal)
+TEAM_MATCH_STATS = {
+    "minutes": ("pos", 1110, 37),
+    "np_xg_per_shot": ("pos", 0.58, 0.32),
+    "np_xg": ("pos", 1.08, 0.6),
+    "np_shots": ("count", 13.3, None),
+    "goals": ("count", 1.27, None),
+    "xa": ("pos", 0.79, 0.47),
+    "key_passes": ("count", 9.4, None),
+    "assists": ("count", 0.75, None),
+    "through_balls": ("count", 0.75, None),
+    "passes_into_box": ("count", 10.5, None),
+    "touches_inside_box": ("count", 25.2, None),
+    "tackles": ("count", 18.8, None),
+    "interceptions": ("count", 10.6, None),
+    "possession": ("pos", 7.7, 1.6),
+    "dribbles_faced": ("count", 14.3, None),
+    "dribbles": ("count", 7.4, None),
+    "challenge_ratio": ("ratio", 0.69, 0.12),
+    "fouls": ("count", 13.6, None),
+    "dispossessions": ("count", 12.6, None),
+    "long_balls": ("count", 69.9, None),
+    "successful_long_balls": ("count", 37.2, None),
+    "long_ball_ratio": ("ratio", 0.54, 0.11),
+    "shots_blocked": ("count", 3.5, None),
+    "clearances": ("count", 23.4, None),
+    "aerials": ("count", 33.7, None),
+    "successful_aerials": ("count", 16.9, None),
+    "aerial_ratio": ("ratio", 0.48, 0.12),
+    "passes": ("count", 440, None),
+    "successful_passes": ("count", 341, None),
+    "passing_ratio": ("ratio", 0.75, 0.07),
+    "op_passes": ("count", 391, None),
+    "forward_passes": ("count", 112, None),
+    "backward_passes": ("count", 38, None),
+    "sideways_passes": ("count", 291, None),
+    "op_f3_passes": ("count", 82, None),
+    "op_f3_forward_passes": ("count", 19.7, None),
+    "op_f3_backward_passes": ("count", 8.7, None),
+    "op_f3_sideways_passes": ("count", 53.5, None),
+    "np_shots_on_target": ("count", 4.05, None),
+    "crosses": ("count", 13.2, None),
+    "successful_crosses": ("count", 4.3, None),
+    "crossing_ratio": ("ratio", 0.33, 0.17),
+    "penalties_won": ("count", 0.15, None),
+    "passes_inside_box": ("count", 2.15, None),
+    "op_xa": ("pos", 0.68, 0.44),
+    "op_assists": ("count", 0.66, None),
+    "pressured_long_balls": ("count", 33.4, None),
+    "unpressured_long_balls": ("count", 59.9, None),
+    "aggressive_actions": ("count", 101, None),
+    "turnovers": ("count", 21.5, None),
+    "crosses_into_box": ("count", 3.05, None),
+    "sp_xa": ("pos", 0.11, 0.12),
+    "op_shots": ("count", 9.8, None),
+    "touches": ("count", 776, None),
+    "pressure_regains": ("count", 35, None),
+    "box_cross_ratio": ("ratio", 0.28, 0.18),
+    "deep_progressions": ("count", 43.3, None),
+    "shot_touch_ratio": ("ratio", 0.017, 0.008),
+    "fouls_won": ("count", 12.6, None),
+    "xgchain": ("pos", 5.55, 3.3),
+    "op_xgchain": ("pos", 4.94, 3.1),
+    "xgbuildup": ("pos", 4.33, 2.76),
+    "op_xgbuildup": ("pos", 4.04, 2.6),
+    "xgchain_per_possession": ("pos", 0.21, 0.13),
+    "op_xgchain_per_possession": ("pos", 0.19, 0.12),
+    "xgbuildup_per_possession": ("pos", 0.16, 0.11),
+    "op_xgbuildup_per_possession": ("pos", 0.15, 0.1),
+    "pressures": ("count", 176, None),
+    "pressure_duration_total": ("pos", 149, 42),
+    "pressure_duration_avg": ("pos", 12.2, 2.6),
+    "pressured_action_fails": ("count", 25.6, None),
+    "counterpressures": ("count", 35, None),
+    "counterpressure_duration_total": ("pos", 29.9, 10.4),
+    "counterpressure_duration_avg": ("pos", 9.9, 2.9),
+    "counterpressured_action_fails": ("count", 5.6, None),
+    "obv": ("signed", 1.62, 1.23),
+    "obv_pass": ("signed", 0.83, 0.44),
+    "obv_shot": ("signed", -0.12, 0.55),
+    "obv_defensive_action": ("signed", 0.26, 0.5),
+    "obv_dribble_carry": ("signed", 0.69, 0.38),
+    "obv_gk": ("signed", -0.03, 0.7),
+    "deep_completions": ("count", 3.3, None),
+    "ball_recoveries": ("count", 96, None),
+    "np_psxg": ("pos", 1.09, 0.85),
+    "penalties_faced": ("count", 0.21, None),
+    "penalties_conceded": ("count", 0.19, None),
+    "fhalf_ball_recoveries": ("count", 36.2, None),
+}
+
+# Estadísticas de temporada que usa el cálculo de balón parado
+TEAM_SEASON_STATS = {
+    "corner_xg_pg": ("pos", 0.16, 0.05),
+    "corners_pg": ("pos", 4.75, 0.8),
+    "direct_free_kick_goals_pg": ("pos", 0.017, 0.03),
+    "direct_free_kick_xg_pg": ("pos", 0.02, 0.007),
+    "direct_free_kicks_pg": ("pos", 0.5, 0.15),
+    "free_kick_xg_pg": ("pos", 0.06, 0.03),
+    "free_kicks_pg": ("pos", 12.4, 1.8),
+    "goals_from_corners_pg": ("pos", 0.16, 0.09),
+    "goals_from_free_kicks_pg": ("pos", 0.036, 0.046),
+    "goals_from_throw_ins_pg": ("pos", 0.017, 0.03),
+    "shots_from_corners_pg": ("pos", 1.84, 0.47),
+    "shots_from_direct_free_kicks_pg": ("pos", 0.57, 0.16),
+    "shots_from_free_kicks_pg": ("pos", 0.76, 0.33),
+    "shots_from_throw_ins_pg": ("pos", 0.3, 0.26),
+    "sp_goal_ratio": ("ratio", 0.006, 0.003),
+    "sp_goals_pg": ("pos", 0.23, 0.12),
+    "sp_pg": ("pos", 38.8, 2.4),
+    "sp_shot_ratio": ("ratio", 0.09, 0.016),
+    "throw_in_xg_pg": ("pos", 0.02, 0.02),
+    "throw_ins_pg": ("pos", 21.2, 1.7),
+    "xg_per_sp": ("pos", 0.007, 0.002),
+}
+
+
+def _draw(rng, kind, mean, std, size):
+    """Valores aleatorios de una métrica según su tipo"""
+    if kind == "count":
+        return rng.poisson(mean, size).astype(float)
+    values = rng.normal(mean, std, size)
+    if kind == "pos":
+        return np.abs(values)
+    if kind == "ratio":
+        return np.clip(values, 0, 1)
+    return values
+
+
+def _stats_frame(rng, spec, prefix, size):
+    return pd.DataFrame({prefix + name: _draw(rng, *params, size) for name, params in spec.items()})
+
+
+# -------------------------------------------
+# 📌 GENERACIÓN
+# -------------------------------------------
+def generate_tables(n_rows, seed=0, n_seasons=1):
+    """
+    Genera las tres tablas de StatsBomb con datos sintéticos.
+
+    Cada partido tiene dos filas equipo-partido. Los partidos se reparten en particiones
+    (competición, temporada) de TEAMS_PER_COMPETITION equipos y WEEKS_PER_SEASON jornadas;
+    cuando una partición se llena se abre otra temporada (hasta n_seasons) o competición.
+
+    Parámetros:
+    - n_rows: Número de filas equipo-partido (2 por partido)
+    - seed: Semilla del generador aleatorio
+    - n_seasons: Temporadas por competición
+
+    Retorna:
+    - team_match_stats, matches, team_season_stats (DataFrames con las columnas de StatsBomb)
+    """
+    rng = np.random.default_rng(seed)
+    n_matches = max(1, n_rows // 2)
+    matches_per_week = TEAMS_PER_COMPETITION // 2
+    matches_per_partition = matches_per_week * WEEKS_PER_SEASON
+    n_partitions = math.ceil(n_matches / matches_per_partition)
+
+    # --- Calendario: en cada jornada se emparejan los equipos con una permutación ---
+    n_weeks = n_partitions * WEEKS_PER_SEASON
+    pairings = np.argsort(rng.random((n_weeks, TEAMS_PER_COMPETITION)), axis=1)
+    home_idx = pairings[:, 0::2].ravel()[:n_matches]
+    away_idx = pairings[:, 1::2].ravel()[:n_matches]
+
+    match_no = np.arange(n_matches)
+    partition = match_no // matches_per_partition
+    week = (match_no % matches_per_partition) // matches_per_week + 1
+    competition_no = partition // n_seasons
+    season = FIRST_SEASON - (partition % n_seasons)
+
+    competition_names = np.array([f"Synthetic - Liga {c + 1}" for c in range(competition_no.max() + 1)])
+    home_id = 100_000 + competition_no * 100 + home_idx
+    away_id = 100_000 + competition_no * 100 + away_idx
+    match_id = 5_000_000 + match_no
+    match_date = (
+        pd.to_datetime(season.astype(str) + "-02-01")
+        + pd.to_timedelta((week - 1) * 7, unit="D")
+    ).strftime("%Y-%m-%d")
+
+    # --- Filas equipo-partido (local y visitante) ---
+    team_ids = np.concatenate([home_id, away_id])
+    order = np.argsort(np.concatenate([match_id, match_id]), kind="stable")
+    team_match = _stats_frame(rng, TEAM_MATCH_STATS, "team_match_", 2 * n_matches)
+    team_match.insert(0, "account_id", ACCOUNT_ID)
+    team_match.insert(0, "team_id", team_ids[order])
+    team_match.insert(0, "team_name", pd.Series(team_ids[order]).map(lambda t: f"Equipo {t}").to_numpy())
+    team_match.insert(0, "match_id", np.concatenate([match_id, match_id])[order])
+
+    goals = team_match["team_match_goals"].to_numpy()
+    home_goals = goals[0::2]
+    away_goals = goals[1::2]
+
+    # --- Partidos ---
+    matches = pd.DataFrame({
+        "match_id": match_id,
+        "match_date": match_date,
+        "kick_off": "19:00:00.000",
+        "competition": competition_names[competition_no],
+        "season": season,
+        "home_team": [f"Equipo {t}" for t in home_id],
+        "away_team": [f"Equipo {t}" for t in away_id],
+        "home_score": home_goals,
+        "away_score": away_goals,
+        "attendance": np.nan,
+        "behind_closed_doors": False,
+        "neutral_ground": False,
+        "collection_status": "Complete",
+        "play_status": "Normal",
+        "match_status": "available",
+        "match_status_360": "unscheduled",
+        "last_updated": "2025-07-01T00:00:00.000000",
+        "last_updated_360": np.nan,
+        "match_week": week,
+        "competition_stage": "Regular Season",
+        "stadium": "Estadio Sintético",
+        "referee": "Árbitro Sintético",
+        "home_managers": "Entrenador Local",
+        "away_managers": "Entrenador Visitante",
+        "data_version": "1.1.0",
+        "shot_fidelity_version": 2.0,
+        "xy_fidelity_version": 2.0,
+    })
+
+    # --- Estadísticas de temporada (una fila por equipo y temporada) ---
+    teams = (
+        pd.DataFrame({"team_id": team_ids, "competition_no": np.concatenate([competition_no] * 2),
+                      "season": np.concatenate([season] * 2)})
+        .drop_duplicates()
+        .sort_values(["competition_no", "season", "team_id"])
+        .reset_index(drop=True)
+    )
+    season_stats = _stats_frame(rng, TEAM_SEASON_STATS, "team_season_", len(teams))
+    season_stats.insert(0, "team_season_matches", WEEKS_PER_SEASON)
+    season_stats.insert(0, "season_name", teams["season"].to_numpy())
+    season_stats.insert(0, "season_id", teams["season"].to_numpy() - 1700)
+    season_stats.insert(0, "competition_name", competition_names[teams["competition_no"]])
+    season_stats.insert(0, "competition_id", 1000 + teams["competition_no"].to_numpy())
+    season_stats.insert(0, "team_id", teams["team_id"].to_numpy())
+    season_stats.insert(0, "team_name", [f"Equipo {t}" for t in teams["team_id"]])
+    season_stats.insert(0, "account_id", ACCOUNT_ID)
+
+    return team_match, matches, season_stats
+
+
+def write_synthetic_inputs(n_rows, input_dir, seed=0, n_seasons=1, fmt="auto"):
+    """
+    Escribe los tres archivos de entrada sintéticos en input_dir.
+
+    Parámetros:
+    - fmt: 'xlsx', 'parquet' o 'auto' (Excel hasta MAX_EXCEL_ROWS filas, Parquet por encima)
+
+    Retorna:
+    - Lista de rutas escritas
+    """
+    if fmt == "auto":
+        fmt = "xlsx" if n_rows <= MAX_EXCEL_ROWS else "parquet"
+    if fmt not in ("xlsx", "parquet"):
+        raise ValueError(f"Formato no soportado: {fmt}")
+
+    os.makedirs(input_dir, exist_ok=True)
+    tables = zip(
+        [MATCH_STATS_FILE, MATCHES_FILE, SEASON_STATS_FILE],
+        generate_tables(n_rows, seed=seed, n_seasons=n_seasons),
+    )
+
+    paths = []
+    for name, df in tables:
+        path = os.path.join(input_dir, f"{name}.{fmt}")
+        if fmt == "xlsx":
+            df.to_excel(path, index=False)
+        else:
+            df.to_parquet(path, index=False)
+        paths.append(path)
+    return paths
@@ -0,0 +1,153 @@
+import os
+import sys
+import argparse
+import pandas as pd
+
+# -------------------------------------------
+# 📌 ESQUEMA DE LAS TABLAS
+# -------------------------------------------
+# Textos que se repiten en muchas filas (equipos, competición...) -> category
+CATEGORY_COLUMNS = [
+    "team_name", "competition", "competition_stage", "home_team", "away_team",
+    "result", "match_score", "ranking", "band", "kpi", "form"
+]
+
+# Enteros pequeños (si la columna tiene vacíos se usa el tipo entero con nulos de pandas)
+INT_COLUMNS = {
+    "match_id": "int64",
+    "team_id": "int32",
+    "account_id": "int32",
+    "season": "int16",
+    "match_week": "int8",
+    "max_week": "int8",
+    "n_matches": "int16",
+    "matches": "int16",
+    "published": "int8",
+    "k": "int16",
+    "Rank (avg)": "int16",
+    "Rank": "int16",
+    "rank": "int16",
+    "rank_low": "int16",
+    "rank_high": "int16",
+    "goal_difference": "int8",
+}
+
+DATE_COLUMNS = ["match_date"]
+
+# Columnas de las filas "AVG" de df_final que solo tienen valores de relleno
+SENTINEL_COLUMNS = [
+    "match_id", "match_date", "competition_stage", "home_team", "away_team",
+    "match_score", "result", "goal_difference"
+]
+
+
+def _to_int(series, dtype):
+    """Convierte a entero pequeño; None si la columna no es entera (p. ej. temporada '2024/2025')"""
+    values = pd.to_numeric(series, errors="coerce")
+    if values.isna().sum() != series.isna().sum():
+        return None
+    if values.notna().any() and not (values.dropna() % 1 == 0).all():
+        return None
+    if values.isna().any():
+        return values.astype(dtype.capitalize())
+    return values.astype(dtype)
+
+
+def apply_schema(df):
+    """
+    Aplica el esquema compacto a una tabla: category para nombres, enteros pequeños
+    para ids, jornada y temporada, fechas reales y float32 para los KPIs.
+
+    Las columnas que no cumplen el tipo esperado (p. ej. una temporada "2024/2025")
+    se guardan como category si son texto.
+    """
+    df = df.copy()
+    for col in df.columns:
+        if col in INT_COLUMNS:
+            converted = _to_int(df[col], INT_COLUMNS[col])
+            df[col] = converted if converted is not None else df[col].astype(str).astype("category")
+        elif col in CATEGORY_COLUMNS:
+            df[col] = df[col].astype("category")
+        elif col in DATE_COLUMNS:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+        elif pd.api.types.is_float_dtype(df[col]):
+            df[col] = df[col].astype("float32")
+    return df
+
+
+def split_df_final(df_final):
+    """
+    Separa df_final en partidos y promedios por equipo (filas "AVG").
+
+    Retorna:
+    - matches: Filas por partido
+    - team_averages: Promedio por equipo y ALL_TEAMS_AVG, sin las columnas de relleno
+      de las filas "AVG" (match_id = "AVG", match_date vacía, home_team = "AVG"...)
+    """
+    is_avg = df_final["match_id"].astype(str) == "AVG"
+    matches = df_final[~is_avg].reset_index(drop=True)
+    # Los percentiles ('_pctl') solo tienen valor en las filas de partido
+    match_only = SENTINEL_COLUMNS + [c for c in df_final.columns if c.endswith("_pctl")]
+    team_averages = df_final[is_avg].drop(columns=match_only, errors="ignore").reset_index(drop=True)
+    return matches, team_averages
+
+
+# -------------------------------------------
+# 📌 INFORME DE MEMORIA
+# -------------------------------------------
+def memory_mb(df):
+    """Memoria de un DataFrame en MB (incluyendo el contenido de los textos)"""
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+
+def memory_report(tables):
+    """
+    Compara la memoria de cada tabla antes y después de aplicar el esquema.
+
+    Parámetros:
+    - tables: dict nombre -> DataFrame tal como se lee del CSV
+
+    Retorna:
+    - DataFrame con filas, MB antes, MB después y reducción (%) por tabla
+    """
+    rows = []
+    for name, df in tables.items():
+        before = memory_mb(df)
+        after = memory_mb(apply_schema(df))
+        rows.append({
+            "table": name,
+            "rows": len(df),
+            "mb_before": round(before, 4),
+            "mb_after": round(after, 4),
+            "reduction_pct": round(100 * (1 - after / before), 1) if before else 0.0,
+        })
+    report = pd.DataFrame(rows)
+    total = report[["rows", "mb_before", "mb_after"]].sum()
+    report.loc[len(report)] = {
+        "table": "TOTAL",
+        "rows": int(total["rows"]),
+        "mb_before": round(total["mb_before"], 4),
+        "mb_after": round(total["mb_after"], 4),
+        "reduction_pct": round(100 * (1 - total["mb_after"] / total["mb_before"]), 1) if total["mb_before"] else 0.0,
+    }
+    return report
+
+
+def main(argv=None):
+    """Informe de memoria de las tablas publicadas en data/"""
+    # Import local: data_store importa este módulo
+    import data_store
+
+    parser = argparse.ArgumentParser(description="Memoria de las tablas de AUDAX GoalKPIs con y sin el esquema compacto.")
+    parser.add_argument("--data-dir", default="data", help="Carpeta con los CSV publicados")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(os.path.join(args.data_dir, data_store.TABLE_FILES["matches"])):
+        print(f"❌ No hay datos en {args.data_dir}: ejecuta generate_csv_files.py", file=sys.stderr)
+        return 1
+    tables = data_store.read_partition_tables(args.data_dir)
+    print(memory_report(tables).to_string(index=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
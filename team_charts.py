@@ -0,0 +1,432 @@
+from math import pi
+import pandas as pd
+import matplotlib.pyplot as plt
+import matplotlib.patches as patches
+import matplotlib.patheffects as path_effects
+import matplotlib.colors as mcolors
+import matplotlib.gridspec as gridspec
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from mplsoccer import PyPizza
+from mplsoccer.utils import add_image
+
+import asset_cache
+import render_cache
+
+# Gráficos de equipo de Goal Performance y de la comparativa por partido. Cada función
+# devuelve la figura sin guardarla: las páginas la pasan por render_cache y el exportador
+# de reportes (report_pack.py) la escribe en el PDF.
+
+BG_COLOR = '#0E3F5C'
+
+# KPIs del perfil de equipo (radar, boxplot y tarjetas)
+PROFILE_KPIS = [
+    "Goal Performance Index", "Goal Envolvement Index",
+    "Goal Conversion Index", "Possession GoalChance Index",
+    "corner Efficiency", "freekick Efficiency",
+    "directfk Efficiency", "throw in Efficiency",
+    "SetPiece Eficcacy Index", "GoalSetPiece Performance Index"
+]
+
+# Comparativa por partido: métricas del radar (percentiles) y KPIs evolutivos
+COMPARISON_METRICS = {
+    'np_xg': 'npXG',
+    'np_shots': 'Shots',
+    'obv_shot': 'OBV Shots',
+    'xgchain': 'xG Chance',
+    'goals': 'Goals',
+    'Goal Envolvement Index (norm)': 'Goal Envolvement',
+    'Goal Conversion Index (norm)': 'Goal Conversion',
+    'Possession GoalChance Index (norm)': 'Poss. GoalChance',
+    'Goal Performance Index': 'Goal Performance'
+}
+EVOLUTION_KPIS = [
+    "Goal Envolvement Index (norm)",
+    "Goal Conversion Index (norm)",
+    "Possession GoalChance Index (norm)",
+    "Goal Performance Index"
+]
+
+# Tamaño de la figura comparativa (pulgadas)
+COMPARISON_FIGSIZE = (20, 30)
+
+
+def profile_columns(df):
+    """KPIs de PROFILE_KPIS presentes en GoalKPIs"""
+    return [col for col in PROFILE_KPIS if col in df.columns]
+
+
+def top_values(df):
+    """Filas TopValues (min) y (max) de GoalKPIs (None si no están)"""
+    names = df["team_name"].values
+    if "TopValues (min)" not in names or "TopValues (max)" not in names:
+        return None
+    kpi_names = profile_columns(df)
+    top_min = df.loc[df["team_name"] == "TopValues (min)", kpi_names].iloc[0].astype(float)
+    top_max = df.loc[df["team_name"] == "TopValues (max)", kpi_names].iloc[0].astype(float)
+    return top_min, top_max
+
+
+# -------------------------------------------
+# 📌 PERFIL DE EQUIPO
+# -------------------------------------------
+def team_radar(df, team_name):
+    """Radar (PyPizza) de los KPIs del equipo; en verde claro los que están bajo TopValues (min)"""
+    existing_cols = ["team_name"] + profile_columns(df)
+
+    # Los KPIs se guardan como float32: se redondean para que el radar no muestre decimales espurios
+    team_data = df[df["team_name"] == team_name][existing_cols].iloc[0]
+    values = team_data[1:].astype(float).round(2).values
+    top_min = df[df["team_name"] == "TopValues (min)"][existing_cols[1:]].astype(float).round(2).values[0]
+
+    params = [c.replace(" Index", "").replace(" Efficiency", "").replace(" Eficcacy", "") for c in existing_cols[1:]]
+    min_values = [0.5] * len(params)
+    max_values = [9.5] * len(params)
+    slice_colors = ["lightgreen" if values[i] < top_min[i] else "darkgreen" for i in range(len(values))]
+
+    baker = PyPizza(
+        params=params,
+        min_range=min_values,
+        max_range=max_values,
+        background_color=BG_COLOR,
+        straight_line_color="white",
+        last_circle_color="white",
+        last_circle_lw=1.5,
+        straight_line_lw=1,
+        other_circle_lw=0,
+        other_circle_color="white",
+        inner_circle_size=12,
+    )
+
+    fig1, ax = baker.make_pizza(
+        values,
+        figsize=(8, 8),
+        color_blank_space="same",
+        blank_alpha=0.3,
+        param_location=110,
+        slice_colors=slice_colors,
+        kwargs_slices=dict(facecolor="lightgreen", edgecolor="lightgreen", zorder=1, linewidth=1),
+        kwargs_params=dict(color="lightgreen", fontsize=10, va="center"),
+        kwargs_values=dict(color="white", fontsize=12,
+                           bbox=dict(edgecolor="lightgreen", facecolor="green",
+                                     boxstyle="round,pad=0.2", lw=1))
+    )
+
+    fig1.text(0.5, 0.97, team_name, size=18, ha="center", color="white")
+    fig1.text(0.5, 0.94,
+              "Chile - Primera División | Tactical SetPiece Profile",
+              size=13, ha="center", color="white")
+    fig1.text(0.99, 0.005,
+              "Data from StatsBomb | Code by @Sevi | TPAC Methodology",
+              size=9, color="#F2F2F2", ha="right")
+
+    badge = asset_cache.crest(team_name, asset_cache.layout_px(8, 0.15, render_cache.EXPORT_DPI))
+    add_image(badge, fig1, left=0.435, bottom=0.43, width=0.15, height=0.15)
+    ligue = asset_cache.league_logo(asset_cache.layout_px(8, 0.15, render_cache.EXPORT_DPI))
+    if ligue is not None:
+        add_image(ligue, fig1, left=0.02, bottom=0.01, width=0.15, height=0.15)
+    return fig1
+
+
+def team_boxplot(df, team_name, top_min_vals, top_max_vals, band_label):
+    """
+    KPIs del equipo frente a una banda de referencia.
+
+    Parámetros:
+    - df: GoalKPIs
+    - top_min_vals, top_max_vals: Límites de la banda por KPI (Series indexadas por KPI)
+    - band_label: Nombre de la banda (título)
+    """
+    kpi_names = profile_columns(df)
+    team_vals = df.loc[df["team_name"] == team_name, kpi_names].iloc[0].astype(float)
+    data = [[top_min_vals[kpi], team_vals[kpi], top_max_vals[kpi]] for kpi in kpi_names]
+
+    def get_color(val, mn, mx):
+        return 'lightgreen' if val < mn else 'darkgreen'
+
+    fig2, ax = plt.subplots(figsize=(14, 10))
+    fig2.patch.set_facecolor(BG_COLOR)
+    ax.set_facecolor(BG_COLOR)
+    ax.boxplot(data, vert=False, patch_artist=True, widths=0.6,
+               boxprops=dict(color='white'), medianprops=dict(color='white'),
+               whiskerprops=dict(color='white'), capprops=dict(color='white'),
+               flierprops=dict(marker='o', color='white', alpha=0.5))
+
+    for i, kpi in enumerate(kpi_names):
+        val = team_vals[kpi]
+        color = get_color(val, top_min_vals[kpi], top_max_vals[kpi])
+        ax.plot(val, i+1, 'o', markersize=12, color=color, markeredgecolor='black', markeredgewidth=1.5)
+        ax.text(val, i+1 + 0.2, f'{val:.2f}', ha='center', va='bottom', fontsize=11, color='white', fontweight='bold')
+        ax.text(top_min_vals[kpi] - 0.3, i+1, f'{top_min_vals[kpi]:.2f}', ha='right', va='center', fontsize=9, color='white')
+        ax.text(top_max_vals[kpi] + 0.3, i+1, f'{top_max_vals[kpi]:.2f}', ha='left', va='center', fontsize=9, color='white')
+
+    ax.set_yticks(range(1, len(kpi_names)+1))
+    ax.set_yticklabels(kpi_names, color='white', fontsize=12, fontweight='bold')
+    ax.set_xlabel("Valor", color='white', fontsize=12)
+    ax.tick_params(axis='x', colors='white')
+    for side in ['top', 'right']:
+        ax.spines[side].set_visible(False)
+    for side in ['bottom', 'left']:
+        ax.spines[side].set_color('white')
+    ax.set_title(f'GoalPerformace {team_name} vs {band_label}', color='white', fontsize=16, fontweight='bold')
+
+    badge = asset_cache.crest(team_name, asset_cache.layout_px(14, 0.65, render_cache.EXPORT_DPI))
+    add_image(badge, fig2, left=0.25, bottom=0.2, width=0.65, height=0.65, alpha=0.2)
+    return fig2
+
+
+def team_profile(df, team_name):
+    """Tarjetas de rendimiento: Goal Performance, SetPiece, área de mejora y potencial"""
+    kpi_names = profile_columns(df)
+    top_min, top_max = top_values(df)
+    row = df.loc[df["team_name"] == team_name, kpi_names].iloc[0].astype(float)
+
+    goal_perf = row.get("Goal Performance Index", 5.0)
+    setpiece_perf = row.get("GoalSetPiece Performance Index", 5.0)
+    below = (row < top_min).sum()
+    improvement_pct = (below / len(kpi_names)) * 100
+    x_perf = (row / top_max).mean() * (9.5 - 0.5) + 0.5
+
+    metrics = [
+        ("Goal\nPerformance", goal_perf),
+        ("Goal SetPiece\nPerformance", setpiece_perf),
+        ("Improvement\nArea (%)", improvement_pct),
+        ("xPerformance\nPotential", x_perf)
+    ]
+
+    cmap = plt.get_cmap('Greens')
+    norm = mcolors.Normalize(vmin=0, vmax=10)
+    outline_effect = [path_effects.withStroke(linewidth=2, foreground='black')]
+    spacing = 6
+    box_width, box_height = 3.5, 1
+
+    fig3, ax = plt.subplots(figsize=(20, 5))
+    fig3.patch.set_facecolor(BG_COLOR)
+    ax.set_facecolor(BG_COLOR)
+
+    for i, (label, val) in enumerate(metrics):
+        x0 = i * spacing
+        color = cmap(norm(val))
+        box = patches.FancyBboxPatch((x0, 0.5), width=box_width, height=box_height,
+                                     boxstyle="round,pad=0.2", edgecolor='black', facecolor=color)
+        ax.add_patch(box)
+        ax.text(x0 + box_width/2, 1.3, label, ha='center', va='center',
+                fontsize=18, fontweight='bold', color='white', path_effects=outline_effect)
+        ax.text(x0 + box_width/2, 0.7, f"{val:.2f}", ha='center', va='center',
+                fontsize=35, fontweight='bold', color='white', path_effects=outline_effect)
+
+    ax.set_xlim(-2.5, spacing * len(metrics))
+    ax.set_ylim(0, 2.5)
+    ax.axis('off')
+    ax.set_title(f"{team_name}\nAdvanced Performance Keys", color='lightgray', fontsize=30, fontweight='bold', pad=3)
+
+    badge = asset_cache.crest(team_name, asset_cache.layout_px(20, 0.25, render_cache.EXPORT_DPI))
+    add_image(badge, fig3, left=0.12, bottom=0.75, width=0.25, height=0.25, alpha=0.8)
+    ligue = asset_cache.league_logo(asset_cache.layout_px(20, 0.25, render_cache.EXPORT_DPI))
+    if ligue is not None:
+        add_image(ligue, fig3, left=0.65, bottom=0.73, width=0.25, height=0.25)
+    return fig3
+
+
+# -------------------------------------------
+# 📌 COMPARATIVA POR PARTIDO
+# -------------------------------------------
+def add_percentiles(df):
+    """
+    Columnas percentil de COMPARISON_METRICS. Las calcula el pipeline por competición y
+    temporada; solo se calculan aquí si los datos son de una versión anterior sin ellas.
+    """
+    missing = [col for col in COMPARISON_METRICS if col + "_pctl" not in df.columns]
+    if not missing:
+        return df
+    df = df.copy()
+    for col in missing:
+        df[col + "_pctl"] = df[col].rank(pct=True) * 100
+    return df
+
+
+def home_away(match_rows):
+    """(local, visita) de las dos filas de un partido"""
+    t1, t2 = match_rows.iloc[0], match_rows.iloc[1]
+    return (t1, t2) if t1["team_name"] == t1["home_team"] else (t2, t1)
+
+
+def match_fixtures(df, match_week=None):
+    """
+    Partidos completos (dos filas por match_id) de una jornada o de toda la temporada.
+
+    Retorna:
+    - DataFrame (match_week, match_id, local, visita) ordenado por jornada y match_id
+    """
+    matches = df if match_week is None else df[df["match_week"] == match_week]
+    rows = []
+    for match_id, mdf in matches.groupby(matches["match_id"].astype(str), sort=True):
+        if mdf.shape[0] != 2:
+            continue
+        local, visita = home_away(mdf)
+        rows.append({"match_week": int(local["match_week"]), "match_id": match_id,
+                     "local": local["team_name"], "visita": visita["team_name"]})
+    fixtures = pd.DataFrame(rows, columns=["match_week", "match_id", "local", "visita"])
+    return fixtures.sort_values(["match_week", "match_id"], kind="stable").reset_index(drop=True)
+
+
+def match_comparison(df, equipo, match_id):
+    """
+    Comparativa de un partido desde el punto de vista de `equipo`: radar de percentiles
+    frente al rival, tabla y evolución de los KPIs en la temporada.
+
+    Parámetros:
+    - df: Filas por partido de la temporada (con las columnas percentil, ver add_percentiles)
+    - equipo: Equipo de referencia (dorado)
+    - match_id: Partido a comparar
+
+    Retorna:
+    - Figure de matplotlib (sin pyplot: no comparte estado con otras sesiones ni hilos)
+    """
+    metrics = list(COMPARISON_METRICS)
+    clean_labels = [COMPARISON_METRICS[m] for m in metrics]
+    pctl_metrics = [m + "_pctl" for m in metrics]
+    kpi_list = EVOLUTION_KPIS
+
+    match_df = df.copy()
+    match_df["x_label"] = match_df.apply(lambda row: f"J{row['match_week']}: {row['match_score']}", axis=1)
+
+    mdf = df[df["match_id"].astype(str) == str(match_id)]
+    if mdf.shape[0] != 2:
+        raise ValueError(f"El partido {match_id} no tiene datos de los dos equipos")
+    team_row = mdf[mdf["team_name"] == equipo].iloc[0]
+    rival_row = mdf[mdf["team_name"] != equipo].iloc[0]
+    jornada = team_row["match_week"]
+
+    team_vals = [team_row[m] for m in pctl_metrics] + [team_row[pctl_metrics[0]]]
+    rival_vals = [rival_row[m] for m in pctl_metrics] + [rival_row[pctl_metrics[0]]]
+    angles = [n / float(len(metrics)) * 2 * pi for n in range(len(metrics))] + [0]
+
+    local, visita = (team_row, rival_row) if team_row["team_name"] == team_row["home_team"] else (rival_row, team_row)
+    marcador = f"{int(local['goals'])}-{int(visita['goals'])}"
+    title = f"{local['team_name']} {marcador} {visita['team_name']} - Jornada {jornada}"
+
+    fig = Figure(figsize=COMPARISON_FIGSIZE, facecolor=BG_COLOR)
+    try:
+        gs = gridspec.GridSpec(3, 1, height_ratios=[1.6, 0.6, 1.4], figure=fig)
+
+        # Subtítulo
+        fig.text(0.5, 0.91, "GoalPerformance Team Comparison", ha='center', va='center', color='lightgray', fontsize=26, fontweight='bold')
+
+        # --- RADAR ---
+        radar_ax = fig.add_subplot(gs[0], polar=True, facecolor=BG_COLOR)
+
+        radar_ax.spines['polar'].set_color((0.8, 0.8, 0.8, 0.2))
+        radar_ax.spines['polar'].set_linewidth(1.5)
+
+        radar_ax.plot(angles, team_vals, linewidth=3, label=equipo, color='gold')
+        radar_ax.fill(angles, team_vals, color='gold', alpha=0.4)
+        radar_ax.plot(angles, rival_vals, linewidth=3, label=rival_row["team_name"], color='lightgray')
+        radar_ax.fill(angles, rival_vals, color='lightgray', alpha=0.4)
+        radar_ax.set_xticks(angles[:-1])
+        radar_ax.set_xticklabels(clean_labels, color='white', size=15)
+        radar_ax.set_yticklabels([])
+        radar_ax.grid(True, color="white", linestyle='--', alpha=0.3)
+        radar_ax.set_title(title, color="white", fontsize=20, pad=30)
+
+        legend = radar_ax.legend(loc='lower left', fontsize=20, frameon=False, bbox_to_anchor=(-0.3, -0.1))
+        for text in legend.get_texts():
+            text.set_color('white')
+
+        fig.text(0.97, 0.5, "Data StatsBomb Teams GoalPerformance | code by: @Sevi", color='lightgray', fontsize=12, ha='right', va='bottom')
+
+        # Escudos (decodificados y reducidos una sola vez por proceso)
+        badge_px = asset_cache.layout_px(COMPARISON_FIGSIZE[0], 0.12, render_cache.EXPORT_DPI)
+        add_image(asset_cache.crest(local["team_name"], badge_px), fig, 0.05, 0.82, 0.12, 0.12)
+        add_image(asset_cache.crest(visita["team_name"], badge_px), fig, 0.83, 0.82, 0.12, 0.12)
+
+        # --- TABLA ---
+        tabla_ax = fig.add_subplot(gs[1])
+        tabla_ax.axis("off")
+        df_tabla = pd.DataFrame(
+            [[equipo] + [round(float(team_row[m]), 2) for m in pctl_metrics],
+             [rival_row["team_name"]] + [round(float(rival_row[m]), 2) for m in pctl_metrics]],
+            columns=["Equipo"] + clean_labels
+        )
+
+        def color_cells(value):
+            if value < 40: return '#f4d03f'
+            elif 40 <= value < 65: return '#82e0aa'
+            elif 65 <= value < 85: return '#28b463'
+            else: return '#196f3d'
+
+        def text_color(name): return 'gold' if name == equipo else '#E0E0E0'
+        colores = [[color_cells(val) for val in row] for row in df_tabla.iloc[:, 1:].values]
+        colores_final = [[BG_COLOR] + row for row in colores]
+
+        tabla = tabla_ax.table(
+            cellText=df_tabla.values,
+            colLabels=df_tabla.columns,
+            cellColours=colores_final,
+            cellLoc='center',
+            loc='center'
+        )
+        tabla.auto_set_font_size(False)
+        tabla.set_fontsize(11)
+        tabla.scale(1.3, 2)
+
+        for (i, j), cell in tabla.get_celld().items():
+            cell.set_edgecolor('white')
+            if i == 0:
+                cell.set_text_props(color='white', weight='bold')
+                cell.set_facecolor(BG_COLOR)
+            else:
+                if j == 0:
+                    cell.set_text_props(color=text_color(df_tabla.iloc[i-1, 0]), weight='bold')
+                    cell.set_facecolor(BG_COLOR)
+                else:
+                    cell.set_text_props(color='white', weight='bold')
+
+        # --- KPIs EVOLUTIVOS ---
+        team_df = match_df[match_df["team_name"] == equipo].sort_values("match_week")
+        kpi_ax = fig.add_subplot(gs[2])
+        kpi_ax.axis("off")
+
+        legend_lines = []
+
+        fig.text(0.5, 0.43, "Evolución de KPIs", ha='center', va='center', color='lightgray', fontsize=26, fontweight='bold')
+
+        for i, kpi in enumerate(kpi_list):
+            sub_ax = fig.add_axes([0.07 + (i % 2) * 0.46, 0.04 + (1 - i // 2) * 0.2, 0.4, 0.15], facecolor=BG_COLOR)
+            team_avg = team_df[kpi].mean()
+            all_avg = match_df[kpi].mean()
+
+            # Graficar todos los puntos normales
+            sub_ax.plot(team_df["x_label"], team_df[kpi], marker='o', color='lime', label=equipo, markersize=6)
+
+            # Resaltar nodo de la jornada seleccionada
+            if jornada in team_df["match_week"].values:
+                idx = team_df[team_df["match_week"] == jornada].index[0]
+                x = team_df.loc[idx, "x_label"]
+                y = team_df.loc[idx, kpi]
+                sub_ax.plot(x, y, marker='o', markersize=13, markeredgewidth=2, markeredgecolor='black', markerfacecolor='greenyellow', zorder=5)
+
+            # Líneas promedio
+            sub_ax.axhline(team_avg, color='palegreen', linestyle='--', label=f'Prom. {equipo}')
+            sub_ax.axhline(all_avg, color='lightgray', linestyle=':', label='Prom. Liga')
+
+            if i == 0:
+                legend_lines = [
+                    Line2D([0], [0], color='lime', marker='o', label=equipo),
+                    Line2D([0], [0], color='palegreen', linestyle='--', label=f'Prom. {equipo}'),
+                    Line2D([0], [0], color='lightgray', linestyle=':', label='Prom. Liga')
+                ]
+
+            sub_ax.set_title(kpi.replace(" (norm)", ""), color="white", fontsize=14)
+            sub_ax.tick_params(colors='white', labelsize=10)
+
+            jornadas_labels = team_df["match_week"].apply(lambda x: f"J{x}").tolist()
+            sub_ax.set_xticks(team_df["x_label"])
+            sub_ax.set_xticklabels(jornadas_labels, rotation=30, ha='right')
+            sub_ax.grid(color='white', linestyle='--', alpha=0.2)
+
+        fig.legend(handles=legend_lines, loc='upper center', bbox_to_anchor=(0.5, 0.42), ncol=3, fontsize=18, frameon=False)
+    except Exception:
+        plt.close(fig)
+        raise
+    return fig
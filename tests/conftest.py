@@ -0,0 +1,19 @@
+import os
+import sys
+import pytest
+
+# Los módulos del proyecto están en la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import generate_csv_files
+import synthetic_data
+
+
+@pytest.fixture
+def published(tmp_path, monkeypatch):
+    """Datos sintéticos (4 equipos) publicados en data/ de una carpeta temporal"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(synthetic_data, "TEAMS_PER_COMPETITION", 4)
+    synthetic_data.write_synthetic_inputs(120, "input", fmt="parquet")
+    generate_csv_files.run_pipeline(max_workers=1, input_dir="input", output_dir="data")
+    return tmp_path
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from benchmark_bands import DEFAULT_QUANTILES, TOP_MAX, TOP_MIN, compute_bands, quantile_label
+
+
+def _sorted_bands(values, k, quantiles=DEFAULT_QUANTILES):
+    """Bandas calculadas ordenando cada columna completa (referencia)"""
+    bands = {TOP_MIN: [], TOP_MAX: [], "mean": []}
+    bands.update({quantile_label(q): [] for q in quantiles})
+    for column in values.T:
+        column = np.sort(column[~np.isnan(column)])[::-1]
+        top = column[:k]
+        bands[TOP_MIN].append(top.min() if len(top) else np.nan)
+        bands[TOP_MAX].append(top.max() if len(top) else np.nan)
+        bands["mean"].append(column.mean() if len(column) else np.nan)
+        for q in quantiles:
+            bands[quantile_label(q)].append(np.quantile(column, q) if len(column) else np.nan)
+    return {band: np.array(row) for band, row in bands.items()}
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")  # columna sin datos
+@pytest.mark.parametrize("k", [1, 3, 7, 16, 40])
+def test_compute_bands_equals_sort(k):
+    rng = np.random.default_rng(k)
+    values = rng.uniform(0.5, 9.5, (16, 6)).round(1)  # con empates
+    values[rng.random(values.shape) < 0.15] = np.nan
+    values[:, -1] = np.nan  # KPI sin datos
+
+    bands = compute_bands(values, k=k)
+    expected = _sorted_bands(values, min(k, len(values)))
+    assert list(bands) == [TOP_MIN, TOP_MAX] + [quantile_label(q) for q in DEFAULT_QUANTILES] + ["mean"]
+    for band, row in expected.items():
+        np.testing.assert_allclose(bands[band], row, rtol=1e-12, equal_nan=True)
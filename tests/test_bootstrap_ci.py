@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bootstrap_ci import CHUNK_RESAMPLES, _ranks, bootstrap_means, bootstrap_team_kpis
+
+
+@pytest.fixture
+def team_values():
+    """Valores por partido de 3 KPIs para 6 equipos con distinto número de partidos"""
+    rng = np.random.default_rng(0)
+    team_idx = rng.permutation(np.repeat(np.arange(6), [8, 10, 12, 9, 11, 10]))
+    values = rng.normal(5, 2, (len(team_idx), 3))
+    values[::13, 2] = np.nan
+    return values, team_idx
+
+
+def test_bootstrap_means_same_with_and_without_pool(team_values):
+    values, team_idx = team_values
+    n_resamples = 2 * CHUNK_RESAMPLES + 100  # varios bloques, el último incompleto
+    serial = bootstrap_means(values, team_idx, n_resamples, seed=7, max_workers=1)
+    pooled = bootstrap_means(values, team_idx, n_resamples, seed=7, max_workers=2)
+    assert serial.shape == (n_resamples, 6, 3)
+    np.testing.assert_array_equal(serial, pooled)
+
+
+def test_bootstrap_means_resample_each_team_from_its_own_matches(team_values):
+    values, team_idx = team_values
+    boot = bootstrap_means(values, team_idx, 200, seed=7, max_workers=1)
+    for team in range(6):
+        own = values[team_idx == team, 0]
+        assert (boot[:, team, 0] >= own.min()).all() and (boot[:, team, 0] <= own.max()).all()
+
+
+def test_ranks_ties_get_minimum_rank():
+    values = np.array([[3.0, 5.0, 3.0, np.nan, 5.0, 2.0]])
+    assert _ranks(values).tolist() == [[3, 1, 3, 6, 1, 5]]
+    assert _ranks(values[0]).tolist() == [3, 1, 3, 6, 1, 5]
+
+
+def test_bootstrap_team_kpis_does_not_depend_on_row_order():
+    rng = np.random.default_rng(1)
+    matches = pd.DataFrame({
+        "match_id": np.arange(60) // 2,
+        "team_id": np.tile(np.arange(4), 15),
+    })
+    matches["team_name"] = "Equipo " + matches["team_id"].astype(str)
+    matches["Goal Performance Index"] = rng.normal(5, 2, len(matches))
+
+    result = bootstrap_team_kpis(matches, n_resamples=300, max_workers=1)
+    shuffled = bootstrap_team_kpis(matches.sample(frac=1, random_state=0), n_resamples=300, max_workers=1)
+    pd.testing.assert_frame_equal(
+        result.sort_values(["kpi", "team_id"]).reset_index(drop=True),
+        shuffled.sort_values(["kpi", "team_id"]).reset_index(drop=True),
+    )
+    assert result["rank"].min() == 1
+    assert ((result["ci_low"] <= result["mean"]) & (result["mean"] <= result["ci_high"])).all()
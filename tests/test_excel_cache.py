@@ -0,0 +1,34 @@
+import os
+import pandas as pd
+
+import excel_cache
+from excel_cache import read_excel_cached
+
+
+def _copies(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir) if name.endswith(".parquet"))
+
+
+def test_new_version_evicts_only_copies_with_same_arguments(tmp_path):
+    path, cache_dir = str(tmp_path / "stats.xlsx"), str(tmp_path / "cache")
+    pd.DataFrame({"a": [1, 2], "b": [3, 4]}).to_excel(path, index=False)
+
+    read_excel_cached(path, cache_dir=cache_dir, verbose=False)
+    read_excel_cached(path, cache_dir=cache_dir, verbose=False, usecols=["a"])
+    assert len(_copies(cache_dir)) == 2
+
+    # El Excel cambia: la lectura sin argumentos reemplaza su copia y deja la de usecols
+    pd.DataFrame({"a": [5, 6, 7], "b": [8, 9, 10]}).to_excel(path, index=False)
+    old_usecols = [name for name in _copies(cache_dir)
+                   if name.startswith(f"stats-{excel_cache._copy_key(path, {'usecols': ['a']})}-")]
+    df = read_excel_cached(path, cache_dir=cache_dir, verbose=False)
+    assert df["a"].tolist() == [5, 6, 7]
+    copies = _copies(cache_dir)
+    assert len(copies) == 2
+    assert old_usecols[0] in copies
+
+    # Una copia desactualizada no se sirve: se relee el Excel
+    hits = excel_cache.get_cache_stats()["hits"]
+    assert read_excel_cached(path, cache_dir=cache_dir, verbose=False, usecols=["a"])["a"].tolist() == [5, 6, 7]
+    assert excel_cache.get_cache_stats()["hits"] == hits
+    assert old_usecols[0] not in _copies(cache_dir)
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from form_state import (
+    EWMA_ALPHA, FORM_KPIS, FORM_WINDOW, build_form_state, form_table, is_chronological, update_form_state
+)
+
+KPIS = list(FORM_KPIS.values())
+
+
+@pytest.fixture
+def matches():
+    """Partidos de 6 equipos en 12 jornadas (alguno descansa y hay KPIs vacíos)"""
+    rng = np.random.default_rng(0)
+    teams = np.arange(6)
+    rows = []
+    for week in range(1, 13):
+        date = pd.Timestamp("2025-02-01") + pd.Timedelta(weeks=week - 1)
+        playing = rng.permutation(teams)[:4]
+        for i, team in enumerate(playing):
+            home = playing[i - i % 2]
+            rows.append({"team_name": f"Equipo {team}", "team_id": team, "home_team": f"Equipo {home}",
+                         "match_week": week, "match_date": date.strftime("%Y-%m-%d"),
+                         "match_id": week * 10 + i // 2})
+    df = pd.DataFrame(rows)
+    values = rng.uniform(0, 10, (len(df), len(KPIS)))
+    values[rng.random(values.shape) < 0.1] = np.nan
+    df[KPIS] = values
+    return df
+
+
+def _reference(matches):
+    """Forma calculada con pandas sobre el historial completo de cada equipo"""
+    rows = []
+    for team_id, games in matches.sort_values(["match_week", "match_date"]).groupby("team_id"):
+        home = games["team_name"] == games["home_team"]
+        values = games[KPIS]
+        rows.append({
+            "team_id": team_id,
+            "last": values.tail(FORM_WINDOW).mean().to_numpy(),
+            "ewma": values.ewm(alpha=EWMA_ALPHA, adjust=False, ignore_na=True).mean().iloc[-1].to_numpy(),
+            "home": values[home].mean().to_numpy(),
+            "away": values[~home].mean().to_numpy(),
+        })
+    return pd.DataFrame(rows).set_index("team_id")
+
+
+def _sorted(df):
+    return df.sort_values(["form", "team_id"] if "form" in df else "team_id").reset_index(drop=True)
+
+
+def test_form_table_matches_full_history(matches):
+    table = form_table(build_form_state(matches))
+    reference = _reference(matches)
+    for form in ["last", "ewma", "home", "away"]:
+        rows = table[table["form"] == form].set_index("team_id").loc[reference.index]
+        expected = np.vstack(reference[form].to_numpy())
+        np.testing.assert_allclose(rows[list(FORM_KPIS)].to_numpy(dtype=float), expected, rtol=1e-12)
+
+
+def test_week_by_week_updates_equal_full_build(matches):
+    state = build_form_state(matches[matches["match_week"] == 1])
+    for week in range(2, 13):
+        new = matches[matches["match_week"] == week]
+        assert is_chronological(state, new)
+        state = update_form_state(state, new)
+
+    full = build_form_state(matches)
+    pd.testing.assert_frame_equal(_sorted(form_table(state)), _sorted(form_table(full)), rtol=1e-12)
+
+
+def test_is_chronological_rejects_out_of_order_weeks(matches):
+    state = build_form_state(matches[matches["match_week"] <= 6])
+    assert is_chronological(state, matches[matches["match_week"] == 7])
+
+    # Partido aplazado de la jornada 3 jugado después de la 6: fecha posterior, jornada anterior
+    postponed = matches[matches["match_week"] == 3].head(1).assign(match_date="2025-04-01")
+    assert not is_chronological(state, postponed)
+
+    # Jornada nueva con una fecha anterior al último partido
+    early = matches[matches["match_week"] == 7].assign(match_date="2025-01-15")
+    assert not is_chronological(state, early)
+
+
+def test_is_chronological_compares_dates_not_text(matches):
+    state = build_form_state(matches[matches["match_week"] <= 2])
+    new = matches[matches["match_week"] == 3]
+    # Como texto '2025-02-15' < '2025-2-8', pero la fecha es posterior
+    state["last_date"] = "2025-2-8"
+    assert is_chronological(state, new)
+    assert not is_chronological(state, new.assign(match_date="fecha desconocida"))
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from generate_csv_files import PERCENTILE_METRICS, add_match_percentiles, add_match_scores, build_match_scores
+
+
+@pytest.fixture
+def matches():
+    """Filas por partido (una por equipo) de 30 partidos; al último le falta el visitante"""
+    rng = np.random.default_rng(0)
+    rows = []
+    for match_id in range(1, 31):
+        home, away = (f"Equipo {t}" for t in rng.choice(10, 2, replace=False))
+        for team in [home, away]:
+            rows.append({"match_id": match_id, "team_name": team, "home_team": home, "away_team": away,
+                         "goals": float(rng.integers(0, 4))})
+    return pd.DataFrame(rows[:-1]).sample(frac=1, random_state=0, ignore_index=True)
+
+
+def _score(df, match_id):
+    """Marcador de un partido leyendo sus filas una a una (referencia)"""
+    rows = df[df["match_id"] == match_id]
+    home, away = rows["home_team"].iloc[0], rows["away_team"].iloc[0]
+    goals = dict(zip(rows["team_name"], rows["goals"]))
+    if home not in goals or away not in goals:
+        return None
+    return f"{home}({int(goals[home])}) - {away}({int(goals[away])})"
+
+
+def test_build_match_scores_equals_row_by_row(matches):
+    scores, incomplete = build_match_scores(matches)
+    assert incomplete == [30]
+    assert sorted(scores["match_id"]) == list(range(1, 31))
+    for match_id, score in zip(scores["match_id"], scores["match_score"]):
+        expected = _score(matches, match_id)
+        assert pd.isna(score) if expected is None else score == expected
+
+
+def test_add_match_scores_result_and_goal_difference(matches):
+    df = add_match_scores(matches)
+    assert len(df) == len(matches)
+    assert list(df.columns) == list(matches.columns) + ["match_score", "goal_difference", "result"]
+
+    complete = df[df["match_id"] != 30]
+    for _, row in complete.iterrows():
+        rival = complete[(complete["match_id"] == row["match_id"]) & (complete["team_name"] != row["team_name"])]
+        difference = row["goals"] - rival["goals"].iloc[0]
+        assert row["goal_difference"] == difference
+        assert row["result"] == ("W" if difference > 0 else "D" if difference == 0 else "L")
+
+    incomplete = df[df["match_id"] == 30]
+    assert incomplete["match_score"].isna().all()
+    assert incomplete["goal_difference"].isna().all()
+    assert incomplete["result"].isna().all()
+
+
+def test_add_match_percentiles_within_competition_and_season():
+    rng = np.random.default_rng(1)
+    n = 90
+    matches = pd.DataFrame(rng.integers(0, 6, (n, len(PERCENTILE_METRICS))).astype(float),
+                           columns=PERCENTILE_METRICS)  # con empates
+    matches.iloc[::7, 0] = np.nan
+    matches.insert(0, "season", rng.choice([2024, 2025], n))
+    matches.insert(0, "competition", rng.choice(["Liga A", "Liga B"], n))
+
+    pctl = add_match_percentiles(matches)
+    assert list(pctl.columns) == list(matches.columns) + [col + "_pctl" for col in PERCENTILE_METRICS]
+    for _, group in pctl.groupby(["competition", "season"]):
+        for col in PERCENTILE_METRICS:
+            values = group[col].dropna().to_numpy()
+            for value, result in zip(group[col], group[col + "_pctl"]):
+                if np.isnan(value):
+                    assert np.isnan(result)
+                    continue
+                # Posición media de los empates sobre los partidos con valor del grupo
+                expected = ((values < value).sum() + ((values == value).sum() + 1) / 2) / len(values) * 100
+                assert result == pytest.approx(expected)
@@ -0,0 +1,128 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+import generate_csv_files
+from incremental_state import (
+    AVG_COLUMNS, add_team_sums, changed_matches, compute_team_sums, match_hashes, weekly_cumulative
+)
+from synthetic_data import write_synthetic_inputs
+
+KEYS = ["team_id", "match_week"]
+
+
+@pytest.fixture
+def matches():
+    """Filas por partido con las columnas que se acumulan (8 equipos, 10 jornadas)"""
+    rng = np.random.default_rng(0)
+    teams = np.arange(8)
+    rows = []
+    for week in range(1, 11):
+        for team in rng.permutation(teams)[:6]:  # algún equipo descansa cada jornada
+            rows.append({"team_name": f"Equipo {team}", "team_id": team, "match_week": week,
+                         "match_id": week * 100 + team})
+    df = pd.DataFrame(rows)
+    df[AVG_COLUMNS] = rng.uniform(0, 10, (len(df), len(AVG_COLUMNS)))
+    return df
+
+
+def _sorted(df, keys):
+    return df.sort_values(keys).reset_index(drop=True)
+
+
+def test_weekly_cumulative_incremental_equals_full(matches):
+    # Los partidos nuevos incluyen uno aplazado de una jornada ya procesada
+    postponed = matches.loc[matches["match_week"] == 3, "match_id"].iloc[0]
+    old = matches[(matches["match_week"] <= 6) & (matches["match_id"] != postponed)]
+    new = matches.drop(old.index)
+
+    incremental = weekly_cumulative(new, weekly_cumulative(old))
+    full = weekly_cumulative(matches)
+    pd.testing.assert_frame_equal(_sorted(incremental, KEYS), _sorted(full, KEYS), rtol=1e-12)
+
+
+def test_team_sums_incremental_equals_full(matches):
+    old = matches[matches["match_week"] <= 6]
+    new = matches[matches["match_week"] > 6]
+    incremental = add_team_sums(compute_team_sums(old), compute_team_sums(new))
+    full = compute_team_sums(matches)
+    pd.testing.assert_frame_equal(_sorted(incremental, ["team_id"]), _sorted(full, ["team_id"]), rtol=1e-12)
+
+
+def test_match_hashes_detect_edits_not_row_order(matches):
+    stored = match_hashes(matches)
+    shuffled = matches.sample(frac=1, random_state=0)[matches.columns[::-1]]
+    assert changed_matches(stored, match_hashes(shuffled)) == []
+
+    edited_id, removed_id = matches["match_id"].iloc[[10, 40]]
+    edited = matches.copy()
+    edited.loc[edited["match_id"] == edited_id, "goals"] += 1
+    assert changed_matches(stored, match_hashes(edited)) == [edited_id]
+    assert changed_matches(stored, match_hashes(matches[matches["match_id"] != removed_id])) == [removed_id]
+
+
+# -------------------------------------------
+# 📌 PIPELINE COMPLETO CON DATOS SINTÉTICOS
+# -------------------------------------------
+@pytest.fixture
+def pipeline_dirs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    input_dir = str(tmp_path / "input")
+    write_synthetic_inputs(480, input_dir, fmt="parquet")
+    return input_dir, str(tmp_path / "incremental"), str(tmp_path / "full")
+
+
+def _outputs(output_dir, slug):
+    out_dir = os.path.join(output_dir, "partitions", slug)
+    final = pd.read_csv(os.path.join(out_dir, "df_final.csv"))
+    cumulative = pd.read_csv(os.path.join(out_dir, "df_team_cumulative.csv"))
+    return (_sorted(final, ["match_id", "team_id"]).drop(columns="match_score"),
+            _sorted(cumulative, KEYS))
+
+
+def _run_until_week(monkeypatch, week, **kwargs):
+    load = generate_csv_files.load_match_data
+    def until_week(*args):
+        df = load(*args)
+        return df[df["match_week"] <= week]
+    monkeypatch.setattr(generate_csv_files, "load_match_data", until_week)
+    report = generate_csv_files.run_pipeline(max_workers=1, **kwargs)
+    monkeypatch.setattr(generate_csv_files, "load_match_data", load)
+    return report
+
+
+def _assert_same_outputs(report, incremental_dir, full_dir):
+    slug = report["published"]
+    for incremental, full in zip(_outputs(incremental_dir, slug), _outputs(full_dir, slug)):
+        pd.testing.assert_frame_equal(incremental, full, check_exact=False, rtol=1e-9)
+
+
+def test_incremental_pipeline_equals_full(pipeline_dirs, monkeypatch):
+    input_dir, incremental_dir, full_dir = pipeline_dirs
+    _run_until_week(monkeypatch, 10, input_dir=input_dir, output_dir=incremental_dir)
+    report = generate_csv_files.run_pipeline(incremental=True, max_workers=1,
+                                             input_dir=input_dir, output_dir=incremental_dir)
+    assert "partidos nuevos" in report["partitions"][0]["message"]
+
+    generate_csv_files.run_pipeline(force=True, max_workers=1, input_dir=input_dir, output_dir=full_dir)
+    _assert_same_outputs(report, incremental_dir, full_dir)
+
+
+def test_incremental_pipeline_recomputes_edited_matches(pipeline_dirs, monkeypatch):
+    input_dir, incremental_dir, full_dir = pipeline_dirs
+    generate_csv_files.run_pipeline(max_workers=1, input_dir=input_dir, output_dir=incremental_dir)
+
+    load = generate_csv_files.load_match_data
+    def edited(*args):
+        df = load(*args)
+        df.loc[df["match_id"] == df["match_id"].min(), "np_xg"] += 1.0
+        return df
+    monkeypatch.setattr(generate_csv_files, "load_match_data", edited)
+
+    report = generate_csv_files.run_pipeline(incremental=True, max_workers=1,
+                                             input_dir=input_dir, output_dir=incremental_dir)
+    assert report["partitions"][0]["message"].startswith("etapas ejecutadas")
+
+    generate_csv_files.run_pipeline(force=True, max_workers=1, input_dir=input_dir, output_dir=full_dir)
+    _assert_same_outputs(report, incremental_dir, full_dir)
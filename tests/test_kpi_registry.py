@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from generate_csv_files import compute_match_kpis, normalize_match_kpis
+from kpi_registry import MATCH_KPIS, component_columns, evaluate_kpis, get_kpi
+
+
+@pytest.fixture
+def stats():
+    """Estadísticas por partido aleatorias con todas las columnas que usan los índices"""
+    rng = np.random.default_rng(0)
+    columns = component_columns(MATCH_KPIS) + ["minutes", "np_shots", "possession"]
+    df = pd.DataFrame(rng.uniform(0, 20, (200, len(columns))), columns=columns)
+    df.loc[:4, "np_shots"] = 0  # partidos sin tiros: división por cero como en las fórmulas originales
+    return df
+
+
+def _original_kpis(df):
+    """GEI, GCI y PGC con las fórmulas que usaba generate_csv_files antes del registro"""
+    return pd.DataFrame({
+        "Goal Envolvement Index": (
+            (df["xa"] + df["key_passes"] + df["assists"]) * (10 * 0.3) / 3 +
+            (df["through_balls"] + df["passes_into_box"] + df["passes_inside_box"] + df["crosses_into_box"]) * (10 * 0.2) / 4 +
+            df["box_cross_ratio"] * (10 * 0.05) +
+            (df["sp_xa"] + df["deep_progressions"] + df["touches_inside_box"]) * (10 * 0.15) / 3 +
+            (df["xgchain"] + df["xgbuildup"]) * (10 * 0.1) / 2 +
+            (df["xgchain_per_possession"] + df["xgbuildup_per_possession"]) * (10 * 0.1) / 2 +
+            (df["obv_pass"] + df["obv_dribble_carry"]) * (10 * 0.05) / 2 +
+            df["forward_passes"] * (10 * 0.05)
+        ) / df["minutes"],
+        "Goal Conversion Index": (
+            df["goals"] * (10 * 0.3) +
+            df["np_xg"] * (10 * 0.2) +
+            df["np_xg_per_shot"] * (10 * 0.2) +
+            df["np_shots_on_target"] * (10 * 0.1) +
+            df["shot_touch_ratio"] * (10 * 0.1) +
+            df["penalties_won"] * (10 * 0.05) +
+            df["obv_shot"] * (10 * 0.05)
+        ) / df["np_shots"],
+        "Possession GoalChance Index": (
+            (df["key_passes"] + df["assists"] + df["xa"] + df["xgchain"]) * (10 * 0.85) / 4 +
+            df["touches_inside_box"] * (10 * 0.15)
+        ) / df["possession"],
+    })
+
+
+def test_match_kpis_match_original_formulas(stats):
+    result = evaluate_kpis(stats)
+    pd.testing.assert_frame_equal(result, _original_kpis(stats), rtol=1e-12)
+    assert np.isinf(result["Goal Conversion Index"].iloc[:5]).all()
+
+
+def test_normalized_kpis_match_original_pipeline_with_empty_matches(stats):
+    # Partidos sin tiros ni acciones de remate: 0 / 0 -> NaN, que se rellena con 0.01 antes
+    # de normalizar. El relleno no se escala, así que solo coincide con la misma fórmula
+    df = stats.copy()
+    df.loc[:4, list(get_kpi("Goal Conversion Index")["components"])] = 0
+
+    raw = _original_kpis(df).fillna(0.01)
+    assert (raw["Goal Conversion Index"].iloc[:5] == 0.01).all()
+    expected = (raw - raw.min()) / (raw.max() - raw.min()) * 9 + 0.5
+
+    result, _ = normalize_match_kpis(compute_match_kpis(df))
+    for kpi in MATCH_KPIS:
+        np.testing.assert_allclose(result[kpi + " (norm)"], expected[kpi], rtol=1e-12)
+
+
+def test_goal_performance_index_matches_original_formula():
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame(rng.uniform(0.5, 9.5, (100, 3)), columns=[
+        "Goal Envolvement Index (norm)", "Goal Conversion Index (norm)", "Possession GoalChance Index (norm)"
+    ])
+    expected = ((
+        df["Goal Envolvement Index (norm)"] * 3 +
+        df["Goal Conversion Index (norm)"] * 4.5 +
+        df["Possession GoalChance Index (norm)"] * 2
+    ) / 9.5 + 3).clip(upper=9.75)
+
+    result = evaluate_kpis(df, ["Goal Performance Index"])["Goal Performance Index"]
+    pd.testing.assert_series_equal(result, expected, check_names=False, rtol=1e-12)
+    assert (result == 9.75).any()
+
+
+def test_setpiece_index_matches_original_formula():
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame(rng.uniform(0.5, 9.5, (16, 4)), columns=[
+        "corner_subindex_norm", "free_kick_subindex_norm", "directfk_subindex_norm", "throw_in_subindex_norm"
+    ])
+    expected = (
+        df["corner_subindex_norm"] * 0.50 +
+        df["free_kick_subindex_norm"] * 0.25 +
+        df["directfk_subindex_norm"] * 0.15 +
+        df["throw_in_subindex_norm"] * 0.10
+    )
+
+    result = evaluate_kpis(df, ["SetPiece Eficcacy Index"])["SetPiece Eficcacy Index"]
+    pd.testing.assert_series_equal(result, expected, check_names=False, rtol=1e-12)
+
+
+def test_prefix_selects_prefixed_columns(stats):
+    prefixed = stats.add_prefix("team_match_")
+    pd.testing.assert_frame_equal(evaluate_kpis(prefixed, prefix="team_match_"), evaluate_kpis(stats))
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from opponent_adjustment import ADJUSTED_KPIS, add_opponent_adjusted, fit_attack_defence, opponent_rows
+
+
+@pytest.fixture
+def league():
+    """Dos grupos (competición, temporada) de 6 y 5 equipos con emparejamientos aleatorios"""
+    rng = np.random.default_rng(0)
+    team_idx, opp_idx, group_idx = [], [], []
+    for group, teams in enumerate([np.arange(6), np.arange(6, 11)]):
+        for _ in range(40):
+            home, away = rng.choice(teams, 2, replace=False)
+            team_idx += [home, away]
+            opp_idx += [away, home]
+            group_idx += [group, group]
+    values = rng.normal(5, 2, (len(team_idx), 3))
+    return values, np.array(team_idx), np.array(opp_idx), np.array(group_idx), 11
+
+
+def _dense_fit(values, team_idx, opp_idx, group_idx, n_teams, alpha):
+    """Mismo modelo resuelto con matrices densas y np.linalg.solve, KPI a KPI"""
+    centered = values - pd.DataFrame(values).groupby(group_idx).transform("mean").to_numpy()
+    design = np.zeros((len(values), 2 * n_teams))
+    design[np.arange(len(values)), team_idx] = 1
+    design[np.arange(len(values)), n_teams + opp_idx] = 1
+
+    solution = np.full((2 * n_teams, values.shape[1]), np.nan)
+    for k in range(values.shape[1]):
+        valid = ~np.isnan(centered[:, k])
+        X, y = design[valid], centered[valid, k]
+        solution[:, k] = np.linalg.solve(X.T @ X + alpha * np.eye(2 * n_teams), X.T @ y)
+    return solution[:n_teams], solution[n_teams:]
+
+
+def test_sparse_ridge_matches_dense_solve(league):
+    attack, defence = fit_attack_defence(*league, alpha=2.0)
+    expected_attack, expected_defence = _dense_fit(*league, alpha=2.0)
+    np.testing.assert_allclose(attack, expected_attack, rtol=1e-10, atol=1e-12)
+    np.testing.assert_allclose(defence, expected_defence, rtol=1e-10, atol=1e-12)
+
+
+def test_sparse_ridge_with_missing_values_matches_dense_solve(league):
+    values, *rest = league
+    values = values.copy()
+    values[::7, 1] = np.nan
+    attack, defence = fit_attack_defence(values, *rest, alpha=0.5)
+    expected_attack, expected_defence = _dense_fit(values, *rest, alpha=0.5)
+    np.testing.assert_allclose(attack, expected_attack, rtol=1e-10, atol=1e-12)
+    np.testing.assert_allclose(defence, expected_defence, rtol=1e-10, atol=1e-12)
+
+
+def test_add_opponent_adjusted_subtracts_opponent_defence(league):
+    values, team_idx, opp_idx, group_idx, n_teams = league
+    kpis = list(ADJUSTED_KPIS)
+    rng = np.random.default_rng(1)
+    matches = pd.DataFrame({
+        "match_id": np.arange(len(team_idx)) // 2,
+        "team_id": team_idx,
+        "competition": "Liga",
+        "season": group_idx + 2024,
+    })
+    matches[kpis] = rng.normal(5, 2, (len(matches), len(kpis)))
+    # Un partido sin la fila del rival se queda sin ajustar
+    matches = pd.concat([matches, matches.iloc[[0]].assign(match_id=-1)], ignore_index=True)
+
+    result = add_opponent_adjusted(matches, alpha=2.0)
+    opponent = opponent_rows(matches)
+    fitted = opponent >= 0
+    _, defence = _dense_fit(matches.loc[fitted, kpis].to_numpy(), team_idx, opp_idx, group_idx, n_teams, 2.0)
+
+    adjusted = result[list(ADJUSTED_KPIS.values())].to_numpy()
+    np.testing.assert_allclose(adjusted[fitted], matches.loc[fitted, kpis].to_numpy() - defence[opp_idx], rtol=1e-10)
+    np.testing.assert_array_equal(adjusted[~fitted], matches.loc[~fitted, kpis].to_numpy())
@@ -0,0 +1,35 @@
+import os
+import pytest
+
+import partitioning
+from partitioning import publish_partition
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    source, target = tmp_path / "partition", tmp_path / "data"
+    source.mkdir()
+    target.mkdir()
+    for name, text in [("a.csv", "nuevo"), ("b.csv", "igual")]:
+        (source / name).write_text(text)
+    (target / "a.csv").write_text("anterior")
+    (target / "b.csv").write_text("igual")
+    return source, target
+
+
+def test_publish_partition_copies_only_changed_files(dirs):
+    source, target = dirs
+    assert publish_partition(str(source), ["a.csv", "b.csv", "falta.csv"], str(target)) == ["a.csv"]
+    assert (target / "a.csv").read_text() == "nuevo"
+    assert sorted(os.listdir(target)) == ["a.csv", "b.csv"]
+
+
+def test_publish_partition_keeps_old_file_if_replace_fails(dirs, monkeypatch):
+    source, target = dirs
+    def fail(*args):
+        raise OSError("disco lleno")
+    monkeypatch.setattr(partitioning.os, "replace", fail)
+    with pytest.raises(OSError):
+        publish_partition(str(source), ["a.csv"], str(target))
+    assert (target / "a.csv").read_text() == "anterior"
+    assert sorted(os.listdir(target)) == ["a.csv", "b.csv"]
@@ -0,0 +1,65 @@
+import importlib
+import textwrap
+import pytest
+
+from pipeline_stages import code_hash
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """Módulos de un proyecto mínimo: la etapa llama a un auxiliar que importa otro módulo"""
+    files = {
+        "etapas_demo.py": """
+            import auxiliar_demo
+
+            FACTOR = 2
+
+            def _escala(x):
+                return x * FACTOR
+
+            def etapa(x):
+                return auxiliar_demo.indice(_escala(x))
+
+            def otra_funcion():
+                return 0
+        """,
+        "auxiliar_demo.py": """
+            from pesos_demo import PESO
+
+            def indice(x):
+                return x * PESO
+        """,
+        "pesos_demo.py": "PESO = 0.5\n",
+        "sin_uso_demo.py": "VALOR = 1\n",
+    }
+    for name, text in files.items():
+        (tmp_path / name).write_text(textwrap.dedent(text))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    for name in files:
+        monkeypatch.delitem(__import__("sys").modules, name[:-3], raising=False)
+    return tmp_path, importlib.import_module("etapas_demo")
+
+
+def _edit(path, old, new):
+    path.write_text(path.read_text().replace(old, new))
+
+
+def test_code_hash_follows_helper_modules(project):
+    root, module = project
+    before = code_hash([module.etapa])
+
+    # Cambios que no afectan a la etapa
+    _edit(root / "sin_uso_demo.py", "1", "2")
+    _edit(root / "etapas_demo.py", "return 0", "return 1")
+    assert code_hash([module.etapa]) == before
+
+    # Un módulo auxiliar importado de forma indirecta
+    _edit(root / "pesos_demo.py", "0.5", "0.75")
+    assert code_hash([module.etapa]) != before
+
+
+def test_code_hash_follows_same_module_functions_and_constants(project):
+    _, module = project
+    before = code_hash([module.etapa])
+    module.FACTOR = 3
+    assert code_hash([module.etapa]) != before
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+import data_store
+from ranking_engine import (
+    ADJUSTED_DISPLAY_KPIS, AS_OF_KPIS, DEFAULT_RANKINGS, DISPLAY_KPIS, build_rankings, goal_kpis_as_of,
+    rank_descending, team_kpis_as_of
+)
+
+
+def test_rank_descending_ties_get_minimum_rank():
+    values = np.array([3.0, 5.0, 3.0, 1.0, 5.0, 2.0])
+    order, ranks = rank_descending(values)
+    assert values[order].tolist() == [5.0, 5.0, 3.0, 3.0, 2.0, 1.0]
+    assert ranks.tolist() == [1, 1, 3, 3, 5, 6]
+
+
+def test_rank_descending_matches_pandas_min_rank():
+    values = np.random.default_rng(0).integers(0, 8, 50).astype(float)
+    order, ranks = rank_descending(values)
+    expected = pd.Series(values).rank(ascending=False, method="min").astype(int).to_numpy()
+    np.testing.assert_array_equal(ranks, expected[order])
+
+
+def test_build_rankings_matches_sort_by_min_rank():
+    rng = np.random.default_rng(1)
+    team_avg = pd.DataFrame(rng.uniform(0.5, 9.5, (16, len(DISPLAY_KPIS))).round(1), columns=DISPLAY_KPIS)
+    team_avg.insert(0, "team_id", np.arange(100, 116))
+    team_avg.insert(0, "team_name", [f"Equipo {i}" for i in range(16)])
+
+    rankings = build_rankings(team_avg, match_week=13)
+    assert set(rankings) == set(DEFAULT_RANKINGS)
+    for suffix, kpi in DEFAULT_RANKINGS.items():
+        ranking = rankings[suffix]
+        expected = team_avg[kpi].rank(ascending=False, method="min").astype(int)
+        ranks = dict(zip(team_avg["team_id"], expected))
+        assert ranking["Rank (avg)"].tolist() == [ranks[t] for t in ranking["team_id"]]
+        assert ranking[kpi].is_monotonic_decreasing
+        assert (ranking["match_week"] == 13).all()
+        assert list(ranking.columns) == ["Rank (avg)", "team_name", "team_id", "match_week"] + DISPLAY_KPIS
+
+
+# -------------------------------------------
+# 📌 KPIs A UNA JORNADA (datos publicados)
+# -------------------------------------------
+def _last_week_cumulative():
+    competition, season = data_store.default_partition()
+    weeks = data_store.get_team_cumulative(competition=competition, season=season)["match_week"]
+    return data_store.get_team_cumulative(weeks.max(), competition, season)
+
+
+def test_team_kpis_as_of_last_week_equals_match_means(published):
+    as_of = team_kpis_as_of(_last_week_cumulative()).set_index("team_id").sort_index()
+    matches = data_store.get_matches()
+    means = matches.groupby("team_id")[list(AS_OF_KPIS.values())].mean().sort_index()
+    assert (as_of["n_matches"] == matches.groupby("team_id").size().sort_index()).all()
+    np.testing.assert_allclose(as_of[list(AS_OF_KPIS)].to_numpy(), means.to_numpy(), rtol=1e-5)
+
+
+def test_goal_kpis_as_of_last_week_equals_goal_kpis(published):
+    goal_kpis = data_store.get_goal_kpis()
+    as_of = goal_kpis_as_of(goal_kpis, _last_week_cumulative())
+
+    columns = [col for col in goal_kpis.columns if col not in ADJUSTED_DISPLAY_KPIS]
+    assert list(as_of.columns) == columns
+    expected = goal_kpis[columns].astype({"team_name": str}).sort_values("team_name", ignore_index=True)
+    as_of = as_of.sort_values("team_name", ignore_index=True)
+    assert as_of["team_name"].tolist() == expected["team_name"].tolist()
+    assert as_of["Rank (avg)"].tolist() == expected["Rank (avg)"].tolist()
+    # Las dos tablas se redondean a 2 decimales (GoalKPIs además se guarda en float32)
+    values = columns[columns.index("match_week"):]
+    np.testing.assert_allclose(as_of[values].to_numpy(dtype=float), expected[values].to_numpy(dtype=float),
+                               atol=0.01 + 1e-5)
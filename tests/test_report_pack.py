@@ -0,0 +1,67 @@
+import os
+import re
+import pytest
+
+import data_store
+import report_pack
+
+
+@pytest.fixture
+def published(published):
+    """Datos publicados (conftest) sin paquetes cargados de otra prueba"""
+    report_pack._data.clear()
+    return published
+
+
+def _pdf_pages(path):
+    """Páginas de un PDF escrito por Pillow (el /Count de la última actualización)"""
+    with open(path, "rb") as f:
+        return int(re.findall(rb"/Count (\d+)", f.read())[-1])
+
+
+def test_export_resumes_interrupted_pack(published):
+    out_dir = str(published / "reportes")
+    first = report_pack.export_report_pack(match_week=1, out_dir=out_dir, dpi=20, max_workers=1)
+    pages_dir = os.path.join(first["pack_dir"], report_pack.PAGES_DIR)
+    files = sorted(os.listdir(pages_dir))
+    pages = {pdf: _pdf_pages(pdf) for pdf in first["pdfs"]}
+    assert first["rendered"] == first["pages"] == len(files) == sum(pages.values())
+
+    # Interrupción a mitad del PDF de partidos: falta su última página y queda un .part;
+    # el PNG que falta de Equipos.pdf (ya terminado) no se vuelve a dibujar
+    matches_pdf = next(pdf for pdf in first["pdfs"] if "Partidos" in pdf)
+    removed = [file for file in files if "comparison" in file][-1:] + [files[-4]]
+    with open(os.path.join(pages_dir, removed[0]), "rb") as f:
+        original = f.read()
+    for file in removed:
+        os.remove(os.path.join(pages_dir, file))
+    os.replace(matches_pdf, f"{matches_pdf}.part")
+    os.remove(first["zip"])
+
+    second = report_pack.export_report_pack(match_week=1, out_dir=out_dir, dpi=20, max_workers=1)
+    assert second["rendered"] == 1
+    assert second["reused"] == first["pages"] - 1
+    assert sorted(os.listdir(pages_dir)) == sorted(set(files) - {removed[1]})
+    assert {pdf: _pdf_pages(pdf) for pdf in second["pdfs"]} == pages
+    assert not [file for file in os.listdir(second["pack_dir"]) if file.endswith(".part")]
+    assert os.path.exists(second["zip"])
+    with open(os.path.join(pages_dir, removed[0]), "rb") as f:
+        assert f.read() == original
+
+    # Sin cambios no se dibuja nada
+    third = report_pack.export_report_pack(match_week=1, out_dir=out_dir, dpi=20, max_workers=1)
+    assert third["rendered"] == 0
+
+
+def test_render_page_uses_only_task_data(published, tmp_path):
+    competition, season = data_store.default_partition()
+    pages = report_pack.plan_pages(competition, season, match_week=1)
+    data = report_pack.pack_data(competition, season, match_week=1)
+    # Un proceso del pool iniciado con spawn no tiene los datos cargados en el proceso principal
+    report_pack._data.clear()
+    for page in [pages[0], pages[-1]]:
+        task = {"page": page, "pages_dir": str(tmp_path), "dpi": 20, "data": report_pack.page_data(page, data)}
+        file, _ = report_pack.render_page(task)
+        assert os.path.getsize(tmp_path / file) > 0
+    assert report_pack._data == {}
+